@@ -0,0 +1,279 @@
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# Members with these extensions are already compressed and are stored
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.zip', '.kra', '.cbz', '.webp', '.gz'}
+
+# Same thresholds as zipfile; beyond them Zip64 records are written and
+# the classic fields hold the 0xFFFF... marker
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+_ZIP64_MARKER = 0xFFFFFFFF
+_COUNT_MARKER = 0xFFFF
+
+_DEFLATED = 8
+_STORED = 0
+_UTF8_FLAG = 0x800
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """Convert a timestamp to DOS (time, date) fields."""
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _compress_member(source, compress: bool, level: int,
+                     mtime: Optional[float]) -> Dict[str, Any]:
+    """Read and compress one member; runs in a worker thread.
+
+    zlib releases the GIL while deflating and computing the CRC, so
+    members compress in parallel.
+    """
+    if isinstance(source, bytes):
+        data = source
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+        mtime = os.path.getmtime(source)
+
+    crc = zlib.crc32(data) & 0xffffffff
+    if compress:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        payload = compressor.compress(data) + compressor.flush()
+        method = _DEFLATED
+    else:
+        payload = data
+        method = _STORED
+
+    return {
+        'crc': crc,
+        'size': len(data),
+        'payload': payload,
+        'method': method,
+        'mtime': mtime,
+    }
+
+
+class ParallelZipWriter:
+    """ZIP writer that deflates members concurrently in a thread pool.
+
+    Members are compressed by worker threads but written to the archive
+    strictly in the order they were added, so output is deterministic.
+    Only a sliding window of members is held in memory at once.
+    """
+
+    def __init__(self, path: str, max_workers: Optional[int] = None, level: int = 6):
+        self.path = path
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.level = level
+        self._members: List[Tuple[str, Any, bool, Optional[float]]] = []
+
+    def add_file(self, arcname: str, source_path: str,
+                 compress: Optional[bool] = None) -> None:
+        """Queue a file as archive member.
+
+        Args:
+            arcname: Name inside the archive
+            source_path: File to read
+            compress: Deflate the member; by default already compressed
+                formats (JPEG, ZIP-based files) are stored
+        """
+        if compress is None:
+            compress = os.path.splitext(arcname)[1].lower() not in STORED_EXTENSIONS
+        self._members.append((arcname, source_path, compress, None))
+
+    def add_bytes(self, arcname: str, data: bytes, compress: bool = True,
+                  mtime: Optional[float] = None) -> None:
+        """Queue in-memory data as archive member.
+
+        Args:
+            arcname: Name inside the archive
+            data: Member contents
+            compress: Deflate the member
+            mtime: Modification timestamp, defaults to now
+        """
+        self._members.append((arcname, bytes(data), compress,
+                              time.time() if mtime is None else mtime))
+
+    def write(self) -> int:
+        """Compress all queued members and write the archive.
+
+        The archive is written to a temporary file and renamed into place
+        when complete.
+
+        Returns:
+            Number of members written
+        """
+        tmp_path = self.path + '.part'
+        central = []
+        window = self.max_workers * 2
+        members = iter(self._members)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                open(tmp_path, 'wb') as out:
+            pending = deque()
+
+            def fill():
+                while len(pending) < window:
+                    member = next(members, None)
+                    if member is None:
+                        return
+                    arcname, source, compress, mtime = member
+                    pending.append((arcname, executor.submit(
+                        _compress_member, source, compress, self.level, mtime)))
+
+            fill()
+            while pending:
+                arcname, future = pending.popleft()
+                entry = future.result()
+                fill()
+                central.append(self._write_local(out, arcname, entry))
+
+            self._write_central(out, central)
+
+        os.replace(tmp_path, self.path)
+        return len(central)
+
+    def _write_local(self, out, arcname: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Write a local file header and member data."""
+        name = arcname.encode('utf-8')
+        offset = out.tell()
+        size = entry['size']
+        csize = len(entry['payload'])
+        dos_time, dos_date = _dos_datetime(entry['mtime'])
+
+        zip64 = size >= ZIP64_LIMIT or csize >= ZIP64_LIMIT
+        extra = struct.pack('<HHQQ', 0x0001, 16, size, csize) if zip64 else b''
+        out.write(struct.pack(
+            '<IHHHHHIIIHH',
+            0x04034b50,
+            45 if zip64 else 20,
+            _UTF8_FLAG,
+            entry['method'],
+            dos_time, dos_date,
+            entry['crc'],
+            _ZIP64_MARKER if zip64 else csize,
+            _ZIP64_MARKER if zip64 else size,
+            len(name), len(extra)
+        ))
+        out.write(name)
+        out.write(extra)
+        out.write(entry['payload'])
+
+        return {
+            'name': name,
+            'offset': offset,
+            'size': size,
+            'csize': csize,
+            'crc': entry['crc'],
+            'method': entry['method'],
+            'dos_time': dos_time,
+            'dos_date': dos_date,
+        }
+
+    def _write_central(self, out, central: List[Dict[str, Any]]) -> None:
+        """Write the central directory and end records."""
+        cd_offset = out.tell()
+        for entry in central:
+            fields = []
+            size, csize, offset = entry['size'], entry['csize'], entry['offset']
+            if size >= ZIP64_LIMIT:
+                fields.append(size)
+                size = _ZIP64_MARKER
+            if csize >= ZIP64_LIMIT:
+                fields.append(csize)
+                csize = _ZIP64_MARKER
+            if offset >= ZIP64_LIMIT:
+                fields.append(offset)
+                offset = _ZIP64_MARKER
+            extra = b''
+            if fields:
+                extra = struct.pack('<HH', 0x0001, 8 * len(fields)) + \
+                    struct.pack('<' + 'Q' * len(fields), *fields)
+
+            out.write(struct.pack(
+                '<IHHHHHHIIIHHHHHII',
+                0x02014b50,
+                (3 << 8) | 45,
+                45 if extra else 20,
+                _UTF8_FLAG,
+                entry['method'],
+                entry['dos_time'], entry['dos_date'],
+                entry['crc'],
+                csize, size,
+                len(entry['name']), len(extra), 0,
+                0, 0,
+                0o100644 << 16,
+                offset
+            ))
+            out.write(entry['name'])
+            out.write(extra)
+        cd_end = out.tell()
+        cd_size = cd_end - cd_offset
+        count = len(central)
+
+        if (count >= ZIP_FILECOUNT_LIMIT or cd_offset >= ZIP64_LIMIT or
+                cd_size >= ZIP64_LIMIT):
+            out.write(struct.pack(
+                '<IQHHIIQQQQ',
+                0x06064b50, 44, 45, 45, 0, 0,
+                count, count, cd_size, cd_offset
+            ))
+            out.write(struct.pack('<IIQI', 0x07064b50, 0, cd_end, 1))
+            out.write(struct.pack(
+                '<IHHHHIIH',
+                0x06054b50, 0, 0,
+                _COUNT_MARKER, _COUNT_MARKER, _ZIP64_MARKER, _ZIP64_MARKER, 0
+            ))
+        else:
+            out.write(struct.pack(
+                '<IHHHHIIH',
+                0x06054b50, 0, 0, count, count, cd_size, cd_offset, 0
+            ))
+
+
+def benchmark_archive(
+    files: List[str],
+    output_dir: str,
+    worker_counts: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    """Measure archive wall-clock time for different worker counts.
+
+    Args:
+        files: Member files, deflated regardless of extension
+        output_dir: Directory for the test archives
+        worker_counts: Pool sizes to try, defaults to 1, 2, 4, ... up to
+            the number of CPUs
+
+    Returns:
+        One row per worker count with 'workers', 'seconds' and 'bytes'
+    """
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for workers in worker_counts:
+        path = os.path.join(output_dir, f"bench_{workers}.zip")
+        writer = ParallelZipWriter(path, max_workers=workers)
+        for file in files:
+            writer.add_file(os.path.basename(file), file, compress=True)
+        start = time.perf_counter()
+        writer.write()
+        rows.append({
+            'workers': workers,
+            'seconds': time.perf_counter() - start,
+            'bytes': os.path.getsize(path),
+        })
+    return rows
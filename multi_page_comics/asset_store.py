@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImageReader
+
+
+logger = logging.getLogger(__name__)
+
+
+class AssetStore:
+    """Project-local content-addressed store for imported images.
+
+    Files are stored once under objects/<first two hex digits>/<sha256>,
+    whatever path they were imported from, so the same reference image
+    used in many panels is kept and decoded from a single copy. Downscaled
+    variants are cached under variants/ for layers that only need a
+    panel-sized image. Source paths are remembered with their size and
+    modification time so re-importing an unchanged file skips hashing.
+
+    Importing and creating variants may run on worker threads; see
+    prepare. Once prepared, the same calls return from the cache.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.index: Dict[str, Dict[str, Any]] = {'objects': {}, 'sources': {}}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def prepare(self, path: str, max_size: int) -> Tuple[str, str]:
+        """Import a file and create its variant for a max_size box.
+
+        Hashes, copies and decodes, so call it from a worker thread.
+
+        Args:
+            path: Path of the file to import
+            max_size: Maximum width and height in pixels
+
+        Returns:
+            (digest, path of the file a layer should reference)
+        """
+        digest = self.import_file(path)
+        return digest, self.variant(digest, max_size)
+
+    def import_file(self, path: str) -> str:
+        """Add a file to the store.
+
+        Args:
+            path: Path of the file to import
+
+        Returns:
+            SHA-256 digest identifying the stored content
+        """
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        with self._lock:
+            cached = self.index['sources'].get(source)
+        if (cached and cached['size'] == stat.st_size and
+                cached['mtime_ns'] == stat.st_mtime_ns and
+                cached['digest'] in self.index['objects'] and
+                os.path.exists(self.path_for(cached['digest']))):
+            return cached['digest']
+
+        ext = Path(source).suffix.lower()
+        objects = self.root / 'objects'
+        objects.mkdir(parents=True, exist_ok=True)
+
+        # Hash while copying so the file is only read once
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=str(objects), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out, open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+                    out.write(block)
+            hexdigest = digest.hexdigest()
+
+            target = self._object_path(hexdigest, ext)
+            if target.exists():
+                os.unlink(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self.index['objects'].setdefault(hexdigest, {'ext': ext, 'size': stat.st_size})
+            self.index['sources'][source] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'digest': hexdigest,
+            }
+            self._save_index()
+        return hexdigest
+
+    def path_for(self, digest: str) -> str:
+        """Get the stored file of an asset.
+
+        Args:
+            digest: Asset digest
+
+        Returns:
+            Path of the stored file
+        """
+        with self._lock:
+            ext = self.index['objects'].get(digest, {}).get('ext', '')
+        return str(self._object_path(digest, ext))
+
+    def variant(self, digest: str, max_size: int) -> str:
+        """Get a copy of an asset downscaled to fit max_size, cached on disk.
+
+        Only the image header is read when the original already fits;
+        otherwise the image is decoded (at the target size where the
+        format supports it), so call this from a worker thread when the
+        variant may not exist yet.
+
+        Args:
+            digest: Asset digest
+            max_size: Maximum width and height in pixels
+
+        Returns:
+            Path of the variant, or of the original if it already fits
+            or cannot be decoded
+        """
+        original = self.path_for(digest)
+        variant_path = self.root / 'variants' / f"{digest}_{max_size}.png"
+        if variant_path.exists():
+            return str(variant_path)
+
+        reader = QImageReader(original)
+        size = reader.size()
+        if size.isValid():
+            if size.width() <= max_size and size.height() <= max_size:
+                return original
+            reader.setScaledSize(size.scaled(QSize(max_size, max_size), Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return original
+        if not size.isValid():
+            if image.width() <= max_size and image.height() <= max_size:
+                return original
+            image = image.scaled(max_size, max_size, Qt.KeepAspectRatio,
+                                 Qt.SmoothTransformation)
+
+        variant_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(variant_path.parent), suffix='.part')
+        os.close(fd)
+        if not image.save(tmp_path, 'PNG'):
+            os.unlink(tmp_path)
+            logger.error(f"Could not write asset variant {variant_path}")
+            return original
+        os.replace(tmp_path, variant_path)
+        return str(variant_path)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get store statistics.
+
+        Returns:
+            Dictionary with object count, stored bytes, and the number of
+            imported source paths
+        """
+        with self._lock:
+            objects = dict(self.index['objects'])
+            source_count = len(self.index['sources'])
+        return {
+            'object_count': len(objects),
+            'stored_bytes': sum(o['size'] for o in objects.values()),
+            'source_count': source_count,
+        }
+
+    def _object_path(self, digest: str, ext: str) -> Path:
+        return self.root / 'objects' / digest[:2] / f"{digest}{ext}"
+
+    def _load_index(self) -> None:
+        index_path = self.root / self.INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.index['objects'].update(index.get('objects', {}))
+            self.index['sources'].update(index.get('sources', {}))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read asset index {index_path}: {e}")
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        index_path = self.root / self.INDEX_FILE
+        tmp_path = str(index_path) + '.part'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, Callable
+from PyQt5.QtCore import QTimer
+
+
+logger = logging.getLogger(__name__)
+
+
+SIDECAR_SUFFIX = '.autosave.json'
+BACKUP_SUFFIX = '.autosave.bak.json'
+SIDECAR_FORMAT = 1
+
+
+def sidecar_path(project_file: str) -> str:
+    """Get the autosave sidecar path for a project file.
+
+    Args:
+        project_file: Path of the .kra or .comicproj file
+
+    Returns:
+        Sidecar path next to the project file
+    """
+    return project_file + SIDECAR_SUFFIX
+
+
+def read_sidecar(project_file: str) -> Optional[Dict[str, Any]]:
+    """Read the newest valid autosave sidecar of a project.
+
+    The current sidecar and the previous generation are both checked, so
+    a crash while replacing the sidecar still leaves a usable copy.
+
+    Args:
+        project_file: Path of the .kra or .comicproj file
+
+    Returns:
+        Envelope dictionary with 'saved_at' and 'project', or None
+    """
+    newest = None
+    for path in (project_file + SIDECAR_SUFFIX, project_file + BACKUP_SUFFIX):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                envelope = json.load(f)
+        except (OSError, ValueError):
+            continue
+        project = envelope.get('project') if isinstance(envelope, dict) else None
+        if (envelope.get('format') != SIDECAR_FORMAT or
+                not isinstance(project, dict) or
+                not isinstance(project.get('pages'), list)):
+            logger.warning(f"Ignoring invalid autosave sidecar {path}")
+            continue
+        if newest is None or envelope.get('saved_at', 0) > newest.get('saved_at', 0):
+            newest = envelope
+    return newest
+
+
+class ProjectAutosave:
+    """Debounced background autosave of the project model.
+
+    Every model change restarts a timer; when changes settle, the project
+    JSON is serialized on the GUI thread, where the model is edited, so
+    the snapshot is always consistent. Only the resulting text goes to a
+    worker thread, which writes it atomically (temp file, fsync, rename)
+    to a sidecar next to the project file. The previous sidecar is kept
+    as one backup generation.
+
+    The model is small (layer pixels live in the documents), so
+    serializing is cheap; the disk I/O is what is kept off the GUI
+    thread. A write whose snapshot was overtaken by newer edits before
+    it started is skipped, the pending timer saves the newer state.
+    """
+
+    def __init__(
+        self,
+        get_project: Callable[[], Optional[Dict[str, Any]]],
+        get_project_file: Callable[[], Optional[str]],
+        json_default: Optional[Callable[[Any], Any]] = None,
+        delay_ms: int = 2000
+    ):
+        """Create the autosave service.
+
+        Args:
+            get_project: Returns the current project model
+            get_project_file: Returns the path the sidecar belongs to
+            json_default: Serializer for non-JSON values in the model
+            delay_ms: Quiet period after the last change before saving
+        """
+        self.get_project = get_project
+        self.get_project_file = get_project_file
+        self.json_default = json_default
+        self.enabled = True
+        self._revision = 0
+        self._saved_revision = 0
+        self._future: Optional[Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def schedule(self) -> None:
+        """Note a model change and (re)start the debounce timer."""
+        self._revision += 1
+        if self.enabled:
+            self._timer.start()
+
+    def flush(self, wait: bool = False) -> None:
+        """Save pending changes now instead of after the quiet period.
+
+        Args:
+            wait: Block until the sidecar has been written
+        """
+        self._timer.stop()
+        self._flush()
+        if wait and self._future is not None:
+            self._future.result()
+
+    def _flush(self) -> None:
+        if self._revision == self._saved_revision:
+            return
+        project = self.get_project()
+        project_file = self.get_project_file()
+        if not project or not project_file:
+            return
+        if self._future is not None and not self._future.done():
+            # One write at a time; try again once this one finished
+            self._timer.start()
+            return
+        try:
+            data = json.dumps({
+                'format': SIDECAR_FORMAT,
+                'saved_at': time.time(),
+                'revision': self._revision,
+                'project': project,
+            }, default=self.json_default)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Autosave serialization error: {e}")
+            return
+        self._future = self._executor.submit(
+            self._write, self._revision, data, project_file
+        )
+
+    def _write(self, revision: int, data: str, project_file: str) -> bool:
+        if revision != self._revision:
+            return False
+
+        path = sidecar_path(project_file)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                os.replace(path, project_file + BACKUP_SUFFIX)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Autosave error: {e}")
+            return False
+
+        self._saved_revision = revision
+        return True
@@ -0,0 +1,330 @@
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Set
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QImageReader
+from .utils.layer_utils import LayerChange
+
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = {'.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp', '.webp'}
+
+# "012.tif" is a whole page, "012_3.tif" / "p12-panel3.tif" panel 3 of page 12
+DEFAULT_PATTERN = r'(?P<page>\d+)(?:\D+(?P<panel>\d+))?'
+
+
+def map_folder(
+    folder: str,
+    pattern: str = DEFAULT_PATTERN,
+    extensions=IMAGE_EXTENSIONS
+) -> List[Dict[str, Any]]:
+    """Map the image files of a folder onto pages and panels.
+
+    The pattern is searched in each file name (without extension). Its
+    'page' group gives the 1-based page number; the optional 'panel'
+    group the 1-based panel number, without it the image covers the
+    whole page.
+
+    Args:
+        folder: Folder to scan
+        pattern: Regular expression with 'page' and optional 'panel' groups
+        extensions: File extensions to consider
+
+    Returns:
+        Entries with 'path', 'page' and 'panel' (0-based indices, panel
+        None for whole pages) in page and panel order. Files that do not
+        match get an entry with page None.
+    """
+    regex = re.compile(pattern)
+    entries = []
+    for name in os.listdir(folder):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in extensions:
+            continue
+        match = regex.search(stem)
+        page = panel = None
+        if match and match.group('page'):
+            page = int(match.group('page')) - 1
+            if 'panel' in regex.groupindex and match.group('panel'):
+                panel = int(match.group('panel')) - 1
+        entries.append({
+            'path': os.path.join(folder, name),
+            'page': page,
+            'panel': panel,
+        })
+
+    entries.sort(key=lambda e: (
+        e['page'] is None, e['page'] or 0,
+        -1 if e['panel'] is None else e['panel'], e['path']
+    ))
+    return entries
+
+
+def decode_scaled(path: str, width: int, height: int) -> Optional[QImage]:
+    """Decode an image scaled to fit a box, keeping its aspect ratio.
+
+    Runs on worker threads. Readers that support scaled decoding (JPEG)
+    decode at the target size directly.
+
+    Args:
+        path: Image file
+        width: Box width in pixels
+        height: Box height in pixels
+
+    Returns:
+        ARGB32 image or None if the file cannot be decoded
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > width or size.height() > height):
+        reader.setScaledSize(size.scaled(QSize(width, height), Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        logger.error(f"Could not decode {path}: {reader.errorString()}")
+        return None
+    if image.width() > width or image.height() > height:
+        image = image.scaled(width, height, Qt.KeepAspectRatio,
+                             Qt.SmoothTransformation)
+    return image.convertToFormat(QImage.Format_ARGB32)
+
+
+class BatchImporter:
+    """Imports a folder of scans into a project's pages and panels.
+
+    Files are mapped by name (see map_folder). Saved projects import
+    them through the project's asset store (see
+    ComicProjectManager.import_images), as file layers referencing
+    panel-sized variants that are shared between panels and made in a
+    thread pool. Projects without a store yet get the files decoded and
+    downscaled to their panel size in a thread pool and inserted as
+    paint layers in batches; each page's projection is refreshed once
+    per batch rather than once per image. Decoding runs ahead of
+    insertion by a bounded window, so memory stays proportional to the
+    batch size.
+    """
+
+    def __init__(
+        self,
+        project_manager,
+        max_workers: Optional[int] = None,
+        batch_size: int = 16
+    ):
+        self.project_manager = project_manager
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.batch_size = max(1, batch_size)
+
+    def import_folder(
+        self,
+        folder: str,
+        pattern: str = DEFAULT_PATTERN,
+        create_pages: bool = True,
+        blending_mode: Optional[str] = None,
+        progress: Optional[Callable[[int, int], Optional[bool]]] = None
+    ) -> Dict[str, Any]:
+        """Import every matching image of a folder.
+
+        Args:
+            folder: Folder with the scans
+            pattern: File name pattern, see map_folder
+            create_pages: Add pages to the project for page numbers past
+                its end
+            blending_mode: Optional blending mode for the new layers,
+                e.g. 'multiply' for pencils on white paper
+            progress: Called with (done, total) after every batch
+                (every image through the asset store); returning False
+                cancels the import
+
+        Returns:
+            Summary with 'imported', 'failed' and 'unmatched' file lists,
+            'cancelled' and 'seconds'
+        """
+        start = time.perf_counter()
+        summary = {'imported': [], 'failed': [], 'unmatched': [],
+                   'cancelled': False, 'seconds': 0.0}
+        if not self.project_manager.current_project:
+            return summary
+
+        jobs = []
+        for entry in map_folder(folder, pattern):
+            target = self._target(entry, create_pages)
+            if target is None:
+                summary['unmatched'].append(entry['path'])
+            else:
+                jobs.append(target)
+
+        total = len(jobs)
+        if self.project_manager.get_asset_store() is not None:
+            self._import_stored(jobs, blending_mode, progress, summary)
+            summary['seconds'] = time.perf_counter() - start
+            logger.info(
+                f"Imported {len(summary['imported'])}/{total} images through the "
+                f"asset store in {summary['seconds']:.1f}s "
+                f"({len(summary['unmatched'])} unmatched, {len(summary['failed'])} failed)"
+            )
+            return summary
+
+        done = 0
+        window = self.max_workers + self.batch_size
+        job_iter = iter(jobs)
+        layer_change = LayerChange()
+        pages = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+
+            def fill():
+                while len(pending) < window:
+                    job = next(job_iter, None)
+                    if job is None:
+                        return
+                    bounds = job['bounds']
+                    pending.append((job, executor.submit(
+                        decode_scaled, job['path'],
+                        bounds['width'], bounds['height'])))
+
+            fill()
+            while pending:
+                batch = []
+                while pending and len(batch) < self.batch_size:
+                    job, future = pending.popleft()
+                    batch.append((job, future.result()))
+                    fill()
+
+                self._insert_batch(batch, blending_mode, summary, layer_change, pages)
+                done += len(batch)
+                if progress and progress(done, total) is False:
+                    summary['cancelled'] = True
+                    for _, future in pending:
+                        future.cancel()
+                    break
+
+        # The layers made so far are one undo step, even when cancelled
+        self.project_manager.record_layer_change("Import Folder", layer_change, pages)
+        summary['seconds'] = time.perf_counter() - start
+        logger.info(
+            f"Imported {len(summary['imported'])}/{total} images in "
+            f"{summary['seconds']:.1f}s ({len(summary['unmatched'])} unmatched, "
+            f"{len(summary['failed'])} failed)"
+        )
+        return summary
+
+    def _target(self, entry: Dict[str, Any], create_pages: bool) -> Optional[Dict[str, Any]]:
+        """Resolve a mapped file to its page, parent layer and bounds."""
+        if entry['page'] is None or entry['page'] < 0:
+            return None
+
+        project = self.project_manager.current_project
+        while create_pages and len(project['pages']) <= entry['page']:
+            if not self.project_manager.add_page():
+                return None
+        page = self.project_manager.get_page(entry['page'])
+        if not page:
+            return None
+
+        if entry['panel'] is None:
+            settings = project['settings']
+            layer_id = page.get('layer_id')
+            bounds = {'x': 0, 'y': 0,
+                      'width': settings['page_width'],
+                      'height': settings['page_height']}
+        else:
+            if not 0 <= entry['panel'] < len(page['panels']):
+                return None
+            panel = page['panels'][entry['panel']]
+            layer_id = panel.get('layer_id')
+            bounds = panel['bounds']
+
+        if layer_id is None or bounds['width'] <= 0 or bounds['height'] <= 0:
+            return None
+        return {
+            'path': entry['path'],
+            'page': entry['page'],
+            'panel': entry['panel'],
+            'layer_id': layer_id,
+            'bounds': bounds,
+        }
+
+    def _import_stored(
+        self,
+        jobs: List[Dict[str, Any]],
+        blending_mode: Optional[str],
+        progress: Optional[Callable[[int, int], Optional[bool]]],
+        summary: Dict[str, Any]
+    ) -> None:
+        """Import the files through the project's asset store."""
+        done = 0
+
+        def report(count, total):
+            nonlocal done
+            done = count
+            return progress(count, total) if progress else None
+
+        results = self.project_manager.import_images(
+            [(job['page'], job['panel'], job['path']) for job in jobs],
+            blending_mode=blending_mode,
+            max_workers=self.max_workers,
+            progress=report
+        )
+        for job, result in zip(jobs[:done], results):
+            summary['imported' if result is not None else 'failed'].append(job['path'])
+        summary['cancelled'] = done < len(jobs)
+
+    def _insert_batch(
+        self,
+        batch: List,
+        blending_mode: Optional[str],
+        summary: Dict[str, Any],
+        layer_change: LayerChange,
+        pages: Set[int]
+    ) -> None:
+        """Create the layers of one batch, refreshing each document once.
+
+        The new layers are recorded in layer_change and the indices of
+        the pages they were added to in pages.
+
+        Jobs are in page order; a page's document is refreshed before the
+        next page is fetched, since fetching may close it in multi-document
+        projects.
+        """
+        doc = None
+        doc_page = None
+        for job, image in batch:
+            if image is None:
+                summary['failed'].append(job['path'])
+                continue
+
+            if job['page'] != doc_page:
+                if doc is not None:
+                    doc.refreshProjection()
+                doc = self.project_manager.get_page_document(job['page'])
+                doc_page = job['page']
+            parent = doc.nodeByUniqueID(job['layer_id']) if doc else None
+            if not parent:
+                summary['failed'].append(job['path'])
+                continue
+
+            layer = doc.createNode(os.path.basename(job['path']), 'paintlayer')
+            if blending_mode:
+                layer.setBlendingMode(blending_mode)
+            parent.addChildNode(layer, None)
+            layer_change.attached(layer)
+            pages.add(job['page'])
+
+            # Center the scaled image in its panel
+            bounds = job['bounds']
+            x = bounds['x'] + (bounds['width'] - image.width()) // 2
+            y = bounds['y'] + (bounds['height'] - image.height()) // 2
+            ptr = image.constBits()
+            ptr.setsize(image.byteCount())
+            layer.setPixelData(ptr.asstring(), x, y, image.width(), image.height())
+            summary['imported'].append(job['path'])
+
+        if doc is not None:
+            doc.refreshProjection()
@@ -0,0 +1,351 @@
+import argparse
+import json
+import logging
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+
+logger = logging.getLogger(__name__)
+
+
+RESULT_PREFIX = 'COMICCLI-RESULT '
+DEFAULT_RUNNER = 'kritarunner'
+WORKER_MODULE = 'multi_page_comics.cli'
+
+USAGE = """\
+The driver runs in plain Python, outside Krita:
+
+    python multi_page_comics/cli.py run issue_*.comicproj \\
+        --script ops.json --export cbz:exports/{name} --jobs 4
+
+It splits the projects over --jobs worker processes. Each worker is
+started through Krita's batch runner (or any stand-in accepting the same
+arguments, see --runner) as
+
+    kritarunner -s multi_page_comics.cli -f __main__ worker ...
+
+and processes its share of projects one after another, printing one
+result line per project. The driver collects the lines and reports
+per-project timing.
+
+An operations script is a JSON list applied to every project in order,
+pages are 1-based:
+
+    [{"op": "add_page", "template": "grid_2x2", "count": 4},
+     {"op": "apply_template", "page": 1, "template": "splash"},
+     {"op": "move_page", "page": 5, "to": 2},
+     {"op": "manifest", "path": "issue_pages.json"},
+     {"op": "save"}]
+"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser shared by driver and worker."""
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description="Apply scripted operations to comic projects and export them.",
+        epilog=USAGE,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest='command')
+
+    def add_common(command):
+        command.add_argument('projects', nargs='+',
+                             help="Project files (.kra or .comicproj)")
+        command.add_argument('--script',
+                             help="JSON list of operations applied to each project")
+        command.add_argument('--export', action='append', default=[],
+                             metavar='FORMAT:DIR',
+                             help="Export format and output directory; {name} is "
+                                  "replaced by the project name. Repeatable.")
+        command.add_argument('--profiles', metavar='DIR',
+                             help="Export the default profiles (print, web, CBZ) "
+                                  "in one pass into DIR")
+        command.add_argument('--save', action='store_true',
+                             help="Save each project after its operations")
+
+    run = commands.add_parser('run', help="Process projects in parallel worker processes")
+    add_common(run)
+    run.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                     help="Number of worker processes (default: CPU count)")
+    run.add_argument('--runner', default=DEFAULT_RUNNER,
+                     help="Command starting a worker, called with kritarunner's "
+                          "-s/-f arguments (default: kritarunner)")
+    run.add_argument('--report', help="Write the per-project results as JSON")
+
+    worker = commands.add_parser('worker', help="Process projects in this Krita process")
+    add_common(worker)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Driver entry point.
+
+    Returns:
+        Process exit code, 1 if any project failed
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'worker':
+        return run_worker(args)
+    if args.command != 'run':
+        build_parser().print_help()
+        return 2
+
+    start = time.perf_counter()
+    results = run_parallel(args)
+    wall = time.perf_counter() - start
+
+    print(format_report(results, wall))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': wall, 'projects': results}, f, indent=2)
+    return 0 if results and all(r['ok'] for r in results) else 1
+
+
+def __main__(args):
+    """kritarunner entry point; args are the arguments after -f __main__."""
+    return main(list(args))
+
+
+def run_parallel(args) -> List[Dict[str, Any]]:
+    """Split projects over worker processes and collect their results."""
+    projects = [os.path.abspath(p) for p in args.projects]
+    chunks = split_projects(projects, max(1, args.jobs))
+    passthrough = worker_options(args)
+    runner = shlex.split(args.runner)
+
+    def run_chunk(chunk):
+        command = runner + ['-s', WORKER_MODULE, '-f', '__main__',
+                            'worker'] + passthrough + chunk
+        started = time.perf_counter()
+        try:
+            completed = subprocess.run(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True
+            )
+        except OSError as e:
+            return [_failed(p, f"Could not start {args.runner}: {e}") for p in chunk]
+        results = parse_results(completed.stdout)
+        reported = {r['project'] for r in results}
+        # Projects without a result line were lost, e.g. to a crash
+        detail = completed.stderr.strip().splitlines()[-1:] or [f"exit code {completed.returncode}"]
+        for project in chunk:
+            if project not in reported:
+                results.append(_failed(project, f"No result from worker: {detail[0]}"))
+        for result in results:
+            result['worker_seconds'] = time.perf_counter() - started
+        return results
+
+    results = []
+    with ThreadPoolExecutor(max_workers=len(chunks) or 1) as executor:
+        for chunk_results in executor.map(run_chunk, chunks):
+            results.extend(chunk_results)
+    order = {p: i for i, p in enumerate(projects)}
+    results.sort(key=lambda r: order.get(r['project'], len(order)))
+    return results
+
+
+def split_projects(projects: List[str], jobs: int) -> List[List[str]]:
+    """Balance projects over jobs, largest first onto the least loaded job.
+
+    Project size on disk stands in for processing time, so one worker
+    does not end up with all the long issues.
+    """
+    def size(path):
+        try:
+            if path.endswith('.comicproj'):
+                pages = os.path.join(os.path.dirname(path), 'pages')
+                return sum(e.stat().st_size for e in os.scandir(pages) if e.is_file())
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    sizes = {path: size(path) or 1 for path in projects}
+    chunks = [[] for _ in range(min(jobs, len(projects)))]
+    loads = [0] * len(chunks)
+    for path in sorted(projects, key=sizes.get, reverse=True):
+        i = loads.index(min(loads))
+        chunks[i].append(path)
+        loads[i] += sizes[path]
+    return [chunk for chunk in chunks if chunk]
+
+
+def worker_options(args) -> List[str]:
+    """Options forwarded from the driver to each worker."""
+    options = []
+    if args.script:
+        options += ['--script', os.path.abspath(args.script)]
+    for spec in args.export:
+        options += ['--export', spec]
+    if args.profiles:
+        options += ['--profiles', args.profiles]
+    if args.save:
+        options.append('--save')
+    return options
+
+
+def parse_results(output: str) -> List[Dict[str, Any]]:
+    """Extract worker result lines from process output."""
+    results = []
+    for line in output.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            try:
+                results.append(json.loads(line[len(RESULT_PREFIX):]))
+            except ValueError:
+                continue
+    return results
+
+
+def format_report(results: List[Dict[str, Any]], wall: float) -> str:
+    """Per-project timing table."""
+    lines = [f"{'project':40} {'status':7} {'load':>7} {'ops':>7} {'export':>7} {'total':>7}"]
+    for r in results:
+        name = os.path.basename(r['project'])[:40]
+        status = 'ok' if r['ok'] else 'FAILED'
+        timing = ' '.join(f"{r.get(k, 0.0):7.2f}" for k in ('load', 'ops', 'export', 'total'))
+        lines.append(f"{name:40} {status:7} {timing}")
+        if r.get('error'):
+            lines.append(f"    {r['error']}")
+    failed = sum(1 for r in results if not r['ok'])
+    lines.append(f"{len(results)} projects, {failed} failed, {wall:.1f}s wall time")
+    return '\n'.join(lines)
+
+
+def run_worker(args) -> int:
+    """Process projects inside Krita, printing one result line per project."""
+    operations = []
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            operations = json.load(f)
+    exports = [parse_export(spec) for spec in args.export]
+
+    failed = 0
+    for project in args.projects:
+        result = process_project(project, operations, exports, args.profiles, args.save)
+        failed += not result['ok']
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+    return 1 if failed else 0
+
+
+def parse_export(spec: str):
+    """Split a FORMAT:DIR export argument."""
+    format, _, output_dir = spec.partition(':')
+    if not output_dir:
+        raise ValueError(f"Export needs FORMAT:DIR, got {spec!r}")
+    return format.lower(), output_dir
+
+
+def process_project(
+    project: str,
+    operations: List[Dict[str, Any]],
+    exports: List,
+    profiles_dir: Optional[str] = None,
+    save: bool = False
+) -> Dict[str, Any]:
+    """Load one project, apply operations, export it and close it.
+
+    Args:
+        project: Project file
+        operations: Operations script
+        exports: (format, output directory) pairs
+        profiles_dir: Output directory for a default-profiles export
+        save: Save the project after the operations
+
+    Returns:
+        Result with 'project', 'ok', 'error' and 'load', 'ops', 'export',
+        'total' seconds
+    """
+    from .comic_manager import ComicProjectManager
+    from .export_manager import ExportManager
+
+    result = {'project': project, 'ok': False, 'error': None,
+              'load': 0.0, 'ops': 0.0, 'export': 0.0, 'total': 0.0}
+    name = os.path.splitext(os.path.basename(project))[0]
+    manager = ComicProjectManager()
+    start = time.perf_counter()
+    try:
+        if not manager.load_project(project):
+            result['error'] = "Could not load project"
+            return result
+        loaded = time.perf_counter()
+        result['load'] = loaded - start
+
+        with manager.batch():
+            for operation in operations:
+                apply_operation(manager, operation)
+        if save and not manager.save_project():
+            result['error'] = "Could not save project"
+            return result
+        applied = time.perf_counter()
+        result['ops'] = applied - loaded
+
+        ok = True
+        exporter = ExportManager()
+        for format, output_dir in exports:
+            if not exporter.export_project(manager, output_dir.replace('{name}', name), format):
+                ok = False
+                result['error'] = f"{format} export incomplete"
+        if profiles_dir and not exporter.export_profiles(
+                manager, profiles_dir.replace('{name}', name)):
+            ok = False
+            result['error'] = "Profile export incomplete"
+        result['export'] = time.perf_counter() - applied
+        result['ok'] = ok
+    except Exception as e:
+        logger.exception(f"Processing {project} failed")
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        manager.close_project(save=False)
+        result['total'] = time.perf_counter() - start
+    return result
+
+
+def apply_operation(manager, operation: Dict[str, Any]) -> None:
+    """Apply one scripted operation.
+
+    Raises:
+        ValueError: For unknown operations or operations that fail
+    """
+    op = operation.get('op')
+    page = operation.get('page', 1) - 1
+
+    if op == 'add_page':
+        for _ in range(operation.get('count', 1)):
+            if manager.add_page(operation.get('template')) is None:
+                raise ValueError("add_page failed")
+        return
+    if op == 'save':
+        ok = manager.save_project()
+    elif op == 'delete_page':
+        ok = manager.delete_page(page)
+    elif op == 'duplicate_page':
+        ok = manager.duplicate_page(page) is not None
+    elif op == 'move_page':
+        ok = manager.move_page(page, operation['to'] - 1)
+    elif op == 'apply_template':
+        ok = manager.apply_template_to_page(page, operation['template']) is not None
+    elif op == 'detect_panels':
+        ok = manager.detect_page_panels(page, operation.get('options')) is not None
+    elif op == 'manifest':
+        with open(operation['path'], 'r', encoding='utf-8') as f:
+            ok = manager.create_from_manifest(json.load(f)) is not None
+    else:
+        raise ValueError(f"Unknown operation {op!r}")
+    if not ok:
+        raise ValueError(f"Operation failed: {json.dumps(operation)}")
+
+
+def _failed(project: str, error: str) -> Dict[str, Any]:
+    """Result of a project the worker never reported on."""
+    return {'project': project, 'ok': False, 'error': error,
+            'load': 0.0, 'ops': 0.0, 'export': 0.0, 'total': 0.0}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
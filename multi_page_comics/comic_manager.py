@@ -1,8 +1,32 @@
+import copy
 import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Callable, Tuple
 from krita import Krita
+from PyQt5.QtCore import QByteArray, QUuid
+from . import panel_detection
+from .archive_writer import ParallelZipWriter
+from .asset_store import AssetStore
+from .autosave import ProjectAutosave, read_sidecar
+from .command_log import MISSING, CommandLog, effect_op, insert_op, remove_op, set_op
+from .events import (
+    ChangeEvent, ChangeEventBus, PAGE_ADDED, PAGE_MOVED, PAGE_REMOVED,
+    PANEL_CHANGED, PROJECT_RESET, STATS_CHANGED
+)
+from .document_pool import PageDocumentPool
 from .page_manager import PageManager
+from .panel_system import PanelSystem
+from .utils.layer_utils import (
+    LayerChange, create_layer_hierarchy, estimate_node_memory, is_layer_hierarchy
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class ComicProjectManager:
@@ -11,6 +35,21 @@ class ComicProjectManager:
     def __init__(self):
         self.current_project: Optional[Dict[str, Any]] = None
         self.project_file: Optional[str] = None
+        self.document_pool: Optional[PageDocumentPool] = None
+        # Document of single-document projects; Krita has no active
+        # document without a window, e.g. under kritarunner
+        self.document = None
+        self._stats = {'page_count': 0, 'panel_count': 0}
+        self._layer_stats: Dict[int, Dict[str, int]] = {}
+        self._shared_index = None
+        self.events = ChangeEventBus()
+        self._asset_store: Optional[AssetStore] = None
+        self.history = CommandLog()
+        self.autosave = ProjectAutosave(
+            lambda: self.current_project,
+            self._autosave_target,
+            _json_default
+        )
 
     def create_project(self, project_data: Dict[str, Any]) -> None:
         """Create new comic project.
@@ -32,12 +71,42 @@ class ComicProjectManager:
                 'dpi': project_data.get('dpi', 300),
                 'default_gutter': project_data.get('gutter', 12),
                 'default_margin': project_data.get('margin', 16),
+                'mode': project_data.get('mode', 'single'),
+                'max_open_documents': project_data.get('max_open_documents', 4),
             },
             'pages': []
         }
+        self._recount_stats()
+
+        self._close_documents()
+        if self.is_multi_document():
+            project_dir = Path(project_data['project_dir'])
+            (project_dir / 'pages').mkdir(parents=True, exist_ok=True)
+            self.project_file = str(project_dir / 'project.comicproj')
+            self._open_document_pool()
+        else:
+            self.document = Krita.instance().activeDocument()
+            if not self.document:
+                page_manager = PageManager(self.current_project['settings'])
+                self.document = page_manager.create_page_document()
+                window = Krita.instance().activeWindow()
+                if window:
+                    window.addView(self.document)
 
         # Create first page
-        self.add_page()
+        with self.events.batch():
+            self.add_page()
+            self.history.clear()
+            self.events.emit(ChangeEvent(PROJECT_RESET))
+
+    def is_multi_document(self) -> bool:
+        """Check whether each page of the project lives in its own .kra.
+
+        Returns:
+            True for multi-document projects
+        """
+        return bool(self.current_project and
+                    self.current_project['settings'].get('mode') == 'multi')
 
     def add_page(self, template_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Add new page to project.
@@ -52,11 +121,202 @@ class ComicProjectManager:
             return None
 
         page_manager = PageManager(self.current_project['settings'])
-        page_data = page_manager.create_page(template_id)
+        page_index = len(self.current_project['pages'])
+        layer_change = LayerChange()
+        page_data = self._create_page(page_manager, template_id, layer_change=layer_change)
+
+        self.history.record("Add Page", self._layer_ops(layer_change) + [
+            insert_op(('pages',), page_index, page_data)
+        ])
+        self._notify_changed(ChangeEvent(PAGE_ADDED, page_index))
+        return page_data
+
+    def create_from_manifest(self, manifest: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Append the pages described by a manifest in one batch.
+
+        A manifest is a dictionary (e.g. loaded from JSON):
+
+            {
+                "metadata": {"title": "Issue 3", "issue": 3},
+                "defaults": {"template": "grid_2x2", "gutter": 12,
+                             "layers": [{"name": "Inks", "type": "paint"}]},
+                "pages": [
+                    {"template": "splash", "gutter": 0},
+                    {"repeat": 30},
+                    {"template": "grid_3x3", "layers": []}
+                ]
+            }
+
+        Each page entry overrides the defaults; 'repeat' creates the
+        entry several times and 'layers' is a create_layer_hierarchy
+        structure built inside the page layer. Every entry is checked
+        (repeat counts, layer structures, templates) before anything is
+        created, and the whole manifest is one undo step and one change
+        notification; should creating a page still fail, the pages made
+        so far are recorded and announced before the error propagates.
+
+        Args:
+            manifest: Manifest dictionary
+
+        Returns:
+            Page data dictionaries of the created pages, or None if there
+            is no project or the manifest is invalid
+        """
+        if not self.current_project:
+            return None
+
+        page_manager = PageManager(self.current_project['settings'])
+        defaults = manifest.get('defaults', {})
+        specs = []
+        problems = []
+        for number, entry in enumerate(manifest.get('pages', []), 1):
+            if not isinstance(entry, dict):
+                problems.append(f"page entry {number} is not an object")
+                continue
+            spec = {**defaults, **entry}
+            try:
+                repeat = int(spec.get('repeat', 1))
+            except (TypeError, ValueError):
+                problems.append(f"page entry {number} repeats {spec.get('repeat')!r} times")
+                continue
+            if spec.get('layers') is not None and not is_layer_hierarchy(spec['layers']):
+                problems.append(f"page entry {number} has an invalid layer structure")
+                continue
+            template_id = spec.get('template')
+            if template_id and not page_manager.template_manager.get_template(template_id):
+                problems.append(f"page entry {number} uses unknown template {template_id!r}")
+                continue
+            specs.extend([spec] * max(0, repeat))
+        if not isinstance(manifest.get('metadata', {}), dict):
+            problems.append("metadata is not an object")
+        if problems:
+            logger.error(f"Manifest rejected: {'; '.join(problems)}")
+            return None
+
+        layer_change = LayerChange()
+        ops = []
+        # All pages of a single-document project share one document
+        doc = None if self.is_multi_document() else self.document
+        created = []
+        events = []
+        try:
+            metadata = self.current_project['metadata']
+            for key, value in manifest.get('metadata', {}).items():
+                ops.append(set_op(('metadata',), key, metadata.get(key, MISSING), value))
+                metadata[key] = value
+
+            for spec in specs:
+                page_index = len(self.current_project['pages'])
+                page_data = self._create_page(
+                    page_manager, spec.get('template'), doc,
+                    gutter=spec.get('gutter'), layers=spec.get('layers'),
+                    layer_change=layer_change
+                )
+                ops.append(insert_op(('pages',), page_index, page_data))
+                events.append(ChangeEvent(PAGE_ADDED, page_index))
+                created.append(page_data)
+        finally:
+            # Whatever was created stays undoable, even if a page failed
+            if doc:
+                doc.refreshProjection()
+            if ops:
+                self.history.record("Create Pages from Manifest",
+                                    self._layer_ops(layer_change) + ops)
+                self._notify_changed(*events)
+        return created
+
+    def _create_page(
+        self,
+        page_manager: PageManager,
+        template_id: Optional[str],
+        doc=None,
+        gutter: Optional[float] = None,
+        layers: Optional[List[Dict[str, Any]]] = None,
+        layer_change: Optional[LayerChange] = None
+    ) -> Dict[str, Any]:
+        """Create a page at the end of the project, without notifying.
+
+        Args:
+            page_manager: Page manager to create the page with
+            template_id: Optional template ID to apply
+            doc: Document of single-document projects, defaults to the
+                project document
+            gutter: Gutter override for the template panels
+            layers: Layer structure to create inside the page layer
+            layer_change: Records the page layer of single-document
+                projects, so undo can detach it again
+
+        Returns:
+            Page data dictionary
+        """
+        page_index = len(self.current_project['pages'])
+        if self.is_multi_document():
+            page_file = self._new_page_file(page_index)
+            doc = page_manager.create_page_document()
+            doc.saveAs(str(self._page_path(page_file)))
+            page_data = page_manager.create_page(
+                template_id, doc=doc, page_number=page_index + 1, gutter=gutter
+            )
+            page_data['file'] = page_file
+            self.document_pool.add(str(self._page_path(page_file)), doc)
+        else:
+            doc = doc or self.document
+            page_data = page_manager.create_page(
+                template_id, doc=doc, page_number=page_index + 1, gutter=gutter
+            )
+
+        if layers:
+            page_layer = doc.nodeByUniqueID(page_data['layer_id'])
+            create_layer_hierarchy(doc, layers, parent=page_layer)
+            # Pages repeated from one manifest entry share its structure
+            page_data['layers'] = copy.deepcopy(layers)
+        if layer_change is not None and not self.is_multi_document():
+            layer_change.attached(doc.nodeByUniqueID(page_data['layer_id']))
 
         self.current_project['pages'].append(page_data)
+        self._page_added(page_data)
         return page_data
 
+    def get_page_document(self, page_index: int, show: bool = False):
+        """Get the Krita document holding a page.
+
+        In multi-document projects the page's .kra is opened on demand and
+        kept in the bounded document window; otherwise this is the
+        project's document.
+
+        Args:
+            page_index: Index of page
+            show: Open a view for the page document (multi-document only)
+
+        Returns:
+            Krita document or None if not available
+        """
+        page = self.get_page(page_index)
+        if not page:
+            return None
+        if not self.is_multi_document():
+            return self.document
+        return self.document_pool.get(str(self._page_path(page['file'])), show)
+
+    def peek_page_document(self, page_index: int):
+        """Get the Krita document of a page only if it is already open.
+
+        Unlike get_page_document this never opens a page file, so it is
+        cheap enough for previews and statistics.
+
+        Args:
+            page_index: Index of page
+
+        Returns:
+            Krita document or None if not open
+        """
+        page = self.get_page(page_index)
+        if not page:
+            return None
+        if not self.is_multi_document():
+            return self.document
+        return self.document_pool.peek(str(self._page_path(page['file'])))
+
     def get_page(self, page_index: int) -> Optional[Dict[str, Any]]:
         """Get page data by index.
         
@@ -74,6 +334,12 @@ class ComicProjectManager:
 
     def delete_page(self, page_index: int) -> bool:
         """Delete page from project.
+
+        The pages after it are renumbered. In single-document projects
+        the page layer is detached, so undo can put it back; in
+        multi-document projects the page's document is saved and closed,
+        and its file is kept while undo can still restore the page
+        (save_project removes it after that).
         
         Args:
             page_index: Index of page to delete
@@ -84,10 +350,516 @@ class ComicProjectManager:
         if not self.current_project:
             return False
         if 0 <= page_index < len(self.current_project['pages']):
-            del self.current_project['pages'][page_index]
+            layer_change = LayerChange()
+            doc = None
+            if self.is_multi_document():
+                # Undo reopens the file, so it must hold the latest edits
+                page = self.current_project['pages'][page_index]
+                self.document_pool.release(
+                    str(self._page_path(page['file'])), save=True
+                )
+            else:
+                doc = self.document
+                page_layer = doc.nodeByUniqueID(
+                    self.current_project['pages'][page_index].get('layer_id')
+                ) if doc else None
+                if page_layer:
+                    layer_change.detach(page_layer)
+
+            page = self.current_project['pages'].pop(page_index)
+            self._page_removed(page)
+            self.history.record("Delete Page", self._layer_ops(layer_change) + [
+                remove_op(('pages',), page_index, page)
+            ] + self._renumber_pages(page_index, doc))
+            self._notify_changed(ChangeEvent(PAGE_REMOVED, page_index))
+            return True
+        return False
+
+    def move_page(self, page_index: int, new_index: int) -> bool:
+        """Move a page to another position in the reading order.
+
+        The pages between the old and the new position are renumbered
+        in the same undo step.
+
+        Args:
+            page_index: Index of page to move
+            new_index: Index the page has after the move
+
+        Returns:
+            True if the page was moved, False otherwise
+        """
+        if not self.current_project:
+            return False
+        pages = self.current_project['pages']
+        if not (0 <= page_index < len(pages) and 0 <= new_index < len(pages)):
+            return False
+        if page_index == new_index:
             return True
+
+        page = pages.pop(page_index)
+        pages.insert(new_index, page)
+        doc = None if self.is_multi_document() else self.document
+        self.history.record("Move Page", [
+            remove_op(('pages',), page_index, page),
+            insert_op(('pages',), new_index, page),
+        ] + self._renumber_pages(min(page_index, new_index), doc))
+        self._notify_changed(ChangeEvent(PAGE_MOVED, page_index, new_index))
+        return True
+
+    def duplicate_page(self, page_index: int) -> Optional[Dict[str, Any]]:
+        """Duplicate page, sharing its layer content with the original.
+
+        The copy is inserted right after the source page and the pages
+        after it are renumbered. Its panels stay shared until they are
+        materialized with ensure_panel_writable.
+
+        Args:
+            page_index: Index of page to duplicate
+
+        Returns:
+            Page data dictionary of the copy or None if not possible
+        """
+        source_page = self.get_page(page_index)
+        if source_page and self.is_multi_document():
+            return self._duplicate_page_file(page_index)
+
+        doc = self.document
+        if not source_page or not doc:
+            return None
+
+        page_manager = PageManager(self.current_project['settings'])
+        page_data = page_manager.duplicate_page(doc, source_page, page_index + 2)
+        if page_data:
+            layer_change = LayerChange()
+            layer_change.attached(doc.nodeByUniqueID(page_data['layer_id']))
+            self.current_project['pages'].insert(page_index + 1, page_data)
+            self._page_added(page_data)
+            self.history.record("Duplicate Page", self._layer_ops(layer_change) + [
+                insert_op(('pages',), page_index + 1, page_data)
+            ] + self._renumber_pages(page_index + 2, doc))
+            self._notify_changed(ChangeEvent(PAGE_ADDED, page_index + 1))
+        return page_data
+
+    def apply_template_to_page(
+        self,
+        page_index: int,
+        template_id: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Replace the panels of an existing page with a template.
+
+        In single-document projects this is one undo step that also
+        restores the old panel layers; in multi-document projects it
+        cannot be undone and clears the history.
+
+        Args:
+            page_index: Index of page
+            template_id: Template ID to apply
+
+        Returns:
+            List of created panel data dictionaries or None if the page,
+            its document or the template cannot be found
+        """
+        page = self.get_page(page_index)
+        doc = self.get_page_document(page_index)
+        if not page or not doc:
+            return None
+
+        page_manager = PageManager(self.current_project['settings'])
+        template = page_manager.template_manager.get_template(template_id)
+        page_layer = doc.nodeByUniqueID(page.get('layer_id'))
+        if not template or not page_layer:
+            return None
+
+        layer_change = self._detach_panels(doc, page)
+        panels = page_manager.apply_template(doc, page_layer, template)
+        self._replace_panels(page_index, panels, template_id, "Apply Template",
+                             doc, layer_change)
+        return panels
+
+    def detect_page_panels(
+        self,
+        page_index: int,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Replace the panels of a page with panels detected on its artwork.
+
+        Meant for imported scans of finished pages: panel rectangles are
+        found on the page projection (see panel_detection.detect_panels)
+        and created as regular panels. Undo behaves as for
+        apply_template_to_page.
+
+        Args:
+            page_index: Index of page
+            options: Detection options, see panel_detection.DEFAULT_OPTIONS
+
+        Returns:
+            List of created panel data dictionaries or None if the page or
+            its document cannot be found, the document is not 8-bit RGBA,
+            or NumPy is not available
+        """
+        page = self.get_page(page_index)
+        doc = self.get_page_document(page_index)
+        if not page or not doc or not panel_detection.is_available():
+            return None
+        if doc.colorModel() != 'RGBA' or doc.colorDepth() != 'U8':
+            logger.error("Panel detection needs an 8-bit RGBA document")
+            return None
+
+        page_layer = doc.nodeByUniqueID(page.get('layer_id'))
+        if not page_layer:
+            return None
+
+        width, height = doc.width(), doc.height()
+        data = page_layer.projectionPixelData(0, 0, width, height)
+        pixels = panel_detection.pixel_data_to_array(data, width, height)
+        rects = panel_detection.detect_panels(pixels, options)
+        definitions = panel_detection.panels_to_definitions(rects, width, height)
+
+        layer_change = self._detach_panels(doc, page)
+        panel_system = PanelSystem()
+        panels = [
+            panel_system.create_panel(doc, page_layer, definition, i + 1)
+            for i, definition in enumerate(definitions)
+        ]
+        self._replace_panels(page_index, panels, None, "Detect Panels",
+                             doc, layer_change)
+        return panels
+
+    def update_panel(
+        self,
+        page_index: int,
+        panel_index: int,
+        changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Change properties of a panel in the project model.
+
+        The panel dictionary is replaced by an updated copy, so the
+        change can be undone. Quick successive edits of the same panel
+        form a single undo step.
+
+        Args:
+            page_index: Index of page
+            panel_index: Index of panel on the page
+            changes: Panel keys to set, e.g. 'border_width' or 'clip_content'
+
+        Returns:
+            Updated panel data dictionary or None if not found
+        """
+        page = self.get_page(page_index)
+        if not page or not 0 <= panel_index < len(page.get('panels', [])):
+            return None
+
+        panel = page['panels'][panel_index]
+        updated = dict(panel)
+        updated.update(changes)
+        page['panels'][panel_index] = updated
+        self.history.record(
+            "Edit Panel",
+            [set_op(('pages', page_index, 'panels'), panel_index, panel, updated)],
+            coalesce_key=('panel', page_index, panel_index)
+        )
+        self._notify_changed(ChangeEvent(PANEL_CHANGED, page_index))
+        return updated
+
+    def import_image_to_panel(
+        self,
+        page_index: int,
+        panel_index: Optional[int],
+        image_path: str
+    ) -> Optional[Dict[str, Any]]:
+        """Import an image file into a panel as one undo step.
+
+        Args:
+            page_index: Index of page
+            panel_index: Index of panel on the page, None for the whole page
+            image_path: Image file
+
+        Returns:
+            Updated panel (or page) data or None if not imported
+        """
+        return self.import_images([(page_index, panel_index, image_path)])[0]
+
+    def import_images(
+        self,
+        jobs: List[Tuple[int, Optional[int], str]],
+        blending_mode: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[int, int], Optional[bool]]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Import image files into panels or whole pages as one undo step.
+
+        Once the project is saved the files go through its asset store,
+        so an image used in many panels is stored and decoded once.
+        Storing, hashing and downscaling run on worker threads ahead of
+        the layer insertion, which stays on the calling (GUI) thread;
+        each page's document is refreshed once per run of its jobs.
+
+        Args:
+            jobs: (page index, panel index or None for the whole page,
+                image path) tuples, best grouped by page
+            blending_mode: Optional blending mode for the new layers
+            max_workers: Preparation threads, defaults to the CPU count
+            progress: Called with (done, total) after every image;
+                returning False cancels the remaining images
+
+        Returns:
+            Per job, the updated panel (or page) data, or None if the
+            image was not imported
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        if not self.current_project or not jobs:
+            return results
+
+        store = self.get_asset_store()
+        panel_system = PanelSystem()
+        layer_change = LayerChange()
+        ops = []
+        events = []
+        doc = None
+        doc_page = None
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 2) as executor:
+            futures = []
+            for page_index, panel_index, path in jobs:
+                target = self._import_target(page_index, panel_index)
+                if store and target:
+                    bounds = target['bounds']
+                    futures.append(executor.submit(
+                        store.prepare, path, max(bounds['width'], bounds['height'])))
+                else:
+                    futures.append(None)
+
+            for i, ((page_index, panel_index, path), future) in enumerate(zip(jobs, futures)):
+                try:
+                    if future is not None:
+                        future.result()
+                except OSError as e:
+                    logger.error(f"Could not import {path}: {e}")
+                else:
+                    if page_index != doc_page:
+                        if doc is not None:
+                            doc.refreshProjection()
+                        doc = self.get_page_document(page_index)
+                        doc_page = page_index
+                    target = self._import_target(page_index, panel_index)
+                    if doc and target:
+                        results[i] = self._import_into(
+                            panel_system, doc, page_index, panel_index, target, path,
+                            store, layer_change, blending_mode, ops
+                        )
+                        if results[i] is not None:
+                            events.append(ChangeEvent(PANEL_CHANGED, page_index))
+
+                if progress and progress(i + 1, len(jobs)) is False:
+                    for pending in futures[i + 1:]:
+                        if pending is not None:
+                            pending.cancel()
+                    break
+        if doc is not None:
+            doc.refreshProjection()
+
+        if events:
+            if self.is_multi_document():
+                # The new layers live in page documents that may be closed
+                # before an undo, see _replace_panels
+                self.history.clear()
+            else:
+                self.history.record(
+                    "Import Image" if len(events) == 1 else "Import Images",
+                    self._layer_ops(layer_change) + ops
+                )
+            self._notify_changed(*events)
+        return results
+
+    def record_layer_change(
+        self,
+        label: str,
+        layer_change: LayerChange,
+        page_indices
+    ) -> None:
+        """Record layers added to pages outside the manager as one undo step.
+
+        Args:
+            label: Undo step label, e.g. "Import Folder"
+            layer_change: The layers that were attached or detached
+            page_indices: Indices of the pages whose layers changed
+        """
+        if not self.current_project or not len(layer_change):
+            return
+        if self.is_multi_document():
+            # See _replace_panels
+            self.history.clear()
+        else:
+            self.history.record(label, self._layer_ops(layer_change))
+        pages = self.current_project['pages']
+        events = []
+        for page_index in sorted(page_indices):
+            if 0 <= page_index < len(pages):
+                self._layer_stats.pop(id(pages[page_index]), None)
+                events.append(ChangeEvent(PANEL_CHANGED, page_index))
+        self._notify_changed(*events)
+
+    def _import_target(self, page_index: int, panel_index: Optional[int]) -> Optional[Dict[str, Any]]:
+        """The panel, or a panel-like view of the page, an image goes into."""
+        page = self.get_page(page_index)
+        if not page:
+            return None
+        if panel_index is None:
+            settings = self.current_project['settings']
+            return {
+                'layer_id': page.get('layer_id'),
+                'bounds': {'x': 0, 'y': 0,
+                           'width': settings['page_width'],
+                           'height': settings['page_height']},
+                'assets': page.get('assets', []),
+            }
+        panels = page.get('panels', [])
+        return panels[panel_index] if 0 <= panel_index < len(panels) else None
+
+    def _import_into(
+        self,
+        panel_system: PanelSystem,
+        doc,
+        page_index: int,
+        panel_index: Optional[int],
+        target: Dict[str, Any],
+        path: str,
+        store: Optional[AssetStore],
+        layer_change: LayerChange,
+        blending_mode: Optional[str],
+        ops: List
+    ) -> Optional[Dict[str, Any]]:
+        """Create the layer of one imported image and store its asset."""
+        updated = panel_system.import_image_to_panel(
+            doc, target, path, store, layer_change, blending_mode
+        )
+        if updated is None:
+            return None
+
+        page = self.current_project['pages'][page_index]
+        self._layer_stats.pop(id(page), None)
+        if panel_index is None:
+            assets = updated.get('assets', [])
+            if assets != page.get('assets', []):
+                ops.append(set_op(('pages', page_index), 'assets',
+                                  page.get('assets', MISSING), assets))
+                page['assets'] = assets
+            return page
+
+        if updated != target:
+            ops.append(set_op(('pages', page_index, 'panels'), panel_index, target, updated))
+            page['panels'][panel_index] = updated
+        return updated
+
+    def undo(self) -> bool:
+        """Revert the last project-model change.
+
+        Layers the step added (pages, panels) are detached again and
+        layers it replaced are re-attached, so layer ids in the model
+        always point at nodes in the document; pixel edits are left to
+        Krita's own history. Pages removed from a multi-document project
+        keep their .kra file, so restoring them reopens it.
+
+        Returns:
+            True if a change was reverted
+        """
+        if not self.current_project:
+            return False
+        ops = self.history.undo(self.current_project)
+        if ops is None:
+            return False
+        self._history_applied(ops)
+        return True
+
+    def redo(self) -> bool:
+        """Re-apply the last reverted project-model change.
+
+        Returns:
+            True if a change was re-applied
+        """
+        if not self.current_project:
+            return False
+        ops = self.history.redo(self.current_project)
+        if ops is None:
+            return False
+        self._history_applied(ops)
+        return True
+
+    def ensure_panel_writable(self, doc, node) -> bool:
+        """Give the panel containing node pixels of its own before painting.
+
+        Call this right before a stroke starts on node. A shared
+        (duplicated) panel is materialized; a panel other panels share
+        from has those copies materialized first, since their clone
+        layers would otherwise follow the edit. Materializing is one undo
+        step.
+
+        Args:
+            doc: Krita document
+            node: Node about to be painted on
+
+        Returns:
+            True if a panel was materialized
+        """
+        if not self.current_project or not node:
+            return False
+
+        shared, dependents = self._shared_panels()
+        if not shared:
+            return False
+
+        while node:
+            layer_id = node.uniqueId()
+            panels = dependents.get(layer_id, [])
+            if layer_id in shared:
+                panels = panels + [shared[layer_id]]
+            if panels:
+                return self._materialize_panels(doc, panels)
+            node = node.parentNode()
         return False
 
+    def _shared_panels(self):
+        """Shared panels by layer id, and by the layer id they share from.
+
+        Cached until the next model change.
+        """
+        if self._shared_index is None:
+            shared = {}
+            dependents: Dict[Any, List[Dict[str, Any]]] = {}
+            for page in self.current_project['pages']:
+                for panel in page.get('panels', []):
+                    if panel and panel.get('shared_from'):
+                        shared[panel['layer_id']] = panel
+                        dependents.setdefault(panel['shared_from'], []).append(panel)
+            self._shared_index = (shared, dependents)
+        return self._shared_index
+
+    def _materialize_panels(self, doc, panels: List[Dict[str, Any]]) -> bool:
+        """Materialize shared panels as one undo step."""
+        layer_change = LayerChange()
+        replaced = {}
+        panel_system = PanelSystem()
+        for panel in panels:
+            materialized = panel_system.materialize_panel(doc, panel, layer_change)
+            if materialized:
+                replaced[id(panel)] = (panel, materialized)
+        if not replaced:
+            return False
+
+        # Materializing gives the panels their own pixels
+        ops = self._layer_ops(layer_change)
+        events = []
+        for i, page in enumerate(self.current_project['pages']):
+            for j, panel in enumerate(page.get('panels', [])):
+                if id(panel) in replaced:
+                    materialized = replaced[id(panel)][1]
+                    page['panels'][j] = materialized
+                    ops.append(set_op(('pages', i, 'panels'), j, panel, materialized))
+                    self._layer_stats.pop(id(page), None)
+                    events.append(ChangeEvent(PANEL_CHANGED, i))
+        self.history.record("Materialize Panel", ops)
+        self._notify_changed(*events)
+        return True
+
     def save_project(self, filename: Optional[str] = None) -> bool:
         """Save project metadata to JSON.
         
@@ -103,13 +875,22 @@ class ComicProjectManager:
         if not self.project_file or not self.current_project:
             return False
 
+        if self.is_multi_document():
+            self.document_pool.save_all()
+            with open(self.project_file, 'w') as f:
+                json.dump(self.current_project, f, indent=2,
+                          default=_json_default)
+            self._remove_unused_page_files()
+            return True
+
         # Save metadata in .kra file's annotation
-        doc = Krita.instance().activeDocument()
+        doc = self.document
         if doc:
-            project_json = json.dumps(self.current_project, indent=2)
+            project_json = json.dumps(self.current_project, indent=2,
+                                      default=_json_default)
             doc.setAnnotation("MultiPageComicsProject",
-                              project_json,
-                              "application/json")
+                              "Multi-Page Comics project data",
+                              QByteArray(project_json.encode('utf-8')))
             doc.save()
             return True
         return False
@@ -118,26 +899,139 @@ class ComicProjectManager:
         """Load project from .kra file.
         
         Args:
-            filename: Path to .kra file
+            filename: Path to .kra file, or .comicproj file for
+                multi-document projects
             
         Returns:
             True if load successful, False otherwise
         """
+        self._close_documents()
+        if filename.endswith('.comicproj'):
+            try:
+                with open(filename, 'r') as f:
+                    self.current_project = _restore_layer_ids(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                return False
+            self.document = None
+            self.project_file = filename
+            self._recover_from_sidecar(filename)
+            self._recount_stats()
+            self.history.clear()
+            self._open_document_pool()
+            self.events.emit(ChangeEvent(PROJECT_RESET))
+            return True
+
         doc = Krita.instance().openDocument(filename)
         if doc:
-            Krita.instance().activeWindow().addView(doc)
+            # Headless (kritarunner) there is no window to show it in
+            window = Krita.instance().activeWindow()
+            if window:
+                window.addView(doc)
             annotation = doc.annotation("MultiPageComicsProject")
             if annotation:
                 try:
-                    self.current_project = json.loads(annotation)
+                    self.current_project = _restore_layer_ids(
+                        json.loads(bytes(annotation).decode('utf-8'))
+                    )
+                    self.document = doc
                     self.project_file = filename
+                    self._recover_from_sidecar(filename)
+                    self._recount_stats()
+                    self.history.clear()
+                    self.events.emit(ChangeEvent(PROJECT_RESET))
                     return True
                 except json.JSONDecodeError:
-                    return False
+                    pass
+            if not window:
+                # Nobody else would ever close it
+                doc.close()
         return False
 
-    def get_project_stats(self) -> Optional[Dict[str, Any]]:
+    def close_project(self, save: bool = False) -> None:
+        """Close the project and its page documents.
+
+        Args:
+            save: Save pending document changes before closing; the
+                project file itself is only written by save_project
+        """
+        if not self.current_project:
+            return
+        if self.is_multi_document():
+            self.document_pool.close_all(save=save)
+            self.document_pool = None
+        elif self.document:
+            if save:
+                self.document.save()
+            self.document.close()
+        self.document = None
+        self.current_project = None
+        self.project_file = None
+        self._recount_stats()
+        self.history.clear()
+        self.events.emit(ChangeEvent(PROJECT_RESET))
+
+    def archive_project(self, archive_path: str, max_workers: Optional[int] = None) -> bool:
+        """Pack the saved project into a single ZIP archive.
+
+        Multi-document projects are archived with their whole folder
+        (project file, page documents and assets), leaving out the files
+        of deleted pages that undo could still restore; single-document
+        projects with the .kra file and its asset store. Members are
+        compressed in parallel.
+
+        Args:
+            archive_path: Path of the ZIP file to write
+            max_workers: Compression threads, defaults to the CPU count
+
+        Returns:
+            True if the archive was written
+        """
+        if not self.current_project or not self.project_file:
+            return False
+        self.save_project()
+
+        project_path = Path(self.project_file)
+        if self.is_multi_document():
+            root = project_path.parent
+            unused = set(self._unused_page_files(include_history=False))
+            files = [p for p in sorted(root.rglob('*')) if p.is_file() and p not in unused]
+        else:
+            root = project_path.parent
+            files = [project_path]
+            store = self.get_asset_store()
+            if store and store.root.exists():
+                files.extend(p for p in sorted(store.root.rglob('*')) if p.is_file())
+
+        archive = Path(archive_path).resolve()
+        writer = ParallelZipWriter(archive_path, max_workers=max_workers)
+        for file in files:
+            if file.resolve() == archive or file.name.endswith('.part'):
+                continue
+            writer.add_file(file.relative_to(root).as_posix(), str(file))
+        try:
+            writer.write()
+        except OSError as e:
+            logger.error(f"Project archive error: {e}")
+            return False
+        return True
+
+    def get_project_stats(
+        self,
+        include_layers: bool = False,
+        refresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """Get project statistics.
+
+        Page and panel counts are maintained incrementally and cost
+        nothing to read. Layer counts and pixel-memory estimates walk the
+        page layer trees, so they are cached per page and only recomputed
+        for pages changed through the project manager (or all pages with
+        refresh). In multi-document projects only pages whose document is
+        open are measured.
+
+        Args:
+            include_layers: Add per-page layer counts and memory estimates
+            refresh: Re-measure every page instead of using cached values
         
         Returns:
             Dictionary with project statistics or None if no project
@@ -145,13 +1039,371 @@ class ComicProjectManager:
         if not self.current_project:
             return None
 
-        total_panels = sum(
-            len(page.get('panels', []))
-            for page in self.current_project['pages']
+        stats = {
+            'page_count': self._stats['page_count'],
+            'panel_count': self._stats['panel_count'],
+            'title': self.current_project['metadata']['title']
+        }
+        if not include_layers:
+            return stats
+
+        if refresh:
+            self._layer_stats.clear()
+
+        pages = []
+        for i, page in enumerate(self.current_project['pages']):
+            layer_stats = self._layer_stats.get(id(page))
+            if layer_stats is None:
+                layer_stats = self._measure_page(i, page)
+                if layer_stats is not None:
+                    self._layer_stats[id(page)] = layer_stats
+            pages.append({
+                'page': i,
+                'layers': layer_stats['layers'] if layer_stats else None,
+                'memory_bytes': layer_stats['memory_bytes'] if layer_stats else None,
+            })
+
+        stats['pages'] = pages
+        stats['layer_count'] = sum(p['layers'] or 0 for p in pages)
+        stats['memory_bytes'] = sum(p['memory_bytes'] or 0 for p in pages)
+        return stats
+
+    def _measure_page(self, page_index: int, page: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """Count layers and estimate pixel memory of one page."""
+        doc = self.peek_page_document(page_index)
+        if not doc:
+            return None
+        page_layer = doc.nodeByUniqueID(page.get('layer_id'))
+        if not page_layer:
+            return None
+        return estimate_node_memory(page_layer)
+
+    def _recount_stats(self) -> None:
+        """Recompute counters from scratch after loading or creating a project."""
+        pages = self.current_project['pages'] if self.current_project else []
+        self._stats = {
+            'page_count': len(pages),
+            'panel_count': sum(len(page.get('panels', [])) for page in pages),
+        }
+        self._layer_stats.clear()
+        self._shared_index = None
+
+    def _page_added(self, page: Dict[str, Any]) -> None:
+        """Update counters for a page added to the project."""
+        self._stats['page_count'] += 1
+        self._stats['panel_count'] += len(page.get('panels', []))
+
+    def _page_removed(self, page: Dict[str, Any]) -> None:
+        """Update counters for a page removed from the project."""
+        self._stats['page_count'] -= 1
+        self._stats['panel_count'] -= len(page.get('panels', []))
+        self._layer_stats.pop(id(page), None)
+
+    def _replace_panels(
+        self,
+        page_index: int,
+        panels: List[Dict[str, Any]],
+        template_id: Optional[str],
+        label: str,
+        doc,
+        layer_change: LayerChange
+    ) -> None:
+        """Store a page's new panel list and record the change."""
+        page = self.current_project['pages'][page_index]
+        path = ('pages', page_index)
+        for panel in panels:
+            layer_change.attached(doc.nodeByUniqueID(panel['layer_id']))
+        ops = self._layer_ops(layer_change) + [
+            set_op(path, 'panels', page.get('panels', []), panels),
+            set_op(path, 'template_id', page.get('template_id'), template_id),
+        ]
+        self._stats['panel_count'] += len(panels) - len(page.get('panels', []))
+        page['panels'] = panels
+        page['template_id'] = template_id
+        self._layer_stats.pop(id(page), None)
+        if self.is_multi_document():
+            # Page documents close when they leave the open window, taking
+            # the detached layers with them, so the step cannot be undone
+            self.history.clear()
+        else:
+            self.history.record(label, ops)
+        self._notify_changed(ChangeEvent(PANEL_CHANGED, page_index))
+
+    def _detach_panels(self, doc, page: Dict[str, Any]) -> LayerChange:
+        """Take the panel layers of a page out of its document."""
+        layer_change = LayerChange()
+        for panel in page.get('panels', []):
+            node = doc.nodeByUniqueID(panel.get('layer_id'))
+            if node:
+                layer_change.detach(node)
+        return layer_change
+
+    def _layer_ops(self, layer_change: LayerChange) -> List:
+        """History operations replaying the layers of a step, if any."""
+        if not len(layer_change):
+            return []
+        return [effect_op(layer_change.apply, layer_change.revert, layer_change.size())]
+
+    def _renumber_pages(self, start: int, doc=None) -> List:
+        """Number the pages from start on by their position.
+
+        Page layers still carrying their default "Page <n>" name are
+        renamed along (single-document projects; in multi-document
+        projects every page file holds a single page layer).
+
+        Returns:
+            History operations of the change
+        """
+        ops = []
+        renamed = []
+        pages = self.current_project['pages']
+        for i in range(start, len(pages)):
+            page = pages[i]
+            old, new = page.get('page_number'), i + 1
+            if old == new:
+                continue
+            ops.append(set_op(('pages', i), 'page_number', old, new))
+            page['page_number'] = new
+            node = doc.nodeByUniqueID(page.get('layer_id')) if doc else None
+            if node and node.name() == f"Page {old}":
+                node.setName(f"Page {new}")
+                renamed.append((node, f"Page {old}", f"Page {new}"))
+
+        if renamed:
+            def rename_forward():
+                for node, _, name in renamed:
+                    node.setName(name)
+
+            def rename_backward():
+                for node, name, _ in renamed:
+                    node.setName(name)
+
+            ops.append(effect_op(rename_forward, rename_backward, 128 * len(renamed)))
+        return ops
+
+    def _history_applied(self, ops) -> None:
+        """Update counters and documents after undo or redo applied ops."""
+        events = []
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            if op[1] == ('pages',):
+                page = op[3]
+                following = ops[i + 1] if i + 1 < len(ops) else None
+                if (op[0] == 'remove' and following and following[0] == 'insert'
+                        and following[1] == ('pages',) and following[3] is page):
+                    # A page move is recorded as removal plus insertion
+                    events.append(ChangeEvent(PAGE_MOVED, op[2], following[2]))
+                    i += 2
+                    continue
+                if op[0] == 'insert':
+                    self._page_added(page)
+                    events.append(ChangeEvent(PAGE_ADDED, op[2]))
+                else:
+                    self._page_removed(page)
+                    events.append(ChangeEvent(PAGE_REMOVED, op[2]))
+                    if self.is_multi_document():
+                        # Keep edits on disk in case the page is restored
+                        self.document_pool.release(
+                            str(self._page_path(page['file'])), save=True
+                        )
+            elif op[1][:1] == ('pages',):
+                if op[2] == 'panels':
+                    self._stats['panel_count'] += len(op[4] or []) - len(op[3] or [])
+                # Ops are applied in order, so a later one may have removed the page
+                if op[1][1] < len(self.current_project['pages']):
+                    page = self.current_project['pages'][op[1][1]]
+                    self._layer_stats.pop(id(page), None)
+                    events.append(ChangeEvent(PANEL_CHANGED, op[1][1]))
+            i += 1
+        self._notify_changed(*events)
+
+    def get_asset_store(self) -> Optional[AssetStore]:
+        """Get the content-addressed store for images imported into panels.
+
+        The store lives in an 'assets' folder next to the project file
+        ('<name>_assets' for single-document projects).
+
+        Returns:
+            AssetStore or None if the project has not been saved yet
+        """
+        target = self._autosave_target()
+        if not self.current_project or not target:
+            return None
+        if self.is_multi_document():
+            root = Path(target).parent / 'assets'
+        else:
+            root = Path(target).with_name(Path(target).stem + '_assets')
+        if self._asset_store is None or self._asset_store.root != root:
+            self._asset_store = AssetStore(str(root))
+        return self._asset_store
+
+    def add_change_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback run after every project-model change.
+
+        Changes made inside batch() run the callback once.
+
+        Args:
+            callback: Callable without arguments
+        """
+        self.events.subscribe(lambda events: callback())
+
+    def add_event_listener(self, callback: Callable[[List[ChangeEvent]], None]) -> None:
+        """Register a callback receiving the change events of the model.
+
+        Args:
+            callback: Called with a list of ChangeEvent, one event per
+                change or all events of a batch()
+        """
+        self.events.subscribe(callback)
+
+    @contextmanager
+    def batch(self):
+        """Group changes so listeners are informed once, at the end.
+
+        Example:
+            with project_manager.batch():
+                for _ in range(40):
+                    project_manager.add_page()
+        """
+        with self.events.batch():
+            yield
+
+    def _notify_changed(self, *events: ChangeEvent) -> None:
+        """Schedule an autosave and inform listeners of a model change."""
+        self._shared_index = None
+        self.autosave.schedule()
+        with self.events.batch():
+            for event in events:
+                self.events.emit(event)
+            self.events.emit(ChangeEvent(STATS_CHANGED))
+
+    def _autosave_target(self) -> Optional[str]:
+        """Get the file the autosave sidecar is written next to."""
+        if self.project_file:
+            return self.project_file
+        if not self.is_multi_document() and self.document:
+            if self.document.fileName():
+                return self.document.fileName()
+        return None
+
+    def _recover_from_sidecar(self, filename: str) -> bool:
+        """Replace the loaded project with a newer autosave, if one exists."""
+        envelope = read_sidecar(filename)
+        if not envelope:
+            return False
+        try:
+            saved = os.path.getmtime(filename)
+        except OSError:
+            saved = 0
+        if envelope.get('saved_at', 0) <= saved:
+            return False
+        logger.info(f"Recovered project model from autosave of {filename}")
+        self.current_project = _restore_layer_ids(envelope['project'])
+        return True
+
+    def _open_document_pool(self) -> None:
+        """Create the open-document window for a multi-document project."""
+        self.document_pool = PageDocumentPool(
+            self.current_project['settings'].get('max_open_documents', 4)
         )
 
-        return {
-            'page_count': len(self.current_project['pages']),
-            'panel_count': total_panels,
-            'title': self.current_project['metadata']['title']
-        }
\ No newline at end of file
+    def _close_documents(self) -> None:
+        """Save and close page documents of the previous project."""
+        if self.document_pool:
+            self.document_pool.close_all(save=True)
+            self.document_pool = None
+
+    def _page_path(self, page_file: str) -> Path:
+        """Resolve a page file name relative to the project file."""
+        return Path(self.project_file).parent / page_file
+
+    def _new_page_file(self, page_index: int) -> str:
+        """Pick an unused page file name."""
+        used = {page.get('file') for page in self.current_project['pages']}
+        number = page_index + 1
+        while True:
+            page_file = f"pages/page_{number:03d}.kra"
+            if page_file not in used and not self._page_path(page_file).exists():
+                return page_file
+            number += 1
+
+    def _unused_page_files(self, include_history: bool = True) -> List[Path]:
+        """Page files in the pages folder that no page refers to.
+
+        Args:
+            include_history: Count files of pages that undo or redo can
+                restore as used
+
+        Returns:
+            Paths of the unused .kra files
+        """
+        used = {page.get('file') for page in self.current_project['pages']}
+        if include_history:
+            used.update(value.get('file') for value in self.history.recorded_values()
+                        if isinstance(value, dict))
+        root = Path(self.project_file).parent
+        pages_dir = root / 'pages'
+        if not pages_dir.is_dir():
+            return []
+        return [path for path in sorted(pages_dir.glob('*.kra'))
+                if path.relative_to(root).as_posix() not in used]
+
+    def _remove_unused_page_files(self) -> None:
+        """Delete the files of deleted pages once history no longer needs them."""
+        open_paths = set(self.document_pool.open_paths())
+        for path in self._unused_page_files():
+            if str(path) in open_paths:
+                continue
+            # Krita keeps a backup next to the file it saves
+            for file in (path, path.with_name(path.name + '~')):
+                try:
+                    if file.exists():
+                        file.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not remove unused page file {file}: {e}")
+
+    def _duplicate_page_file(self, page_index: int) -> Optional[Dict[str, Any]]:
+        """Duplicate a page of a multi-document project by copying its file."""
+        source_page = self.current_project['pages'][page_index]
+        source_path = self._page_path(source_page['file'])
+
+        # Flush unsaved changes so the copy matches what the user sees
+        source_doc = self.document_pool.get(str(source_path))
+        if not source_doc:
+            return None
+        source_doc.save()
+
+        page_data = copy.deepcopy(source_page)
+        page_data['file'] = self._new_page_file(page_index + 1)
+        try:
+            shutil.copyfile(source_path, self._page_path(page_data['file']))
+        except OSError as e:
+            logger.error(f"Could not copy page file {source_path}: {e}")
+            return None
+
+        page_data['page_number'] = page_index + 2
+        self.current_project['pages'].insert(page_index + 1, page_data)
+        self._page_added(page_data)
+        self.history.record("Duplicate Page", [
+            insert_op(('pages',), page_index + 1, page_data)
+        ] + self._renumber_pages(page_index + 2))
+        self._notify_changed(ChangeEvent(PAGE_ADDED, page_index + 1))
+        return page_data
+
+
+def _json_default(obj):
+    """Serialize Qt values stored in the project model (layer ids)."""
+    if isinstance(obj, QUuid):
+        return obj.toString()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _restore_layer_ids(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn serialized layer ids back into QUuid for nodeByUniqueID."""
+    for page in project.get('pages', []):
+        for record in [page] + page.get('panels', []):
+            for key in ('layer_id', 'shared_from', 'duplicated_from'):
+                if isinstance(record.get(key), str):
+                    record[key] = QUuid(record[key])
+    return project
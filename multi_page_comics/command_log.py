@@ -0,0 +1,288 @@
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Hashable, Callable
+
+
+# Operations are tuples addressing a container by a path of keys and
+# indices from the project root:
+#   ('insert', path, index, value)  list insert
+#   ('remove', path, index, value)  list removal, value is what was removed
+#   ('set', path, key, old, new)    dict key change, MISSING for absent keys
+#   ('effect', (), forward, backward, size)
+#                                   change outside the model (e.g. layers
+#                                   attached or detached), replayed by
+#                                   calling forward or backward
+Op = Tuple
+
+MISSING = object()
+
+
+def insert_op(path: Tuple, index: int, value: Any) -> Op:
+    """Describe inserting value at index of the list at path."""
+    return ('insert', tuple(path), index, value)
+
+
+def remove_op(path: Tuple, index: int, value: Any) -> Op:
+    """Describe removing value from index of the list at path."""
+    return ('remove', tuple(path), index, value)
+
+
+def set_op(path: Tuple, key: Hashable, old: Any, new: Any) -> Op:
+    """Describe changing key of the dict at path from old to new."""
+    return ('set', tuple(path), key, old, new)
+
+
+def effect_op(forward: Callable[[], None], backward: Callable[[], None], size: int = 0) -> Op:
+    """Describe a change outside the model that undo and redo must replay.
+
+    Args:
+        forward: Re-applies the change
+        backward: Reverts the change
+        size: Estimated bytes the change keeps alive while recorded
+    """
+    return ('effect', (), forward, backward, size)
+
+
+def resolve(root: Any, path: Tuple) -> Any:
+    """Follow a path of keys and indices from root."""
+    node = root
+    for key in path:
+        node = node[key]
+    return node
+
+
+def apply_op(root: Any, op: Op) -> None:
+    """Apply one operation to the structure under root."""
+    if op[0] == 'effect':
+        op[2]()
+        return
+    container = resolve(root, op[1])
+    if op[0] == 'insert':
+        container.insert(op[2], op[3])
+    elif op[0] == 'remove':
+        del container[op[2]]
+    elif op[4] is MISSING:
+        container.pop(op[2], None)
+    else:
+        container[op[2]] = op[4]
+
+
+def invert_op(op: Op) -> Op:
+    """Get the operation that undoes op."""
+    if op[0] == 'insert':
+        return ('remove',) + op[1:]
+    if op[0] == 'remove':
+        return ('insert',) + op[1:]
+    if op[0] == 'effect':
+        return ('effect', op[1], op[3], op[2], op[4])
+    return ('set', op[1], op[2], op[4], op[3])
+
+
+def estimate_size(value: Any) -> int:
+    """Rough in-memory size of a JSON-like value in bytes."""
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(8 + estimate_size(v) for v in value)
+    if isinstance(value, str):
+        return 49 + len(value)
+    return 32
+
+
+class CommandEntry:
+    """One undoable step: a label and the operations it applied."""
+
+    __slots__ = ('label', 'ops', 'coalesce_key', 'time', 'size')
+
+    def __init__(self, label: str, ops: List[Op], coalesce_key, now: float):
+        self.label = label
+        self.ops = ops
+        self.coalesce_key = coalesce_key
+        self.time = now
+        self.size = _ops_size(ops)
+
+
+class CommandLog:
+    """Undo/redo history of project-model edits stored as structural diffs.
+
+    Every step records only the operations it applied (list inserts and
+    removals, dict key changes), so undoing or redoing a step costs time
+    proportional to the change, not to the project. Values are kept by
+    reference, so a recorded value must never change afterwards: every
+    model edit either replaces the affected dicts or is itself recorded.
+    Changes outside the model that belong to a step, such as the layers
+    it attached or detached, are recorded as effect operations.
+
+    History is bounded by a memory budget; the oldest steps are dropped
+    once the estimated size of all steps exceeds it (the newest step is
+    always kept). Steps recorded with the same coalesce key in quick
+    succession, e.g. repeated edits of one panel, merge into one.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = 8 * 1024 * 1024,
+        coalesce_seconds: float = 1.0,
+        clock=time.monotonic
+    ):
+        """Create an empty history.
+
+        Args:
+            memory_budget: Maximum estimated bytes of recorded steps
+            coalesce_seconds: Steps with equal coalesce keys closer than
+                this merge into one
+            clock: Time source, monotonic seconds
+        """
+        self.memory_budget = memory_budget
+        self.coalesce_seconds = coalesce_seconds
+        self.clock = clock
+        self._undo: deque = deque()
+        self._redo: List[CommandEntry] = []
+        self._memory = 0
+
+    def record(self, label: str, ops: List[Op], coalesce_key: Hashable = None) -> None:
+        """Record a step whose operations were already applied.
+
+        Args:
+            label: Description shown for undo/redo, e.g. "Add Page"
+            ops: Applied operations in order
+            coalesce_key: Merge with the previous step if it has the same
+                key and was recorded within the coalesce window
+        """
+        if not ops:
+            return
+        now = self.clock()
+        self._clear_redo()
+
+        last = self._undo[-1] if self._undo else None
+        if (coalesce_key is not None and last is not None and
+                last.coalesce_key == coalesce_key and
+                now - last.time <= self.coalesce_seconds):
+            self._memory -= last.size
+            last.ops = _coalesce(last.ops + list(ops))
+            last.time = now
+            last.size = _ops_size(last.ops)
+            self._memory += last.size
+            if not last.ops:
+                # The edits cancelled out
+                self._undo.pop()
+        else:
+            entry = CommandEntry(label, list(ops), coalesce_key, now)
+            self._undo.append(entry)
+            self._memory += entry.size
+        self._trim()
+
+    def undo(self, root: Any) -> Optional[List[Op]]:
+        """Revert the newest step.
+
+        Args:
+            root: Structure the operations address (the project dict)
+
+        Returns:
+            The inverse operations in the order they were applied, or
+            None if there is nothing to undo
+        """
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        inverse = [invert_op(op) for op in reversed(entry.ops)]
+        for op in inverse:
+            apply_op(root, op)
+        self._redo.append(entry)
+        # Merging into a step that was undone and redone would be surprising
+        entry.time = float('-inf')
+        return inverse
+
+    def redo(self, root: Any) -> Optional[List[Op]]:
+        """Re-apply the most recently undone step.
+
+        Args:
+            root: Structure the operations address (the project dict)
+
+        Returns:
+            The applied operations, or None if there is nothing to redo
+        """
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        for op in entry.ops:
+            apply_op(root, op)
+        self._undo.append(entry)
+        return entry.ops
+
+    def can_undo(self) -> bool:
+        """Check whether there is a step to undo."""
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        """Check whether there is a step to redo."""
+        return bool(self._redo)
+
+    def undo_label(self) -> Optional[str]:
+        """Label of the step undo would revert."""
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self) -> Optional[str]:
+        """Label of the step redo would re-apply."""
+        return self._redo[-1].label if self._redo else None
+
+    def memory_used(self) -> int:
+        """Estimated bytes held by recorded steps."""
+        return self._memory
+
+    def recorded_values(self):
+        """Iterate over the model values held by recorded steps.
+
+        Includes undone steps, since redo can bring their values back.
+        """
+        for entry in list(self._undo) + self._redo:
+            for op in entry.ops:
+                if op[0] in ('insert', 'remove'):
+                    yield op[3]
+                elif op[0] == 'set':
+                    yield op[3]
+                    yield op[4]
+
+    def clear(self) -> None:
+        """Forget all history, e.g. when another project is opened."""
+        self._undo.clear()
+        self._redo.clear()
+        self._memory = 0
+
+    def _clear_redo(self) -> None:
+        """Forget undone steps once a new step is recorded."""
+        for entry in self._redo:
+            self._memory -= entry.size
+        self._redo.clear()
+
+    def _trim(self) -> None:
+        """Drop the oldest steps until the budget is met."""
+        while self._memory > self.memory_budget and len(self._undo) > 1:
+            self._memory -= self._undo.popleft().size
+
+
+def _ops_size(ops: List[Op]) -> int:
+    """Estimated bytes held by a list of operations."""
+    return sum(
+        64 + op[4] if op[0] == 'effect' else
+        64 + estimate_size(op[1]) +
+        sum(estimate_size(v) for v in op[2:] if v is not MISSING)
+        for op in ops
+    )
+
+
+def _coalesce(ops: List[Op]) -> List[Op]:
+    """Merge repeated key changes of a step, keeping first old and last new.
+
+    Only steps made of key changes are merged; structural changes keep
+    their order.
+    """
+    if any(op[0] != 'set' for op in ops):
+        return ops
+    merged: Dict[Tuple, Op] = {}
+    for op in ops:
+        target = (op[1], op[2])
+        previous = merged.get(target)
+        merged[target] = op if previous is None else \
+            ('set', op[1], op[2], previous[3], op[4])
+    return [op for op in merged.values() if op[3] is not op[4] and op[3] != op[4]]
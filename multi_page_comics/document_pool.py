@@ -0,0 +1,125 @@
+import logging
+from collections import OrderedDict
+from typing import Optional, List
+from krita import Krita
+
+
+logger = logging.getLogger(__name__)
+
+
+class PageDocumentPool:
+    """Keeps a bounded, least-recently-used window of open page documents.
+
+    Used by multi-document projects, where every page lives in its own
+    .kra file. Documents are opened on demand and the least recently used
+    ones are saved and closed once more than max_open are open.
+    """
+
+    def __init__(self, max_open: int = 4):
+        self.max_open = max(1, max_open)
+        self._documents: "OrderedDict[str, object]" = OrderedDict()
+
+    def get(self, path: str, show: bool = False):
+        """Get the document for a page file, opening it if needed.
+
+        Args:
+            path: Absolute path of the page .kra file
+            show: Also open a view for the document in the active window
+
+        Returns:
+            Krita document or None if the file could not be opened
+        """
+        doc = self._documents.get(path)
+        if doc is None:
+            doc = Krita.instance().openDocument(path)
+            if not doc:
+                logger.error(f"Could not open page document {path}")
+                return None
+            self._documents[path] = doc
+        self._documents.move_to_end(path)
+
+        if show:
+            window = Krita.instance().activeWindow()
+            if window and not any(view.document() == doc for view in window.views()):
+                window.addView(doc)
+
+        self._evict()
+        return doc
+
+    def peek(self, path: str):
+        """Get the document for a page file only if it is already open.
+
+        Args:
+            path: Absolute path of the page .kra file
+
+        Returns:
+            Krita document or None
+        """
+        return self._documents.get(path)
+
+    def add(self, path: str, doc) -> None:
+        """Register an already open document (e.g. a freshly created page).
+
+        Args:
+            path: Absolute path the document is saved at
+            doc: Krita document
+        """
+        self._documents[path] = doc
+        self._documents.move_to_end(path)
+        self._evict()
+
+    def release(self, path: str, save: bool = True) -> None:
+        """Close the document for a page file if it is open.
+
+        Args:
+            path: Absolute path of the page .kra file
+            save: Save pending changes before closing
+        """
+        doc = self._documents.pop(path, None)
+        if doc is not None:
+            self._close(doc, save)
+
+    def save_all(self) -> int:
+        """Save every open document with unsaved changes.
+
+        Returns:
+            Number of documents saved
+        """
+        saved = 0
+        for doc in self._documents.values():
+            if doc.modified():
+                doc.save()
+                saved += 1
+        return saved
+
+    def close_all(self, save: bool = True) -> None:
+        """Close every open document.
+
+        Args:
+            save: Save pending changes before closing
+        """
+        while self._documents:
+            _, doc = self._documents.popitem(last=False)
+            self._close(doc, save)
+
+    def open_paths(self) -> List[str]:
+        """Get the paths of open documents, least recently used first."""
+        return list(self._documents.keys())
+
+    def _evict(self) -> None:
+        """Close least recently used documents beyond the window size."""
+        active = Krita.instance().activeDocument()
+        for path in list(self._documents.keys()):
+            if len(self._documents) <= self.max_open:
+                break
+            doc = self._documents[path]
+            if doc == active:
+                continue
+            del self._documents[path]
+            self._close(doc, True)
+
+    def _close(self, doc, save: bool) -> None:
+        """Save (optionally) and close a document."""
+        if save and doc.modified():
+            doc.save()
+        doc.close()
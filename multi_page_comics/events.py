@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from typing import Optional, List, Callable
+
+
+PAGE_ADDED = 'page_added'
+PAGE_REMOVED = 'page_removed'
+PAGE_MOVED = 'page_moved'
+PANEL_CHANGED = 'panel_changed'
+STATS_CHANGED = 'stats_changed'
+# The whole project was replaced (created or loaded)
+PROJECT_RESET = 'project_reset'
+
+STRUCTURAL_EVENTS = {PAGE_ADDED, PAGE_REMOVED, PAGE_MOVED}
+
+
+class ChangeEvent:
+    """One change of the project model.
+
+    Page indices are those at the time of the change, so a listener
+    replays a list of events in order.
+
+    Attributes:
+        type: One of the event type constants
+        page: Page index (added, removed, moved from, changed panels)
+        to_page: Target index of a moved page
+    """
+
+    __slots__ = ('type', 'page', 'to_page')
+
+    def __init__(self, type: str, page: Optional[int] = None, to_page: Optional[int] = None):
+        self.type = type
+        self.page = page
+        self.to_page = to_page
+
+    def __eq__(self, other):
+        return (isinstance(other, ChangeEvent) and
+                (self.type, self.page, self.to_page) ==
+                (other.type, other.page, other.to_page))
+
+    def __repr__(self):
+        if self.to_page is not None:
+            return f"ChangeEvent({self.type}, {self.page} -> {self.to_page})"
+        return f"ChangeEvent({self.type}, {self.page})"
+
+
+class ChangeEventBus:
+    """Delivers project change events to listeners, coalescing batches.
+
+    Outside a batch every event is delivered on its own. Inside batch()
+    events are queued and delivered once when the outermost batch ends,
+    so a bulk operation reaches listeners as a single list.
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[List[ChangeEvent]], None]] = []
+        self._queue: List[ChangeEvent] = []
+        self._depth = 0
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None]) -> None:
+        """Register a listener.
+
+        Args:
+            callback: Called with the list of events of each delivery
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[ChangeEvent]], None]) -> None:
+        """Remove a registered listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def emit(self, event: ChangeEvent) -> None:
+        """Queue or deliver one event."""
+        self._queue.append(event)
+        if not self._depth:
+            self._flush()
+
+    @contextmanager
+    def batch(self):
+        """Deliver events emitted inside the block together at its end."""
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Deliver the queued events."""
+        events = coalesce_events(self._queue)
+        self._queue = []
+        if not events:
+            return
+        for callback in list(self._listeners):
+            callback(events)
+
+
+def coalesce_events(events: List[ChangeEvent]) -> List[ChangeEvent]:
+    """Drop events made redundant by others in the same delivery.
+
+    A project reset supersedes everything before it, repeated panel
+    changes of a page between structural changes collapse into one, and
+    statistics changes are reported once, at the end.
+
+    Args:
+        events: Events in emission order
+
+    Returns:
+        Coalesced events, still in order
+    """
+    for i in range(len(events) - 1, -1, -1):
+        if events[i].type == PROJECT_RESET:
+            events = events[i:]
+            break
+
+    result = []
+    changed_pages = set()
+    stats = False
+    for event in events:
+        if event.type == STATS_CHANGED:
+            stats = True
+            continue
+        if event.type in STRUCTURAL_EVENTS:
+            changed_pages.clear()
+        elif event.type == PANEL_CHANGED:
+            if event.page in changed_pages:
+                continue
+            changed_pages.add(event.page)
+        result.append(event)
+    if stats:
+        result.append(ChangeEvent(STATS_CHANGED))
+    return result
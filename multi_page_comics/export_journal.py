@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+logger = logging.getLogger(__name__)
+
+
+# Options that change how an export runs but not what it produces
+_VOLATILE_OPTIONS = ('resume', 'encode_threads')
+
+
+def file_checksum(path: str) -> str:
+    """Compute the SHA-256 of a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExportJournal:
+    """Append-only record of finished export outputs.
+
+    Every completed page or container is appended as one JSON line and
+    synced to disk, so after a crash the export can resume from the first
+    output that is missing or does not match its recorded checksum. A
+    torn last line from a crash mid-append is ignored on load.
+    """
+
+    FILENAME = '.export_journal.jsonl'
+
+    def __init__(self, output_dir: str, options: Dict[str, Any]):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / self.FILENAME
+        stable = {k: v for k, v in options.items() if k not in _VOLATILE_OPTIONS}
+        self.options_key = hashlib.sha256(
+            json.dumps(stable, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Read the journal left by a previous run with the same options.
+
+        Returns:
+            Number of outputs recorded
+        """
+        self.entries = {}
+        if not self.path.exists():
+            return 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('options') == self.options_key:
+                    self.entries[entry['file']] = entry
+        return len(self.entries)
+
+    def reset(self) -> None:
+        """Start a fresh journal, forgetting previous runs."""
+        self.entries = {}
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+
+    def record(self, output_path: str, kind: str = 'page',
+               page: Optional[int] = None) -> None:
+        """Append a finished output to the journal.
+
+        Safe to call from encoder worker threads.
+
+        Args:
+            output_path: Path of the written file
+            kind: 'page' or 'container'
+            page: Page index for page outputs
+        """
+        if not os.path.exists(output_path):
+            return
+        entry = {
+            'file': os.path.relpath(output_path, self.output_dir),
+            'kind': kind,
+            'page': page,
+            'size': os.path.getsize(output_path),
+            'sha256': file_checksum(output_path),
+            'options': self.options_key,
+            'time': time.time(),
+        }
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[entry['file']] = entry
+
+    def is_complete(self, output_path: str) -> bool:
+        """Check a recorded output still exists unchanged.
+
+        Args:
+            output_path: Path of the output file
+
+        Returns:
+            True if the file is journaled with matching size and checksum
+        """
+        entry = self.entries.get(os.path.relpath(output_path, self.output_dir))
+        if not entry or not os.path.exists(output_path):
+            return False
+        if os.path.getsize(output_path) != entry['size']:
+            return False
+        try:
+            return file_checksum(output_path) == entry['sha256']
+        except OSError as e:
+            logger.warning(f"Could not verify {output_path}: {e}")
+            return False
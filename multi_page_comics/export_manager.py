@@ -1,10 +1,15 @@
 import os
 import logging
-import zipfile
+import time
 from pathlib import Path
 from typing import Optional, Dict, Any, List
+from xml.sax.saxutils import escape
 from krita import Krita
-from PyQt5.QtCore import QSize
+from PyQt5.QtCore import Qt, QSize, QSizeF, QRectF, QMarginsF
+from PyQt5.QtGui import QImage, QPainter, QPdfWriter, QPageSize
+from .archive_writer import ParallelZipWriter
+from .export_journal import ExportJournal
+from .image_encoder import ImageEncoder, encode_image
 
 
 logger = logging.getLogger(__name__)
@@ -19,8 +24,17 @@ class ExportManager:
             'jpg': 'JPEG Image',
             'pdf': 'PDF Document',
             'cbz': 'Comic Book Archive (CBZ)',
-            'psd': 'Photoshop Document'
+            'psd': 'Photoshop Document',
+            'webtoon': 'Webtoon Strip Slices'
         }
+        self.page_timings: List[Dict[str, Any]] = []
+        self._source_doc = None
+        self._work_doc = None
+        self._visible_page = None
+        self._pages: Optional[List[Dict[str, Any]]] = None
+        self.encoder: Optional[ImageEncoder] = None
+        self._journal: Optional[ExportJournal] = None
+        self._current_page: Optional[int] = None
 
     def export_page(
         self,
@@ -31,6 +45,10 @@ class ExportManager:
         options: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Export single page.
+
+        Only the requested page group is rendered. Within an export run
+        (begin_export/end_export) the working copy of the document is
+        reused; a standalone call makes and discards its own.
         
         Args:
             doc: Krita document
@@ -45,14 +63,40 @@ class ExportManager:
         if options is None:
             options = self.get_default_options(format)
 
-        if format == 'png':
-            return self._export_png(doc, output_path, options)
-        elif format == 'jpg':
-            return self._export_jpg(doc, output_path, options)
-        elif format == 'pdf':
-            return self._export_pdf(doc, output_path, options)
+        exporters = {
+            'png': self._export_png,
+            'jpg': self._export_jpg,
+            'pdf': self._export_pdf,
+        }
+        exporter = exporters.get(format)
+        if not exporter:
+            return False
 
-        return False
+        standalone = self._work_doc is None
+        self._current_page = page_index
+        try:
+            start = time.perf_counter()
+            image = self.render_page(doc, page_index)
+            rendered = time.perf_counter()
+            if image is None:
+                return False
+            success = exporter(image, output_path, options)
+            encoded = time.perf_counter()
+        finally:
+            if standalone:
+                self.end_export()
+
+        self.page_timings.append({
+            'page': page_index,
+            'path': output_path,
+            'render': rendered - start,
+            'encode': encoded - rendered,
+        })
+        logger.info(
+            f"Page {page_index + 1}: render {rendered - start:.3f}s, "
+            f"encode {encoded - rendered:.3f}s"
+        )
+        return success
 
     def export_project(
         self,
@@ -62,6 +106,12 @@ class ExportManager:
         options: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Export all pages in project.
+
+        Finished pages are journaled in the output directory. With the
+        'resume' option, pages whose journaled output still matches its
+        checksum are skipped, so a crashed export continues from the first
+        missing page. CBZ and PDF are assembled from page images at the end
+        and are journaled too.
         
         Args:
             project_manager: ComicProjectManager instance
@@ -78,97 +128,538 @@ class ExportManager:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
-        doc = Krita.instance().activeDocument()
-        if not doc:
-            return False
+        if options is None:
+            options = self.get_default_options(format)
+
+        # Container pages are written as images first, then assembled
+        container_formats = {'cbz': 'jpg', 'pdf': 'png'}
+        page_format = format
+        if format in container_formats:
+            page_format = options.get('image_format', container_formats[format])
+
+        self._journal = ExportJournal(str(output_path), {**options, 'format': format})
+        if options.get('resume'):
+            resumed = self._journal.load()
+            logger.info(f"Resuming export, {resumed} outputs journaled")
+        else:
+            self._journal.reset()
 
         exported_files = []
         pages = project_manager.current_project['pages']
+        self.page_timings = []
+        self._pages = pages
+        self._start_encoder(options)
+
+        try:
+            for i, page in enumerate(pages):
+                filename = f"page_{i+1:03d}.{page_format}"
+                file_path = output_path / filename
 
-        for i, page in enumerate(pages):
-            filename = f"page_{i+1:03d}.{format}"
-            file_path = output_path / filename
+                if options.get('resume') and self._journal.is_complete(str(file_path)):
+                    exported_files.append(str(file_path))
+                    continue
 
-            if self.export_page(doc, i, str(file_path), format, options):
-                exported_files.append(str(file_path))
+                # Multi-document projects open each page's .kra on demand
+                doc = project_manager.get_page_document(i)
+                if not doc:
+                    return False
+
+                if self.export_page(doc, i, str(file_path), page_format, options):
+                    exported_files.append(str(file_path))
+        finally:
+            self.end_export()
+            self._pages = None
+            failed = self._finish_encoder()
+
+        exported_files = [f for f in exported_files if f not in failed]
+
+        render_total = sum(t['render'] for t in self.page_timings)
+        encode_total = sum(t['encode'] for t in self.page_timings)
+        logger.info(
+            f"Exported {len(exported_files)}/{len(pages)} pages: "
+            f"render {render_total:.2f}s, encode {encode_total:.2f}s"
+        )
+
+        success = len(exported_files) == len(pages)
+        if format in container_formats:
+            success = success and self._create_container(
+                format, exported_files, output_path, options,
+                project_manager.current_project.get('metadata')
+            )
+        self._journal = None
+        return success
+
+    def _create_container(
+        self,
+        format: str,
+        image_files: List[str],
+        output_path: Path,
+        options: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Assemble a CBZ or PDF from page images, unless already journaled."""
+        container = output_path / f"comic.{format}"
+        # Nothing was re-rendered, so a journaled container is still current
+        if (options.get('resume') and self._journal and not self.page_timings and
+                self._journal.is_complete(str(container))):
+            return True
 
-        # Create CBZ if requested
         if format == 'cbz':
-            return self._create_cbz(exported_files, output_path)
+            success = self._create_cbz(image_files, output_path, metadata, options)
+        else:
+            success = self._create_pdf(image_files, output_path, options)
+        if success and self._journal:
+            self._journal.record(str(container), 'container')
+        return success
+
+    def export_profiles(
+        self,
+        project_manager,
+        output_dir: str,
+        profiles: Optional[List[Dict[str, Any]]] = None
+    ) -> bool:
+        """Export all pages into several output profiles in one pass.
+
+        Every page is rendered once at the document resolution and each
+        profile is downsampled straight from that render, so e.g. a print
+        PNG set, a web JPEG set and a CBZ come out of a single render.
+        Pages are never upscaled: a profile asking for more DPI than the
+        document has gets the native resolution and a warning. Each
+        profile is written to its own subdirectory named after it.
+
+        Args:
+            project_manager: ComicProjectManager instance
+            output_dir: Output directory
+            profiles: Profile dictionaries with 'name' and 'format' keys
+                plus any options of get_default_options for that format;
+                defaults to get_default_profiles()
+
+        Returns:
+            True if all pages rendered and exported successfully for
+            every profile
+        """
+        if not project_manager.current_project:
+            return False
+
+        if profiles is None:
+            profiles = self.get_default_profiles()
+        profiles = [self._resolve_profile(profile) for profile in profiles]
+        profiles.sort(key=lambda profile: profile['dpi'], reverse=True)
+
+        output_path = Path(output_dir)
+        for profile in profiles:
+            (output_path / profile['name']).mkdir(parents=True, exist_ok=True)
+
+        exporters = {'png': self._export_png, 'jpg': self._export_jpg}
+        exported_files: Dict[str, List[str]] = {p['name']: [] for p in profiles}
+        pages = project_manager.current_project['pages']
+        self.page_timings = []
+        self._pages = pages
+        self._start_encoder(profiles[0])
+        unrendered = []
+        upscaled = set()
+
+        try:
+            for i, page in enumerate(pages):
+                doc = project_manager.get_page_document(i)
+                if not doc:
+                    return False
+
+                start = time.perf_counter()
+                image = self.render_page(doc, i)
+                if image is None:
+                    logger.error(f"Page {i + 1} could not be rendered, skipped in all profiles")
+                    unrendered.append(i)
+                    continue
+                source_dpi = doc.resolution() or profiles[0]['dpi']
+                rendered = time.perf_counter()
+
+                timing = {'page': i, 'render': rendered - start, 'profiles': {}}
+                for profile in profiles:
+                    step = time.perf_counter()
+                    target_dpi = profile['dpi']
+                    if target_dpi > source_dpi:
+                        # Upscaling only adds size and blur, never detail
+                        if profile['name'] not in upscaled:
+                            logger.warning(
+                                f"Profile {profile['name']} wants {target_dpi} DPI but "
+                                f"pages are {source_dpi} DPI; exporting at {source_dpi} DPI"
+                            )
+                            upscaled.add(profile['name'])
+                        target_dpi = source_dpi
+                    scaled = self._resample_to_dpi(image, source_dpi, target_dpi)
+                    resampled = time.perf_counter()
+
+                    file_path = output_path / profile['name'] / \
+                        f"page_{i+1:03d}.{profile['page_format']}"
+                    exporter = exporters[profile['page_format']]
+                    if exporter(scaled, str(file_path), profile):
+                        exported_files[profile['name']].append(str(file_path))
+
+                    timing['profiles'][profile['name']] = {
+                        'path': str(file_path),
+                        'resample': resampled - step,
+                        'encode': time.perf_counter() - resampled,
+                    }
+                self.page_timings.append(timing)
+        finally:
+            self.end_export()
+            self._pages = None
+            failed = self._finish_encoder()
+
+        for timing in self.page_timings:
+            timing['encode'] = sum(
+                t['resample'] + t['encode'] for t in timing['profiles'].values()
+            )
+            logger.info(
+                f"Page {timing['page'] + 1}: render {timing['render']:.3f}s, "
+                f"{len(profiles)} profiles {timing['encode']:.3f}s"
+            )
+
+        success = not unrendered
+        for profile in profiles:
+            files = [f for f in exported_files[profile['name']] if f not in failed]
+            if profile['format'] == 'cbz':
+                success = self._create_cbz(
+                    files, output_path / profile['name'],
+                    project_manager.current_project.get('metadata'), profile
+                ) and success
+            success = success and len(files) == len(pages)
+        return success
+
+    def export_webtoon(
+        self,
+        project_manager,
+        output_dir: str,
+        options: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Export pages as one continuous vertical strip cut into slices.
+
+        Pages are stacked top to bottom, scaled to the strip width, and
+        the strip is cut into platform-sized slices (strip_001.jpg, ...).
+        Pages are read from the projection in row bands and each finished
+        slice is encoded immediately, so memory stays bounded to one band
+        plus one slice instead of the full strip.
+
+        Args:
+            project_manager: ComicProjectManager instance
+            output_dir: Output directory
+            options: Webtoon options, see get_default_options('webtoon')
+
+        Returns:
+            True if every page was stitched and all slices were written
+        """
+        if not project_manager.current_project:
+            return False
+
+        if options is None:
+            options = self.get_default_options('webtoon')
+        options = {**self.get_default_options('webtoon'), **options}
+
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        exporter = self._export_png if options['image_format'] == 'png' else self._export_jpg
+        slicer = WebtoonSlicer(
+            options['width'],
+            options['slice_height'],
+            lambda image, number: exporter(
+                image,
+                str(output_path / f"strip_{number:03d}.{options['image_format']}"),
+                options
+            )
+        )
+
+        pages = project_manager.current_project['pages']
+        band_height = options['band_height']
+        self.page_timings = []
+        self._pages = pages
+        self._start_encoder(options)
+        success = True
+
+        try:
+            for i, page in enumerate(pages):
+                doc = project_manager.get_page_document(i)
+                if not doc:
+                    return False
+
+                start = time.perf_counter()
+                work = self.show_page(doc, i)
+                if work is None:
+                    success = False
+                    continue
+
+                width, height = work.width(), work.height()
+                scale = options['width'] / width
+                for y in range(0, height, band_height):
+                    band = work.projection(0, y, width, min(band_height, height - y))
+                    if scale != 1:
+                        # Round band edges, not band heights, so scaled
+                        # bands tile without gaps or overlaps
+                        top = round(y * scale)
+                        bottom = round((y + band.height()) * scale)
+                        band = band.scaled(
+                            options['width'], max(1, bottom - top),
+                            Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+                        )
+                    success = slicer.feed(band) and success
+
+                self.page_timings.append({
+                    'page': i,
+                    'render': time.perf_counter() - start,
+                })
+            success = slicer.finish() and success
+        finally:
+            self.end_export()
+            self._pages = None
+            success = not self._finish_encoder() and success
+
+        logger.info(f"Webtoon export: {slicer.slice_count} slices from {len(pages)} pages")
+        return success
+
+    def _resolve_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill a profile with the default options of its format."""
+        format = profile.get('format', 'png')
+        resolved = self.get_default_options(format)
+        resolved.update(profile)
+        resolved.setdefault('name', format)
+        resolved.setdefault('dpi', 300)
+        resolved['page_format'] = (
+            resolved.get('image_format', 'jpg') if format == 'cbz' else format
+        )
+        if resolved['page_format'] not in ('png', 'jpg'):
+            raise ValueError(f"Unsupported profile format: {format}")
+        return resolved
+
+    def _resample_to_dpi(
+        self,
+        image: QImage,
+        source_dpi: float,
+        target_dpi: float
+    ) -> QImage:
+        """Scale an image from one resolution to another.
+
+        Qt's smooth transformation averages source pixel areas when
+        shrinking, so downsampled pages do not alias the way nearest or
+        plain bilinear sampling would.
+
+        Args:
+            image: Source image
+            source_dpi: Resolution the image was rendered at
+            target_dpi: Wanted resolution
+
+        Returns:
+            Scaled image tagged with the target resolution
+        """
+        if source_dpi != target_dpi:
+            factor = target_dpi / source_dpi
+            image = image.scaled(
+                max(1, round(image.width() * factor)),
+                max(1, round(image.height() * factor)),
+                Qt.IgnoreAspectRatio,
+                Qt.SmoothTransformation
+            )
+        dots_per_meter = round(target_dpi / 0.0254)
+        image.setDotsPerMeterX(dots_per_meter)
+        image.setDotsPerMeterY(dots_per_meter)
+        return image
+
+    def begin_export(self, doc) -> None:
+        """Start an export run on a document.
+
+        Makes the one working copy that every page of the run is rendered
+        from, so the original's layer visibility is never touched.
+
+        Args:
+            doc: Krita document
+        """
+        if self._source_doc is doc and self._work_doc is not None:
+            return
+        self.end_export()
+        self._source_doc = doc
+        self._work_doc = doc.clone()
+        self._visible_page = None
+
+    def end_export(self) -> None:
+        """Finish an export run and release the working copy."""
+        if self._work_doc is not None:
+            self._work_doc.close()
+        self._source_doc = None
+        self._work_doc = None
+        self._visible_page = None
+
+    def render_page(self, doc, page_index: int) -> Optional[QImage]:
+        """Render a single page group of a document.
+
+        Other page groups of the working copy are hidden; visibility is
+        only changed on the groups that differ from the previous render.
+
+        Args:
+            doc: Krita document
+            page_index: Index of page to render
+
+        Returns:
+            Rendered page image or None if the page cannot be found
+        """
+        work = self.show_page(doc, page_index)
+        if work is None:
+            return None
+        return work.projection(0, 0, work.width(), work.height())
 
-        return len(exported_files) == len(pages)
+    def show_page(self, doc, page_index: int):
+        """Make a page the only visible one in the working copy.
+
+        Args:
+            doc: Krita document
+            page_index: Index of page to show
+
+        Returns:
+            Working document with an up to date projection of the page,
+            or None if the page cannot be found
+        """
+        self.begin_export(doc)
+        work = self._work_doc
+
+        page_nodes = self._page_nodes(work)
+        target = self._find_page_node(work, page_nodes, page_index)
+        if target is None:
+            logger.error(f"Page {page_index + 1} not found in document")
+            return None
+
+        if self._visible_page is None:
+            for node in page_nodes:
+                node.setVisible(node == target)
+        elif self._visible_page != target:
+            self._visible_page.setVisible(False)
+            target.setVisible(True)
+        self._visible_page = target
+
+        work.refreshProjection()
+        work.waitForDone()
+        return work
+
+    def _page_nodes(self, doc) -> List:
+        """Get the top-level page group layers of a document."""
+        return [
+            node for node in doc.topLevelNodes()
+            if node.type() == 'grouplayer' and node.name().startswith('Page')
+        ]
+
+    def _find_page_node(self, doc, page_nodes: List, page_index: int):
+        """Resolve the page group layer for a project page index."""
+        if self._pages and 0 <= page_index < len(self._pages):
+            layer_id = self._pages[page_index].get('layer_id')
+            if layer_id:
+                node = doc.nodeByUniqueID(layer_id)
+                if node:
+                    return node
+        if len(page_nodes) == 1:
+            return page_nodes[0]
+        if 0 <= page_index < len(page_nodes):
+            return page_nodes[page_index]
+        return None
+
+    def _start_encoder(self, options: Dict[str, Any]) -> None:
+        """Start the worker pool that encodes pages during an export run."""
+        self.encoder = ImageEncoder(options.get('encode_threads'))
+
+    def _finish_encoder(self) -> List[str]:
+        """Wait for queued pages, record their encode times and stop the pool.
+
+        Returns:
+            Output paths that failed to encode
+        """
+        if self.encoder is None:
+            return []
+        encoder, self.encoder = self.encoder, None
+        encoder.shutdown()
+
+        for timing in self.page_timings:
+            entries = [timing] + list(timing.get('profiles', {}).values())
+            for entry in entries:
+                if entry.get('path') in encoder.timings:
+                    entry['encode'] = encoder.timings[entry['path']]
+        return encoder.failed
+
+    def _encode(
+        self,
+        image: QImage,
+        output_path: str,
+        format: str,
+        options: Dict[str, Any]
+    ) -> bool:
+        """Encode an image, in the worker pool during an export run.
+
+        Outputs are journaled once they are completely written.
+        """
+        on_done = None
+        if self._journal is not None:
+            journal, page = self._journal, self._current_page
+            on_done = lambda path: journal.record(path, 'page', page)
+
+        if self.encoder is not None:
+            self.encoder.submit(image, output_path, format, options, on_done)
+            return True
+        try:
+            success = encode_image(image, output_path, format, options)
+        except Exception as e:
+            logger.error(f"{format.upper()} export error: {e}")
+            return False
+        if success and on_done:
+            on_done(output_path)
+        return success
 
     def _export_png(
         self,
-        doc,
+        image: QImage,
         output_path: str,
         options: Dict[str, Any]
     ) -> bool:
         """Export as PNG.
+
+        Honors the dpi, transparency and speed ('fast', 'balanced' or
+        'smallest') options.
         
         Args:
-            doc: Krita document
+            image: Rendered page image
             output_path: Output file path
             options: Export options
             
         Returns:
-            True if successful
+            True if successful (or queued, during an export run)
         """
-        try:
-            # Flatten if requested
-            if options.get('flatten', False):
-                doc = doc.clone()
-                doc.flattenImage()
-
-            # Set resolution
-            resolution = options.get('dpi', 300)
-
-            # Export
-            doc.exportImage(output_path, InfoObject())
-            return True
-        except Exception as e:
-            logger.error(f"PNG export error: {e}")
-            return False
+        return self._encode(image, output_path, 'png', options)
 
     def _export_jpg(
         self,
-        doc,
+        image: QImage,
         output_path: str,
         options: Dict[str, Any]
     ) -> bool:
         """Export as JPEG.
+
+        Honors the dpi, quality and speed options.
         
         Args:
-            doc: Krita document
+            image: Rendered page image
             output_path: Output file path
             options: Export options
             
         Returns:
-            True if successful
+            True if successful (or queued, during an export run)
         """
-        try:
-            quality = options.get('quality', 95)
-
-            if options.get('flatten', True):
-                doc = doc.clone()
-                doc.flattenImage()
-
-            doc.exportImage(output_path, InfoObject())
-            return True
-        except Exception as e:
-            logger.error(f"JPEG export error: {e}")
-            return False
+        return self._encode(image, output_path, 'jpg', options)
 
     def _export_pdf(
         self,
-        doc,
+        image: QImage,
         output_path: str,
         options: Dict[str, Any]
     ) -> bool:
         """Export as PDF.
         
         Args:
-            doc: Krita document
+            image: Rendered page image
             output_path: Output file path
             options: Export options
             
@@ -176,37 +667,121 @@ class ExportManager:
             True if successful
         """
         try:
-            # PDF export using Krita's batch export
-            # This would integrate with a PDF library
+            self._write_pdf([image], output_path, options.get('dpi', 300))
             return True
         except Exception as e:
             logger.error(f"PDF export error: {e}")
             return False
 
+    def _create_pdf(
+        self,
+        image_files: List[str],
+        output_path: Path,
+        options: Dict[str, Any]
+    ) -> bool:
+        """Create multi-page PDF from page images.
+
+        Args:
+            image_files: List of image file paths
+            output_path: Output directory
+            options: Export options
+
+        Returns:
+            True if successful
+        """
+        try:
+            images = (QImage(path) for path in sorted(image_files))
+            self._write_pdf(images, str(output_path / "comic.pdf"),
+                            options.get('dpi', 300))
+            return True
+        except Exception as e:
+            logger.error(f"PDF creation error: {e}")
+            return False
+
+    def _write_pdf(self, images, output_path: str, dpi: int) -> None:
+        """Write images as PDF pages, one page per image at dpi.
+
+        Images are consumed one at a time, and the file only replaces
+        output_path once it is complete.
+        """
+        tmp_path = output_path + '.part'
+        writer = QPdfWriter(tmp_path)
+        writer.setResolution(dpi)
+        writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+
+        painter = None
+        for image in images:
+            if image.isNull():
+                raise IOError("could not read page image")
+            page_size = QPageSize(
+                QSizeF(image.width() * 25.4 / dpi, image.height() * 25.4 / dpi),
+                QPageSize.Millimeter
+            )
+            writer.setPageSize(page_size)
+            if painter is None:
+                painter = QPainter(writer)
+            else:
+                writer.newPage()
+            painter.drawImage(QRectF(0, 0, image.width(), image.height()), image)
+        if painter is not None:
+            painter.end()
+        os.replace(tmp_path, output_path)
+
     def _create_cbz(
         self,
         image_files: List[str],
-        output_path: Path
+        output_path: Path,
+        metadata: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None
     ) -> bool:
         """Create CBZ comic archive.
+
+        Pages are compressed in parallel (JPEG pages are stored as is) and
+        written in page order, with a ComicInfo.xml when project metadata
+        is given.
         
         Args:
             image_files: List of image file paths
             output_path: Output directory
+            metadata: Optional project metadata for ComicInfo.xml
+            options: Export options; 'encode_threads' sets the number of
+                compression threads
             
         Returns:
             True if successful
         """
+        options = options or {}
         try:
             cbz_path = output_path / "comic.cbz"
-            with zipfile.ZipFile(cbz_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for img_file in sorted(image_files):
-                    zipf.write(img_file, os.path.basename(img_file))
+            writer = ParallelZipWriter(str(cbz_path),
+                                       max_workers=options.get('encode_threads'))
+            for img_file in sorted(image_files):
+                writer.add_file(os.path.basename(img_file), img_file)
+            if metadata:
+                writer.add_bytes('ComicInfo.xml',
+                                 self._comic_info_xml(metadata, len(image_files)))
+            writer.write()
             return True
         except Exception as e:
             logger.error(f"CBZ creation error: {e}")
             return False
 
+    def _comic_info_xml(self, metadata: Dict[str, Any], page_count: int) -> bytes:
+        """Build ComicInfo.xml content from project metadata."""
+        fields = [
+            ('Title', metadata.get('title')),
+            ('Series', metadata.get('series')),
+            ('Number', metadata.get('issue')),
+            ('Writer', metadata.get('author')),
+            ('PageCount', page_count),
+        ]
+        lines = ['<?xml version="1.0" encoding="utf-8"?>', '<ComicInfo>']
+        for tag, value in fields:
+            if value not in (None, ''):
+                lines.append(f"  <{tag}>{escape(str(value))}</{tag}>")
+        lines.append('</ComicInfo>')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
     def get_default_options(self, format: str) -> Dict[str, Any]:
         """Get default export options for format.
         
@@ -220,12 +795,14 @@ class ExportManager:
             'png': {
                 'dpi': 300,
                 'flatten': False,
-                'transparency': True
+                'transparency': True,
+                'speed': 'balanced'
             },
             'jpg': {
                 'quality': 95,
                 'dpi': 300,
-                'flatten': True
+                'flatten': True,
+                'speed': 'balanced'
             },
             'pdf': {
                 'dpi': 300,
@@ -235,13 +812,95 @@ class ExportManager:
             'cbz': {
                 'image_format': 'jpg',
                 'quality': 90,
-                'dpi': 150
+                'dpi': 150,
+                'speed': 'balanced'
+            },
+            'webtoon': {
+                'width': 800,
+                'slice_height': 1280,
+                'band_height': 512,
+                'image_format': 'jpg',
+                'quality': 90,
+                'dpi': 72,
+                'speed': 'balanced'
             }
         }
-        return defaults.get(format, {})
+        return dict(defaults.get(format, {}))
 
+    def get_default_profiles(self) -> List[Dict[str, Any]]:
+        """Get the default profile set for export_profiles.
+
+        Returns:
+            List of profile dictionaries: print PNG at 300 DPI, web JPEG
+            at 150 DPI and a CBZ at 150 DPI
+        """
+        return [
+            {'name': 'print', 'format': 'png', 'dpi': 300, 'transparency': False},
+            {'name': 'web', 'format': 'jpg', 'dpi': 150, 'quality': 85},
+            {'name': 'cbz', 'format': 'cbz', 'dpi': 150},
+        ]
+
+
+class WebtoonSlicer:
+    """Cuts a stream of equally wide row bands into fixed-height slices."""
+
+    def __init__(self, width: int, slice_height: int, emit):
+        """Create a slicer.
+
+        Args:
+            width: Strip width in pixels
+            slice_height: Height of each slice in pixels
+            emit: Callable taking (slice image, 1-based slice number) and
+                returning True on success
+        """
+        self.width = width
+        self.slice_height = slice_height
+        self.emit = emit
+        self.slice_count = 0
+        self._slice: Optional[QImage] = None
+        self._filled = 0
+
+    def feed(self, band: QImage) -> bool:
+        """Append a band to the strip, emitting every slice it completes.
+
+        Args:
+            band: Band image, as wide as the strip
+
+        Returns:
+            False if emitting a completed slice failed
+        """
+        success = True
+        offset = 0
+        while offset < band.height():
+            if self._slice is None:
+                self._slice = QImage(self.width, self.slice_height, QImage.Format_RGB32)
+                self._slice.fill(Qt.white)
+                self._filled = 0
+
+            rows = min(self.slice_height - self._filled, band.height() - offset)
+            painter = QPainter(self._slice)
+            painter.drawImage(0, self._filled, band, 0, offset, self.width, rows)
+            painter.end()
+            self._filled += rows
+            offset += rows
+
+            if self._filled == self.slice_height:
+                success = self._emit(self._slice) and success
+        return success
+
+    def finish(self) -> bool:
+        """Emit the last, possibly shorter, slice.
+
+        Returns:
+            False if emitting the slice failed
+        """
+        if self._slice is None or self._filled == 0:
+            return True
+        return self._emit(self._slice.copy(0, 0, self.width, self._filled))
+
+    def _emit(self, image: QImage) -> bool:
+        self.slice_count += 1
+        self._slice = None
+        self._filled = 0
+        return self.emit(image, self.slice_count)
 
-class InfoObject:
-    """Helper class for Krita export."""
-    def __init__(self):
-        self.properties = {}
\ No newline at end of file
@@ -0,0 +1,338 @@
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QImageWriter, QPainter, QPen
+
+
+logger = logging.getLogger(__name__)
+
+
+# Speed/size trade-offs for the encoders. PNG row filters are applied to
+# whole images at once ('up' and 'sub' as bytewise subtraction), the
+# deflate step runs in zlib, which releases the GIL while compressing.
+ENCODE_PRESETS = {
+    'fast': {
+        'png_level': 1,
+        'png_strategy': zlib.Z_RLE,
+        'png_filter': 'none',
+        'jpeg_optimize': False,
+        'jpeg_progressive': False,
+    },
+    'balanced': {
+        'png_level': 6,
+        'png_strategy': zlib.Z_DEFAULT_STRATEGY,
+        'png_filter': 'up',
+        'jpeg_optimize': True,
+        'jpeg_progressive': False,
+    },
+    'smallest': {
+        'png_level': 9,
+        'png_strategy': zlib.Z_FILTERED,
+        'png_filter': 'up',
+        'jpeg_optimize': True,
+        'jpeg_progressive': True,
+    },
+}
+
+_PNG_FILTER_TYPES = {'none': 0, 'sub': 1, 'up': 2}
+
+
+def _bytewise_sub(a: bytes, b: bytes) -> bytes:
+    """Subtract two equally long byte strings byte by byte, modulo 256.
+
+    Uses SWAR arithmetic on Python integers so the whole buffer is
+    processed in C instead of a per-byte loop.
+    """
+    n = len(a)
+    high = int.from_bytes(b'\x80' * n, 'big')
+    x = int.from_bytes(a, 'big')
+    y = int.from_bytes(b, 'big')
+    result = ((x | high) - (y & ~high)) ^ ((x ^ y ^ high) & high)
+    return result.to_bytes(n, 'big')
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """Build a PNG chunk with length and CRC."""
+    return (struct.pack('>I', len(data)) + tag + data +
+            struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+def encode_png(
+    data: bytes,
+    width: int,
+    height: int,
+    stride: int,
+    channels: int,
+    dpi: Optional[float] = None,
+    level: int = 6,
+    strategy: int = zlib.Z_DEFAULT_STRATEGY,
+    row_filter: str = 'up'
+) -> bytes:
+    """Encode raw 8-bit RGB or RGBA pixels as PNG.
+
+    Args:
+        data: Pixel rows, RGB or RGBA byte order
+        width: Image width in pixels
+        height: Image height in pixels
+        stride: Bytes per row in data, including padding
+        channels: 3 for RGB, 4 for RGBA
+        dpi: Resolution written to the pHYs chunk, if given
+        level: zlib compression level (0-9)
+        strategy: zlib strategy constant
+        row_filter: PNG row filter applied to every row: none, sub or up
+
+    Returns:
+        Encoded PNG file contents
+    """
+    row_bytes = width * channels
+    if stride == row_bytes:
+        pixels = bytes(data[:row_bytes * height])
+    else:
+        pixels = b''.join(
+            data[y * stride:y * stride + row_bytes] for y in range(height)
+        )
+
+    if row_filter == 'up':
+        previous = bytes(row_bytes) + pixels[:-row_bytes]
+        pixels = _bytewise_sub(pixels, previous)
+    elif row_filter == 'sub':
+        previous = b''.join(
+            bytes(channels) + pixels[y * row_bytes:(y + 1) * row_bytes - channels]
+            for y in range(height)
+        )
+        pixels = _bytewise_sub(pixels, previous)
+
+    filter_byte = bytes([_PNG_FILTER_TYPES[row_filter]])
+    filtered = filter_byte + filter_byte.join(
+        pixels[y * row_bytes:(y + 1) * row_bytes] for y in range(height)
+    )
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+    compressed = compressor.compress(filtered) + compressor.flush()
+
+    color_type = 6 if channels == 4 else 2
+    parts = [
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+                                        color_type, 0, 0, 0)),
+    ]
+    if dpi:
+        pixels_per_meter = round(dpi / 0.0254)
+        parts.append(_png_chunk(b'pHYs', struct.pack(
+            '>IIB', pixels_per_meter, pixels_per_meter, 1)))
+    parts.append(_png_chunk(b'IDAT', compressed))
+    parts.append(_png_chunk(b'IEND', b''))
+    return b''.join(parts)
+
+
+def _flatten_on_white(image: QImage) -> QImage:
+    """Composite an image onto white, for outputs without alpha.
+
+    Dropping the alpha channel directly would turn transparent pixels
+    black.
+    """
+    if not image.hasAlphaChannel():
+        return image
+    flat = QImage(image.size(), QImage.Format_RGB32)
+    flat.fill(Qt.white)
+    painter = QPainter(flat)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return flat
+
+
+def encode_image(image: QImage, output_path: str, format: str,
+                 options: Dict[str, Any]) -> bool:
+    """Encode an image to a file with the options' speed preset.
+
+    Safe to call from worker threads as long as image is not shared with
+    another thread.
+
+    Args:
+        image: Image to encode
+        output_path: Output file path
+        format: 'png' or 'jpg'
+        options: Export options (dpi, quality, transparency, speed)
+
+    Returns:
+        True if successful
+    """
+    preset = ENCODE_PRESETS.get(options.get('speed', 'balanced'),
+                                ENCODE_PRESETS['balanced'])
+    dpi = options.get('dpi')
+
+    if format == 'png':
+        channels = 4 if options.get('transparency', True) else 3
+        if channels == 3:
+            image = _flatten_on_white(image)
+        image = image.convertToFormat(
+            QImage.Format_RGBA8888 if channels == 4 else QImage.Format_RGB888
+        )
+        ptr = image.constBits()
+        ptr.setsize(image.byteCount())
+        encoded = encode_png(
+            ptr.asstring(), image.width(), image.height(),
+            image.bytesPerLine(), channels, dpi,
+            preset['png_level'], preset['png_strategy'], preset['png_filter']
+        )
+        tmp_path = output_path + '.part'
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded)
+        os.replace(tmp_path, output_path)
+        return True
+
+    if format == 'jpg':
+        image = _flatten_on_white(image)
+        if dpi:
+            dots_per_meter = round(dpi / 0.0254)
+            image.setDotsPerMeterX(dots_per_meter)
+            image.setDotsPerMeterY(dots_per_meter)
+        writer = QImageWriter(output_path, b'jpg')
+        writer.setQuality(options.get('quality', 95))
+        writer.setOptimizedWrite(preset['jpeg_optimize'])
+        writer.setProgressiveScanWrite(preset['jpeg_progressive'])
+        if not writer.write(image):
+            logger.error(f"JPEG export error: {writer.errorString()}")
+            return False
+        return True
+
+    raise ValueError(f"Unsupported encode format: {format}")
+
+
+class ImageEncoder:
+    """Encodes rendered pages in a pool of worker threads.
+
+    The GUI thread hands over a detached copy of each page; compression
+    and file writing happen in the workers. The number of queued pages is
+    bounded so a fast renderer cannot pile up unencoded pages in memory.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.timings: Dict[str, float] = {}
+        self.failed: List[str] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_workers * 2)
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+
+    def submit(self, image: QImage, output_path: str, format: str,
+               options: Dict[str, Any],
+               on_done: Optional[Callable[[str], None]] = None) -> Future:
+        """Queue an image for encoding, blocking while the queue is full.
+
+        Args:
+            image: Rendered page image
+            output_path: Output file path
+            format: 'png' or 'jpg'
+            options: Export options
+            on_done: Called from the worker with output_path once the file
+                is written
+
+        Returns:
+            Future resolving to True if the file was written
+        """
+        self._slots.acquire()
+        # A deep copy, so the worker never shares pixel data with the
+        # GUI thread
+        job = image.copy()
+        future = self._executor.submit(
+            self._encode, job, output_path, format, dict(options), on_done
+        )
+        self._pending.append(future)
+        return future
+
+    def wait(self) -> bool:
+        """Wait for every queued image.
+
+        Returns:
+            True if all images were written
+        """
+        pending, self._pending = self._pending, []
+        return all([future.result() for future in pending])
+
+    def shutdown(self) -> None:
+        """Wait for queued images and stop the workers."""
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+    def _encode(self, image: QImage, output_path: str, format: str,
+                options: Dict[str, Any],
+                on_done: Optional[Callable[[str], None]]) -> bool:
+        start = time.perf_counter()
+        try:
+            success = encode_image(image, output_path, format, options)
+            if success and on_done:
+                on_done(output_path)
+        except Exception as e:
+            logger.error(f"Encode error for {output_path}: {e}")
+            success = False
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.timings[output_path] = time.perf_counter() - start
+            if not success:
+                self.failed.append(output_path)
+        return success
+
+
+def benchmark_presets(
+    output_dir: str,
+    width: int = 1988,
+    height: int = 3056,
+    dpi: int = 300
+) -> List[Dict[str, Any]]:
+    """Measure output size and encode time of every preset.
+
+    Encodes a synthetic line-art page (white paper, panel borders and
+    hatching) with each preset as PNG and JPEG.
+
+    Args:
+        output_dir: Directory for the encoded test files
+        width: Page width in pixels
+        height: Page height in pixels
+        dpi: Resolution tag
+
+    Returns:
+        One row per preset and format with 'preset', 'format', 'bytes'
+        and 'seconds' keys
+    """
+    page = QImage(width, height, QImage.Format_ARGB32)
+    page.fill(Qt.white)
+    painter = QPainter(page)
+    painter.setPen(QPen(Qt.black, 8))
+    margin = width // 20
+    panel_w = (width - 3 * margin) // 2
+    panel_h = (height - 4 * margin) // 3
+    for i in range(6):
+        x = margin + (i % 2) * (panel_w + margin)
+        y = margin + (i // 2) * (panel_h + margin)
+        painter.drawRect(QRect(x, y, panel_w, panel_h))
+        painter.setPen(QPen(Qt.black, 2))
+        for offset in range(0, panel_w, 24):
+            painter.drawLine(x + offset, y, x + panel_w, y + panel_h - offset)
+        painter.setPen(QPen(Qt.black, 8))
+    painter.end()
+
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for name in ENCODE_PRESETS:
+        for format in ('png', 'jpg'):
+            path = os.path.join(output_dir, f"bench_{name}.{format}")
+            start = time.perf_counter()
+            encode_image(page, path, format, {
+                'speed': name, 'dpi': dpi, 'quality': 90, 'transparency': False
+            })
+            rows.append({
+                'preset': name,
+                'format': format,
+                'bytes': os.path.getsize(path),
+                'seconds': time.perf_counter() - start,
+            })
+    return rows
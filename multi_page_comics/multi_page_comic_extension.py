@@ -63,8 +63,10 @@ class MultiPageComicsExtension(Extension):
             project_data = dialog.get_project_data()
             self.project_manager.create_project(project_data)
             docker = self._get_docker()
-            if docker and docker.isVisible():
-                docker.refresh_project()
+            if docker:
+                docker.set_project_manager(self.project_manager)
+                if docker.isVisible():
+                    docker.refresh_project()
 
     def open_project(self, window) -> None:
         """Open existing comic project.
@@ -77,13 +79,15 @@ class MultiPageComicsExtension(Extension):
             window.qwindow(),
             "Open Comic Project",
             "",
-            "Krita Documents (*.kra)"
+            "Comic Projects (*.kra *.comicproj);;Krita Documents (*.kra)"
         )
         if filename:
             self.project_manager.load_project(filename)
             docker = self._get_docker()
-            if docker and docker.isVisible():
-                docker.refresh_project()
+            if docker:
+                docker.set_project_manager(self.project_manager)
+                if docker.isVisible():
+                    docker.refresh_project()
 
     def export_comic(self, window) -> None:
         """Export comic pages.
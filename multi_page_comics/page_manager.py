@@ -12,33 +12,41 @@ class PageManager:
         self.panel_system = PanelSystem()
         self.template_manager = TemplateManager()
 
-    def create_page(self, template_id: Optional[str] = None) -> Dict[str, Any]:
+    def create_page(
+        self,
+        template_id: Optional[str] = None,
+        doc=None,
+        page_number: Optional[int] = None,
+        gutter: Optional[float] = None
+    ) -> Dict[str, Any]:
         """Create new page with optional template.
         
         Args:
             template_id: Optional template ID to apply
+            doc: Document to create the page in, defaults to the active
+                document (or a new one if there is none)
+            page_number: Page number, defaults to the document's number
+                of top-level nodes
+            gutter: Gutter for the template panels, defaults to the
+                project's default gutter
             
         Returns:
             Page data dictionary
         """
-        doc = Krita.instance().activeDocument()
+        if doc is None:
+            doc = Krita.instance().activeDocument()
 
         if not doc:
             # Create new document
-            doc = Krita.instance().createDocument(
-                self.settings['page_width'],
-                self.settings['page_height'],
-                "Comic Page",
-                "RGBA",
-                "U8",
-                "",
-                self.settings['dpi']
-            )
+            doc = self.create_page_document()
             Krita.instance().activeWindow().addView(doc)
 
+        if page_number is None:
+            page_number = len(doc.topLevelNodes())
+
         # Create page data structure
         page_data = {
-            'page_number': len(doc.topLevelNodes()),
+            'page_number': page_number,
             'template_id': template_id,
             'panels': [],
             'layers': []
@@ -47,22 +55,40 @@ class PageManager:
         # Create page group layer
         page_layer = doc.createGroupLayer(f"Page {page_data['page_number']}")
         doc.rootNode().addChildNode(page_layer, None)
+        page_data['layer_id'] = page_layer.uniqueId()
 
         # Apply template if specified
         if template_id:
             template = self.template_manager.get_template(template_id)
             if template:
                 page_data['panels'] = self.apply_template(
-                    doc, page_layer, template
+                    doc, page_layer, template, gutter
                 )
 
         return page_data
 
+    def create_page_document(self):
+        """Create an empty document sized for one page.
+
+        Returns:
+            Krita document
+        """
+        return Krita.instance().createDocument(
+            self.settings['page_width'],
+            self.settings['page_height'],
+            "Comic Page",
+            "RGBA",
+            "U8",
+            "",
+            self.settings['dpi']
+        )
+
     def apply_template(
         self,
         doc,
         page_layer,
-        template: Dict[str, Any]
+        template: Dict[str, Any],
+        gutter: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """Apply panel template to page.
         
@@ -70,18 +96,23 @@ class PageManager:
             doc: Krita document
             page_layer: Parent page layer
             template: Template dictionary
+            gutter: Gap between panels, defaults to the project's
+                default gutter
             
         Returns:
             List of created panel data dictionaries
         """
         panels = []
+        if gutter is None:
+            gutter = self.settings.get('default_gutter', 0)
 
         for i, panel_def in enumerate(template['panels']):
             panel_data = self.panel_system.create_panel(
                 doc,
                 page_layer,
                 panel_def,
-                i + 1
+                i + 1,
+                gutter
             )
             panels.append(panel_data)
 
@@ -109,5 +140,66 @@ class PageManager:
             doc,
             page_layer,
             panel_definition,
-            panel_count + 1
-        )
\ No newline at end of file
+            panel_count + 1,
+            self.settings.get('default_gutter', 0)
+        )
+
+    def duplicate_page(
+        self,
+        doc,
+        source_page: Dict[str, Any],
+        page_number: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Duplicate a page, sharing layer content with the original.
+
+        Paint layers are replaced by clone layers of the source, so the
+        copy costs no pixel memory until a panel is materialized with
+        PanelSystem.materialize_panel. The copy's page layer is placed
+        directly above the source page layer.
+
+        Args:
+            doc: Krita document
+            source_page: Page data dictionary of the page to duplicate
+            page_number: Page number of the copy, defaults to the one
+                following the source page
+
+        Returns:
+            Page data dictionary of the copy, or None if the source page
+            layer cannot be found
+        """
+        source_layer = doc.nodeByUniqueID(source_page.get('layer_id'))
+        if not source_layer:
+            return None
+
+        if page_number is None:
+            page_number = source_page.get('page_number', 0) + 1
+
+        page_data = {
+            'page_number': page_number,
+            'template_id': source_page.get('template_id'),
+            'panels': [],
+            'layers': list(source_page.get('layers', [])),
+            'duplicated_from': source_page.get('layer_id')
+        }
+
+        page_layer = doc.createGroupLayer(f"Page {page_data['page_number']}")
+        source_layer.parentNode().addChildNode(page_layer, source_layer)
+        page_data['layer_id'] = page_layer.uniqueId()
+
+        panels_by_layer = {
+            panel.get('layer_id'): panel
+            for panel in source_page.get('panels', [])
+        }
+        for child in source_layer.childNodes():
+            panel = panels_by_layer.get(child.uniqueId())
+            if panel:
+                shared = self.panel_system.share_panel(doc, page_layer, panel)
+                if shared:
+                    page_data['panels'].append(shared)
+            else:
+                page_layer.addChildNode(
+                    self.panel_system.share_node(doc, child), None
+                )
+
+        return page_data
+
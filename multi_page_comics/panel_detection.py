@@ -0,0 +1,357 @@
+import logging
+from typing import Optional, Dict, Any, List, Tuple
+from PyQt5.QtGui import QImage
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_OPTIONS = {
+    # Gray level below which a pixel counts as ink
+    'threshold': 200,
+    # Narrowest gutter, as a fraction of the shorter page side
+    'min_gutter': 0.004,
+    # Smallest panel side, as a fraction of the page side
+    'min_panel': 0.05,
+    # Fraction of a gutter row/column that may be covered by dust or
+    # stray marks
+    'noise': 0.002,
+    # Order panels right to left (manga)
+    'right_to_left': False,
+}
+
+Rect = Tuple[int, int, int, int]
+
+
+def is_available() -> bool:
+    """Check whether panel detection can run (it needs NumPy)."""
+    return np is not None
+
+
+def image_to_array(image: QImage):
+    """Convert a QImage to a height x width x 4 BGRA NumPy array.
+
+    Args:
+        image: Image in any format
+
+    Returns:
+        uint8 array sharing no memory with the image
+    """
+    image = image.convertToFormat(QImage.Format_ARGB32)
+    ptr = image.constBits()
+    ptr.setsize(image.byteCount())
+    rows = np.frombuffer(ptr, np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4).copy()
+
+
+def pixel_data_to_array(data, width: int, height: int):
+    """Wrap 8-bit RGBA pixel data from Krita (BGRA byte order) as an array.
+
+    Args:
+        data: QByteArray or bytes from Node.pixelData/projectionPixelData
+        width: Width of the requested area
+        height: Height of the requested area
+
+    Returns:
+        Height x width x 4 uint8 array
+    """
+    return np.frombuffer(bytes(data), dtype=np.uint8).reshape(height, width, 4)
+
+
+def ink_mask(pixels, threshold: int = 200):
+    """Classify pixels as ink (True) or gutter/paper (False).
+
+    Args:
+        pixels: Height x width gray array, or height x width x 3/4 array
+            in BGR(A) order as returned by Krita's pixelData
+        threshold: Gray level separating ink from paper
+
+    Returns:
+        Boolean array of the page size
+    """
+    if pixels.ndim == 2:
+        ink = pixels < threshold
+    else:
+        # The darkest channel decides, so colored line art counts as ink;
+        # pairwise minimum is much faster than min() over the channel axis
+        gray = np.minimum(np.minimum(pixels[..., 0], pixels[..., 1]), pixels[..., 2])
+        ink = gray < threshold
+        if pixels.shape[2] == 4:
+            ink &= pixels[..., 3] >= 128
+
+    # Pages with black gutters: the border is mostly "ink", so invert
+    border = np.concatenate((ink[0], ink[-1], ink[:, 0], ink[:, -1]))
+    if border.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def detect_panels(pixels, options: Optional[Dict[str, Any]] = None) -> List[Rect]:
+    """Find panel rectangles on a page.
+
+    The page is split recursively along gutters, i.e. rows or columns
+    (nearly) free of ink in its projection profiles (XY-cut). Regions
+    that cannot be split that way, such as staggered or inset layouts,
+    are separated into connected ink components, merging components
+    whose boxes overlap so panel art stays with its frame.
+
+    Args:
+        pixels: Page pixels, see ink_mask
+        options: Overrides for DEFAULT_OPTIONS
+
+    Returns:
+        (x, y, width, height) rectangles in reading order
+    """
+    if np is None:
+        logger.error("Panel detection requires NumPy")
+        return []
+
+    opts = {**DEFAULT_OPTIONS, **(options or {})}
+    ink = ink_mask(np.asarray(pixels), opts['threshold'])
+    height, width = ink.shape
+    params = {
+        'min_gutter': max(2, int(min(width, height) * opts['min_gutter'])),
+        'min_w': max(1, int(width * opts['min_panel'])),
+        'min_h': max(1, int(height * opts['min_panel'])),
+        'noise': opts['noise'],
+        'rtl': opts['right_to_left'],
+    }
+
+    panels: List[Rect] = []
+    _xy_cut(ink, 0, 0, width, height, params, panels)
+    return panels
+
+
+def panels_to_definitions(panels: List[Rect], width: int, height: int) -> List[Dict[str, Any]]:
+    """Convert pixel rectangles to percentage panel definitions.
+
+    Args:
+        panels: (x, y, width, height) rectangles
+        width: Page width in pixels
+        height: Page height in pixels
+
+    Returns:
+        Panel definitions as used by templates and PanelSystem.create_panel
+    """
+    return [
+        {
+            'x': x * 100.0 / width,
+            'y': y * 100.0 / height,
+            'width': w * 100.0 / width,
+            'height': h * 100.0 / height,
+        }
+        for x, y, w, h in panels
+    ]
+
+
+def detect_panels_in_file(path: str, options: Optional[Dict[str, Any]] = None) -> List[Rect]:
+    """Find panel rectangles on a scanned page file.
+
+    Args:
+        path: Image file
+        options: Overrides for DEFAULT_OPTIONS
+
+    Returns:
+        (x, y, width, height) rectangles in reading order
+    """
+    if np is None:
+        logger.error("Panel detection requires NumPy")
+        return []
+    image = QImage(path)
+    if image.isNull():
+        logger.error(f"Could not read {path}")
+        return []
+    return detect_panels(image_to_array(image), options)
+
+
+def _xy_cut(ink, x0: int, y0: int, x1: int, y1: int,
+            params: Dict[str, Any], panels: List[Rect]) -> None:
+    """Recursively split a region along gutters, appending leaf panels."""
+    # Shrink to the inked area; trimming rows changes the column profile,
+    # so repeat until the box is stable
+    while True:
+        region = ink[y0:y1, x0:x1]
+        rows = np.count_nonzero(region, axis=1)
+        cols = np.count_nonzero(region, axis=0)
+        filled_rows = np.flatnonzero(rows > (x1 - x0) * params['noise'])
+        filled_cols = np.flatnonzero(cols > (y1 - y0) * params['noise'])
+        if not len(filled_rows) or not len(filled_cols):
+            return
+        box = (x0 + filled_cols[0], y0 + filled_rows[0],
+               x0 + filled_cols[-1] + 1, y0 + filled_rows[-1] + 1)
+        if box == (x0, y0, x1, y1):
+            break
+        x0, y0, x1, y1 = (int(v) for v in box)
+
+    if x1 - x0 < params['min_w'] or y1 - y0 < params['min_h']:
+        return
+
+    row_gutters = _gutters(rows, (x1 - x0) * params['noise'], params['min_gutter'])
+    if row_gutters:
+        for start, end in _segments(row_gutters, y1 - y0):
+            _xy_cut(ink, x0, y0 + start, x1, y0 + end, params, panels)
+        return
+
+    col_gutters = _gutters(cols, (y1 - y0) * params['noise'], params['min_gutter'])
+    if col_gutters:
+        segments = _segments(col_gutters, x1 - x0)
+        if params['rtl']:
+            segments.reverse()
+        for start, end in segments:
+            _xy_cut(ink, x0 + start, y0, x0 + end, y1, params, panels)
+        return
+
+    panels.extend(_split_components(ink, x0, y0, x1, y1, params))
+
+
+def _gutters(profile, tolerance: float, min_length: int) -> List[Tuple[int, int]]:
+    """Find interior runs of empty profile entries at least min_length long."""
+    empty = np.concatenate(([False], profile <= tolerance, [False]))
+    edges = np.diff(empty.astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [
+        (int(s), int(e)) for s, e in zip(starts, ends)
+        if e - s >= min_length and s > 0 and e < len(profile)
+    ]
+
+
+def _segments(gutters: List[Tuple[int, int]], length: int) -> List[Tuple[int, int]]:
+    """Turn gutter runs into the (start, end) ranges between them."""
+    segments = []
+    start = 0
+    for gutter_start, gutter_end in gutters:
+        segments.append((start, gutter_start))
+        start = gutter_end
+    segments.append((start, length))
+    return segments
+
+
+def _split_components(ink, x0: int, y0: int, x1: int, y1: int,
+                      params: Dict[str, Any]) -> List[Rect]:
+    """Split a region without straight gutters into connected panels."""
+    leaf = (x0, y0, x1 - x0, y1 - y0)
+
+    # Label at reduced resolution; the factor keeps gutters at least two
+    # cells wide so neighbouring panels do not merge
+    factor = max(1, params['min_gutter'] // 3)
+    region = ink[y0:y1, x0:x1]
+    h, w = region.shape[0] // factor, region.shape[1] // factor
+    if h < 2 or w < 2:
+        return [leaf]
+    small = region[:h * factor, :w * factor].reshape(h, factor, w, factor).any(axis=(1, 3))
+
+    boxes = [
+        (bx0 * factor, by0 * factor, bx1 * factor, by1 * factor)
+        for bx0, by0, bx1, by1 in _component_boxes(small)
+    ]
+    # Specks and lettering outside panels cannot be panels themselves
+    boxes = [b for b in boxes
+             if b[2] - b[0] >= params['min_w'] // 4 or b[3] - b[1] >= params['min_h'] // 4]
+    boxes = _merge_overlapping(boxes)
+    boxes = [b for b in boxes
+             if b[2] - b[0] >= params['min_w'] and b[3] - b[1] >= params['min_h']]
+    if len(boxes) < 2:
+        return [leaf]
+
+    # Reading order: by row band, then across
+    row_height = params['min_h']
+    boxes.sort(key=lambda b: (b[1] // row_height,
+                              -b[0] if params['rtl'] else b[0]))
+    return [
+        (x0 + bx0, y0 + by0, min(bx1, x1 - x0) - bx0, min(by1, y1 - y0) - by0)
+        for bx0, by0, bx1, by1 in boxes
+    ]
+
+
+def _component_boxes(mask) -> List[Rect]:
+    """Bounding boxes (x0, y0, x1, y1) of 8-connected True components."""
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask, structure=np.ones((3, 3), dtype=bool))
+        return [
+            (s[1].start, s[0].start, s[1].stop, s[0].stop)
+            for s in ndimage.find_objects(labels) if s is not None
+        ]
+
+    # Run-length labeling: horizontal runs are found with NumPy and
+    # runs that touch across neighbouring rows are unioned
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+    count = len(run_rows)
+    if not count:
+        return []
+
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    row_first = np.searchsorted(run_rows, np.arange(height + 1))
+    starts = run_starts.tolist()
+    ends = run_ends.tolist()
+    for row in range(1, height):
+        prev, prev_end = int(row_first[row - 1]), int(row_first[row])
+        cur_end = int(row_first[row + 1])
+        j = prev
+        for i in range(prev_end, cur_end):
+            # Skip runs of the previous row ending left of this run;
+            # ends are exclusive, so touching diagonally still connects
+            while j < prev_end and ends[j] < starts[i]:
+                j += 1
+            k = j
+            while k < prev_end and starts[k] <= ends[i]:
+                ri, rk = find(i), find(k)
+                if ri != rk:
+                    parent[rk] = ri
+                k += 1
+
+    roots = np.array([find(i) for i in range(count)])
+    _, labels = np.unique(roots, return_inverse=True)
+    n = labels.max() + 1
+    bx0 = np.full(n, width)
+    by0 = np.full(n, height)
+    bx1 = np.zeros(n, dtype=np.int64)
+    by1 = np.zeros(n, dtype=np.int64)
+    np.minimum.at(bx0, labels, run_starts)
+    np.minimum.at(by0, labels, run_rows)
+    np.maximum.at(bx1, labels, run_ends)
+    np.maximum.at(by1, labels, run_rows + 1)
+    return list(zip(bx0.tolist(), by0.tolist(), bx1.tolist(), by1.tolist()))
+
+
+def _merge_overlapping(boxes: List[Rect]) -> List[Rect]:
+    """Merge (x0, y0, x1, y1) boxes until none overlap."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in sorted(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True):
+            for i, other in enumerate(result):
+                if (box[0] < other[2] and other[0] < box[2] and
+                        box[1] < other[3] and other[1] < box[3]):
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
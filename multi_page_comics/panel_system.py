@@ -1,7 +1,12 @@
-from typing import Dict, Any, Optional
+import math
+from typing import Dict, Any, List, Optional, Tuple
 from krita import Krita
 from PyQt5.QtCore import QRect, QPoint
 from PyQt5.QtGui import QColor
+from .utils.geometry import (
+    clip_polygon, inset_polygon, polygon_bounds, polygon_from_rect
+)
+from .utils.rasterize import polygon_mask, rect_mask
 
 
 class PanelSystem:
@@ -10,21 +15,31 @@ class PanelSystem:
     def __init__(self):
         self.default_border_width = 4
         self.default_border_color = QColor(0, 0, 0)
+        self.mask_antialias = True
 
     def create_panel(
         self,
         doc,
         page_layer,
         panel_def: Dict[str, Any],
-        panel_number: int
+        panel_number: int,
+        gutter: float = 0
     ) -> Dict[str, Any]:
         """Create panel with clipping mask.
+
+        Panels are rectangles given by x/y/width/height, or polygons
+        given by 'points', a list of [x, y] vertices; all values are
+        percentages of the page size. Polygon panels are clipped to the
+        page and carry their pixel vertices in the panel data, with
+        'bounds' being their bounding box.
         
         Args:
             doc: Krita document
             page_layer: Parent layer
             panel_def: Panel definition dictionary
             panel_number: Panel number/index
+            gutter: Gap between neighbouring panels in pixels; every
+                panel edge is moved inwards by half of it
             
         Returns:
             Panel data dictionary
@@ -37,10 +52,21 @@ class PanelSystem:
         page_width = doc.width()
         page_height = doc.height()
 
-        x = int(panel_def.get('x', 0) * page_width / 100)
-        y = int(panel_def.get('y', 0) * page_height / 100)
-        width = int(panel_def.get('width', 50) * page_width / 100)
-        height = int(panel_def.get('height', 50) * page_height / 100)
+        points = self.panel_polygon(panel_def, page_width, page_height, gutter)
+        if points:
+            bx, by, bw, bh = polygon_bounds(points)
+            x, y = int(math.floor(bx)), int(math.floor(by))
+            width = int(math.ceil(bx + bw)) - x
+            height = int(math.ceil(by + bh)) - y
+        elif points is not None:
+            # Polygon entirely off the page or eaten by the gutter
+            x = y = width = height = 0
+        else:
+            inset = int(round(gutter / 2))
+            x = int(panel_def.get('x', 0) * page_width / 100) + inset
+            y = int(panel_def.get('y', 0) * page_height / 100) + inset
+            width = max(0, int(panel_def.get('width', 50) * page_width / 100) - 2 * inset)
+            height = max(0, int(panel_def.get('height', 50) * page_height / 100) - 2 * inset)
 
         # Create border layer
         border_layer = doc.createVectorLayer(f"Panel {panel_number} Border")
@@ -57,10 +83,10 @@ class PanelSystem:
         if panel_def.get('clip_content', True):
             mask_layer = doc.createTransparencyMask(f"Panel {panel_number} Mask")
             panel_group.addChildNode(mask_layer, border_layer)
-            self._create_clipping_mask(mask_layer, x, y, width, height)
+            self._create_clipping_mask(mask_layer, x, y, width, height, points)
 
         # Create content layer
-        content_layer = doc.createPaintLayer(f"Panel {panel_number} Content")
+        content_layer = doc.createNode(f"Panel {panel_number} Content", 'paintlayer')
         panel_group.addChildNode(content_layer, None)
 
         panel_data = {
@@ -70,9 +96,166 @@ class PanelSystem:
             'clip_content': panel_def.get('clip_content', True),
             'layer_id': panel_group.uniqueId()
         }
+        if points:
+            panel_data['points'] = [[round(px, 2), round(py, 2)] for px, py in points]
 
         return panel_data
 
+    def panel_polygon(
+        self,
+        panel_def: Dict[str, Any],
+        page_width: float,
+        page_height: float,
+        gutter: float = 0
+    ) -> Optional[List[Tuple[float, float]]]:
+        """Get the pixel outline of a polygon panel definition.
+
+        Args:
+            panel_def: Panel definition dictionary
+            page_width: Page width in pixels
+            page_height: Page height in pixels
+            gutter: Gap between neighbouring panels in pixels
+
+        Returns:
+            List of (x, y) vertices, None for rectangle panels, or an
+            empty list if nothing of the panel remains on the page
+        """
+        if not panel_def.get('points'):
+            return None
+        points = [(px * page_width / 100, py * page_height / 100)
+                  for px, py in panel_def['points']]
+        points = clip_polygon(points, polygon_from_rect(0, 0, page_width, page_height))
+        if points and gutter:
+            points = inset_polygon(points, gutter / 2)
+        return points
+
+    def share_node(self, doc, node):
+        """Create a content-sharing copy of a node.
+
+        Paint layers become clone layers referencing the original, groups
+        are rebuilt with shared children, and anything else (vector
+        borders, masks) is duplicated since it carries no bulk pixel data.
+
+        Args:
+            doc: Krita document
+            node: Node to copy
+
+        Returns:
+            New node, not yet attached to a parent
+        """
+        node_type = node.type()
+        if node_type == 'paintlayer':
+            return doc.createCloneLayer(node.name(), node)
+        if node_type == 'grouplayer':
+            group = doc.createGroupLayer(node.name())
+            for child in node.childNodes():
+                group.addChildNode(self.share_node(doc, child), None)
+            return group
+        return node.duplicate()
+
+    def share_panel(
+        self,
+        doc,
+        page_layer,
+        panel_data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Copy a panel into another page without copying its pixels.
+
+        Args:
+            doc: Krita document
+            page_layer: Parent layer for the copy
+            panel_data: Panel data dictionary of the source panel
+
+        Returns:
+            Panel data dictionary of the copy, or None if the source
+            panel layer cannot be found
+        """
+        source_group = doc.nodeByUniqueID(panel_data['layer_id'])
+        if not source_group:
+            return None
+
+        panel_group = self.share_node(doc, source_group)
+        page_layer.addChildNode(panel_group, None)
+
+        shared = dict(panel_data)
+        shared['bounds'] = dict(panel_data['bounds'])
+        if 'points' in panel_data:
+            shared['points'] = [list(p) for p in panel_data['points']]
+        shared['layer_id'] = panel_group.uniqueId()
+        # Copies of a copy clone the same source layers
+        shared['shared_from'] = panel_data.get('shared_from') or panel_data['layer_id']
+        return shared
+
+    def materialize_panel(
+        self,
+        doc,
+        panel_data: Dict[str, Any],
+        layer_change=None
+    ) -> Optional[Dict[str, Any]]:
+        """Replace a shared panel's clone layers with real paint layers.
+
+        Only the panel's bounding box is copied from the source layers.
+        If a clone layer is the active layer, its replacement becomes
+        active, so a stroke about to start paints on the copy.
+
+        Args:
+            doc: Krita document
+            panel_data: Panel data dictionary of a shared panel
+            layer_change: Optional LayerChange recording the replaced
+                layers so the step can be undone
+
+        Returns:
+            Panel data to store for the panel (a copy no longer marked as
+            shared), or None if it was not shared or its layer cannot be
+            found
+        """
+        if not panel_data.get('shared_from'):
+            return None
+
+        panel_group = doc.nodeByUniqueID(panel_data['layer_id'])
+        if not panel_group:
+            return None
+
+        bounds = panel_data['bounds']
+        panel_rect = QRect(bounds['x'], bounds['y'],
+                           bounds['width'], bounds['height'])
+        active = doc.activeNode()
+
+        for clone in self._clone_layers(panel_group):
+            source = clone.sourceNode()
+            layer = doc.createNode(clone.name(), 'paintlayer')
+            clone.parentNode().addChildNode(layer, clone)
+
+            if source:
+                rect = panel_rect.intersected(source.bounds())
+                if not rect.isEmpty():
+                    layer.setPixelData(
+                        source.pixelData(rect.x(), rect.y(),
+                                         rect.width(), rect.height()),
+                        rect.x(), rect.y(), rect.width(), rect.height()
+                    )
+            if active and active.uniqueId() == clone.uniqueId():
+                doc.setActiveNode(layer)
+            if layer_change is not None:
+                layer_change.attached(layer)
+                layer_change.detach(clone)
+            else:
+                clone.remove()
+
+        materialized = dict(panel_data)
+        del materialized['shared_from']
+        return materialized
+
+    def _clone_layers(self, node) -> list:
+        """Collect clone layers below node."""
+        clones = []
+        for child in node.childNodes():
+            if child.type() == 'clonelayer':
+                clones.append(child)
+            else:
+                clones.extend(self._clone_layers(child))
+        return clones
+
     def _draw_panel_border(
         self,
         layer,
@@ -102,9 +285,13 @@ class PanelSystem:
         x: int,
         y: int,
         width: int,
-        height: int
+        height: int,
+        points: Optional[List[Tuple[float, float]]] = None
     ) -> None:
         """Create transparency mask for panel clipping.
+
+        The panel shape is rasterized and written over its bounding box
+        only; the rest of the (initially empty) mask stays hidden.
         
         Args:
             mask_layer: Transparency mask layer
@@ -112,53 +299,81 @@ class PanelSystem:
             y: Y position
             width: Panel width
             height: Panel height
+            points: Outline of a polygon panel in pixels
         """
-        # TODO: Fill mask area with white (visible)
-        # rect = QRect(x, y, width, height)
-        # Use Krita's selection and fill tools for proper implementation
-        pass
+        if points:
+            data, (bx, by, bw, bh) = polygon_mask(points, self.mask_antialias)
+        else:
+            data, (bx, by, bw, bh) = rect_mask(x, y, width, height, self.mask_antialias)
+        if bw > 0 and bh > 0:
+            mask_layer.setPixelData(data, bx, by, bw, bh)
 
     def import_image_to_panel(
         self,
         doc,
         panel_data: Dict[str, Any],
-        image_path: str
-    ) -> bool:
+        image_path: str,
+        asset_store=None,
+        layer_change=None,
+        blending_mode: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         """Import image and clip to panel bounds.
+
+        With an asset store, the image is added to the project's
+        content-addressed store and the file layer references the shared
+        copy (downscaled to the panel size when larger), so importing the
+        same file into many panels stores and decodes it once. Prepare
+        the asset on a worker thread first (AssetStore.prepare, as
+        ComicProjectManager.import_images does) and this only finds it
+        in the store's cache.
         
         Args:
             doc: Krita document
             panel_data: Panel data dictionary
             image_path: Path to image file
+            asset_store: Optional AssetStore of the project
+            layer_change: Optional LayerChange recording the new layer
+            blending_mode: Optional blending mode for the new layer
             
         Returns:
-            True if successful
+            Panel data to store for the panel (a copy listing the stored
+            asset when a store is used), or None if the panel layer
+            cannot be found
         """
-        from krita import QImage
-
-        # Load image
-        img = QImage(image_path)
-
         # Find panel layer
         panel_layer = doc.nodeByUniqueID(panel_data['layer_id'])
         if not panel_layer:
-            return False
+            return None
+
+        bounds = panel_data['bounds']
+        layer_path = image_path
+        updated = dict(panel_data)
+        if asset_store is not None:
+            digest, layer_path = asset_store.prepare(
+                image_path, max(bounds['width'], bounds['height'])
+            )
+            assets = panel_data.get('assets', [])
+            if digest not in assets:
+                updated['assets'] = assets + [digest]
 
         # Create new layer for image
         img_layer = doc.createFileLayer(
             "Imported Image",
-            image_path,
+            layer_path,
             "None"
         )
+        if blending_mode:
+            img_layer.setBlendingMode(blending_mode)
 
         # Add to panel group
         panel_layer.addChildNode(img_layer, None)
+        if layer_change is not None:
+            layer_change.attached(img_layer)
 
         # Scale to fit panel
-        bounds = panel_data['bounds']
         img_layer.move(bounds['x'], bounds['y'])
 
-        return True
+        return updated
 
     def paste_to_panel(self, doc, panel_data: Dict[str, Any]) -> bool:
         """Paste clipboard content to panel.
@@ -183,7 +398,7 @@ class PanelSystem:
         if not panel_layer:
             return False
 
-        paste_layer = doc.createPaintLayer("Pasted Image")
+        paste_layer = doc.createNode("Pasted Image", 'paintlayer')
         panel_layer.addChildNode(paste_layer, None)
 
         # Convert QImage to pixel data and set
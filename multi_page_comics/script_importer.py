@@ -0,0 +1,305 @@
+import logging
+import math
+import re
+import time
+from typing import Optional, Dict, Any, List, Callable, Tuple
+from .speech_bubble_manager import SpeechBubbleManager
+from .text_layout import DEFAULT_FONT, font_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_PATTERN = re.compile(r'^\s*PAGE\s+(?P<page>\d+)\b', re.IGNORECASE)
+PANEL_PATTERN = re.compile(r'^\s*PANEL\s+(?P<panel>\d+)\b', re.IGNORECASE)
+# "JOHN: Hi.", "2. MARY (WHISPER): Quiet!" - speakers are upper case, which
+# keeps panel descriptions like "Wide shot: the harbour" out
+DIALOGUE_PATTERN = re.compile(
+    r'^\s*(?:\d+[.)]\s*)?(?P<speaker>[^\s:(][^:(]*?)\s*'
+    r'(?:\((?P<mode>[^)]*)\))?\s*:\s*(?P<text>.*)$'
+)
+
+# Speakers and delivery notes mapped to bubble styles
+SPEAKER_STYLES = {'CAPTION': 'narration', 'NARRATION': 'narration', 'NARRATOR': 'narration'}
+MODE_STYLES = {
+    'whisper': 'whisper', 'whispers': 'whisper',
+    'thought': 'thought', 'thinks': 'thought', 'thinking': 'thought',
+    'shout': 'shout', 'shouts': 'shout', 'yell': 'shout', 'yells': 'shout',
+    'radio': 'radio', 'phone': 'radio', 'tv': 'radio', 'off': 'radio', 'o.s.': 'radio',
+}
+
+# Lines that are lettered as art rather than in bubbles
+SKIPPED_SPEAKERS = {'SFX'}
+
+LETTERING_GROUP = "Lettering"
+
+
+def parse_script(text: str) -> List[Dict[str, Any]]:
+    """Parse a dialogue script into lines to letter.
+
+    Pages start with "PAGE <n>" and panels with "PANEL <n>"; dialogue is
+    "SPEAKER: text" or "SPEAKER (whisper): text", optionally numbered.
+    Lines following dialogue without a blank line continue it; anything
+    else (panel descriptions, notes) is ignored.
+
+    Args:
+        text: Script text
+
+    Returns:
+        Entries with 'line' (1-based line number), 'page' and 'panel'
+        (0-based indices, None where the script did not give one),
+        'speaker', 'style' and 'text', in script order
+    """
+    entries = []
+    page = panel = None
+    current = None
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            current = None
+            continue
+
+        match = PAGE_PATTERN.match(line)
+        if match:
+            page = int(match.group('page')) - 1
+            panel = None
+            current = None
+            continue
+        match = PANEL_PATTERN.match(line)
+        if match:
+            panel = int(match.group('panel')) - 1
+            current = None
+            continue
+
+        match = DIALOGUE_PATTERN.match(line)
+        speaker = match.group('speaker') if match else None
+        if speaker and speaker.isupper():
+            mode = (match.group('mode') or '').strip().lower()
+            current = {
+                'line': number,
+                'page': page,
+                'panel': panel,
+                'speaker': speaker,
+                'style': SPEAKER_STYLES.get(speaker, MODE_STYLES.get(mode, 'standard')),
+                'text': match.group('text').strip(),
+            }
+            entries.append(current)
+        elif current is not None:
+            current['text'] = f"{current['text']} {line}".strip()
+    return entries
+
+
+class ScriptImporter:
+    """Letters a dialogue script into a project's pages and panels.
+
+    Every script line becomes a bubble with its text, stacked from the
+    top of its panel; speakers alternate between the left and right side
+    in the order they first talk in the panel. Pages are lettered one at
+    a time, each page's document is refreshed once, and lines that do not
+    fit their panel or name a page or panel that does not exist are
+    reported instead of placed.
+    """
+
+    def __init__(
+        self,
+        project_manager,
+        font_family: str = DEFAULT_FONT,
+        font_size: int = 36,
+        bubble_width: float = 0.45
+    ):
+        """Create an importer.
+
+        Args:
+            project_manager: Project manager of the project to letter
+            font_family: Lettering font
+            font_size: Lettering pixel size
+            bubble_width: Bubble width as a fraction of the panel width
+        """
+        self.project_manager = project_manager
+        self.font_family = font_family
+        self.font_size = font_size
+        self.bubble_width = bubble_width
+        self.bubble_manager = SpeechBubbleManager()
+
+    def import_script(
+        self,
+        path: str,
+        create_pages: bool = False,
+        progress: Optional[Callable[[int, int], Optional[bool]]] = None
+    ) -> Dict[str, Any]:
+        """Letter every line of a script file.
+
+        Args:
+            path: Script file (UTF-8 text)
+            create_pages: Add pages to the project for page numbers past
+                its end
+            progress: Called with (done, total) pages after every page;
+                returning False cancels the import
+
+        Returns:
+            Summary with the number of 'placed' lines, 'unplaced' entries
+            (parse_script entries with a 'reason'), 'cancelled' and
+            'seconds'
+        """
+        start = time.perf_counter()
+        summary = {'placed': 0, 'unplaced': [], 'cancelled': False, 'seconds': 0.0}
+        if not self.project_manager.current_project:
+            return summary
+
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = parse_script(f.read())
+
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            if entry['page'] is None:
+                self._unplaced(summary, entry, "no PAGE before the line")
+            elif entry['speaker'] in SKIPPED_SPEAKERS:
+                self._unplaced(summary, entry, "sound effects are not lettered in bubbles")
+            elif not entry['text']:
+                self._unplaced(summary, entry, "no text")
+            else:
+                pages.setdefault(entry['page'], []).append(entry)
+
+        total = len(pages)
+        for done, page_index in enumerate(sorted(pages), 1):
+            self._letter_page(page_index, pages[page_index], create_pages, summary)
+            if progress and progress(done, total) is False:
+                summary['cancelled'] = True
+                break
+
+        summary['seconds'] = time.perf_counter() - start
+        logger.info(
+            f"Lettered {summary['placed']} lines on {total} pages in "
+            f"{summary['seconds']:.1f}s ({len(summary['unplaced'])} not placed)"
+        )
+        return summary
+
+    def _letter_page(
+        self,
+        page_index: int,
+        entries: List[Dict[str, Any]],
+        create_pages: bool,
+        summary: Dict[str, Any]
+    ) -> None:
+        """Create the bubbles of one page, refreshing its document once."""
+        project = self.project_manager.current_project
+        while create_pages and len(project['pages']) <= page_index:
+            if not self.project_manager.add_page():
+                break
+        page = self.project_manager.get_page(page_index)
+        doc = self.project_manager.get_page_document(page_index) if page else None
+        page_layer = doc.nodeByUniqueID(page.get('layer_id')) if doc else None
+        if not page_layer:
+            for entry in entries:
+                self._unplaced(summary, entry, f"page {page_index + 1} does not exist")
+            return
+
+        settings = project['settings']
+        page_bounds = {'x': 0, 'y': 0,
+                       'width': settings['page_width'], 'height': settings['page_height']}
+        panels: Dict[Any, Dict[str, Any]] = {}
+        lettering = None
+        for entry in entries:
+            panel_index = entry['panel']
+            if panel_index is None or not page['panels']:
+                bounds = page_bounds
+            elif 0 <= panel_index < len(page['panels']):
+                bounds = page['panels'][panel_index]['bounds']
+            else:
+                self._unplaced(summary, entry,
+                               f"panel {panel_index + 1} does not exist on page {page_index + 1}")
+                continue
+
+            # Bubbles stack downwards from the top of their panel
+            key = None if bounds is page_bounds else panel_index
+            state = panels.setdefault(key, {'y': None, 'speakers': []})
+            bubble_data, reason = self._place(entry, bounds, state)
+            if bubble_data is None:
+                self._unplaced(summary, entry, reason)
+                continue
+
+            if lettering is None:
+                lettering = self._lettering_group(doc, page_layer)
+            bubble_layer = self.bubble_manager.create_bubble(doc, lettering, bubble_data)
+            bubble_layer.setName(f"Bubble - {entry['speaker']}")
+            self.bubble_manager.add_text_to_bubble(doc, lettering, entry['text'], bubble_data)
+            summary['placed'] += 1
+
+        doc.refreshProjection()
+
+    def _place(
+        self,
+        entry: Dict[str, Any],
+        bounds: Dict[str, Any],
+        state: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Size the bubble of a line and find its place in the panel.
+
+        Returns:
+            (bubble data for SpeechBubbleManager, None), or (None, reason)
+            if the line cannot be placed
+        """
+        margin = min(bounds['width'], bounds['height']) * 0.04
+        narration = entry['style'] == 'narration'
+        width = bounds['width'] * (min(1.0, self.bubble_width * 1.4) if narration else self.bubble_width)
+        width = min(width, bounds['width'] - 2 * margin)
+        if width <= 0:
+            return None, "the panel is too narrow for a bubble"
+
+        speakers = state['speakers']
+        if not narration and entry['speaker'] not in speakers:
+            speakers.append(entry['speaker'])
+        right = not narration and speakers.index(entry['speaker']) % 2 == 1
+        x = bounds['x'] + bounds['width'] - margin - width if right else bounds['x'] + margin
+        y = bounds['y'] + margin if state['y'] is None else state['y']
+
+        bubble_data = {
+            'style': entry['style'],
+            'x': x,
+            'y': y,
+            'width': width,
+            'font_family': self.font_family,
+            'font_size': self.font_size,
+            'min_font_size': self.font_size,
+            'tail': not narration,
+        }
+
+        # Start from the lines the text needs in a box and grow to fit the shape
+        metrics = font_metrics(self.font_family, self.font_size)
+        padding = min(width, metrics.line_spacing * 2) / 10
+        text_width = sum(metrics.width(word) for word in entry['text'].split())
+        text_width += metrics.space * max(0, len(entry['text'].split()) - 1)
+        lines = max(1, math.ceil(text_width / max(1.0, width * 0.75 - 2 * padding)))
+        height = lines * metrics.line_spacing / 0.75 + 2 * padding
+        bottom = bounds['y'] + bounds['height'] - margin
+        for _ in range(8):
+            if y + height > bottom:
+                return None, "no room left in the panel"
+            bubble_data['height'] = height
+            if self.bubble_manager.layout_bubble_text(entry['text'], bubble_data).fits:
+                break
+            height += metrics.line_spacing
+        else:
+            return None, f"text does not fit a bubble at {self.font_size}px"
+
+        # Leave room for the tail below a speech bubble
+        tail = 0 if narration else 30
+        state['y'] = y + height + tail + margin
+        if tail:
+            bubble_data['tail_x'] = x + width / 2
+            bubble_data['tail_y'] = y + height + tail
+        return bubble_data, None
+
+    def _lettering_group(self, doc, page_layer):
+        """Find or create the page's lettering group, on top of the page."""
+        for child in page_layer.childNodes():
+            if child.name() == LETTERING_GROUP and child.type() == 'grouplayer':
+                return child
+        group = doc.createGroupLayer(LETTERING_GROUP)
+        page_layer.addChildNode(group, None)
+        return group
+
+    def _unplaced(self, summary: Dict[str, Any], entry: Dict[str, Any], reason: str) -> None:
+        """Report a line that could not be lettered."""
+        logger.warning(f"Script line {entry['line']} not placed: {reason}")
+        summary['unplaced'].append(dict(entry, reason=reason))
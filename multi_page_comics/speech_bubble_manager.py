@@ -1,7 +1,11 @@
 from typing import Dict, Any, Optional
-from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtCore import Qt, QPointF, QRectF
 from PyQt5.QtGui import QPainterPath, QColor, QFont
 import math
+from .text_layout import (
+    DEFAULT_FONT, DEFAULT_MAX_SIZE, DEFAULT_MIN_SIZE, TextLayout,
+    bubble_shape, fit_text, layout_to_svg, path_to_svg
+)
 
 
 class SpeechBubbleManager:
@@ -17,45 +21,61 @@ class SpeechBubbleManager:
             'standard': {'name': 'Standard', 'style': 'rounded'},
             'thought': {'name': 'Thought', 'style': 'cloud'},
             'shout': {'name': 'Shout', 'style': 'jagged'},
-            'whisper': {'name': 'Whisper', 'style': 'rounded'},
+            'whisper': {'name': 'Whisper', 'style': 'rounded', 'dashed': True},
             'radio': {'name': 'Radio', 'style': 'rounded'},
             'narration': {'name': 'Narration', 'style': 'rectangle'}
         }
 
     def create_bubble(self, doc, layer, bubble_data: Dict[str, Any]):
-        """Create a speech bubble vector layer and return it.
-
-        This is a minimal implementation: it creates a vector layer and
-        computes a QPainterPath for the requested style. Integrating the
-        path into Krita's vector objects requires Krita API calls and is
-        left as TODO comments where appropriate.
+        """Create a vector layer with the bubble outline and return it.
+
+        With 'tail' set, the tail points at 'tail_x'/'tail_y' (default
+        30 pixels below the bubble) and is merged into the outline, so
+        bubble and tail share one fill and one border. 'tail_style' is
+        'curved', 'sharp' or 'bubble' (thought bubbles default to the
+        latter); 'fill_color', 'border_color' and 'border_width'
+        override the defaults.
         """
-        style = bubble_data.get('style', 'standard')
-        preset = self.bubble_presets.get(style, self.bubble_presets['standard'])
-
-        bounds = QRectF(
-            bubble_data.get('x', 0),
-            bubble_data.get('y', 0),
-            bubble_data.get('width', 200),
-            bubble_data.get('height', 100)
-        )
+        preset = self._preset(bubble_data)
+        bounds = self._bounds(bubble_data)
+        path = self.bubble_path(bubble_data)
 
-        path = self._create_bubble_shape(preset['style'], bounds)
+        if bubble_data.get('tail'):
+            tail_point = QPointF(bubble_data.get('tail_x', bounds.center().x()),
+                                 bubble_data.get('tail_y', bounds.bottom() + 30))
+            default_tail = 'bubble' if preset['style'] == 'cloud' else 'curved'
+            tail_path = self._create_tail(bounds, tail_point, bubble_data.get('tail_style', default_tail))
+            path = path.united(tail_path)
 
-        # Create vector layer (placeholder - real usage should add path to vector layer)
         bubble_layer = doc.createVectorLayer(f"Bubble - {preset['name']}")
         layer.addChildNode(bubble_layer, None)
+        bubble_layer.addShapesFromSvg(path_to_svg(
+            path.simplified(),
+            doc.width(),
+            doc.height(),
+            doc.resolution(),
+            bubble_data.get('fill_color', self.default_bg_color.name()),
+            bubble_data.get('border_color', self.default_border_color.name()),
+            bubble_data.get('border_width', self.default_border_width),
+            preset.get('dashed', False)
+        ))
+        return bubble_layer
 
-        # TODO: convert QPainterPath into Krita vector shape on bubble_layer
+    def bubble_path(self, bubble_data: Dict[str, Any]) -> QPainterPath:
+        """Return the outline of a bubble, without tail."""
+        return self._create_bubble_shape(self._preset(bubble_data)['style'], self._bounds(bubble_data))
 
-        # Optionally create tail
-        if bubble_data.get('tail'):
-            tail_point = QPointF(bubble_data.get('tail_x', bounds.center().x()),
-                                 bubble_data.get('tail_y', bounds.bottom() + 30))
-            tail_path = self._create_tail(bounds, tail_point, bubble_data.get('tail_style', 'curved'))
-            # TODO: add tail_path to bubble_layer vector content
+    def _preset(self, bubble_data: Dict[str, Any]) -> Dict[str, Any]:
+        style = bubble_data.get('style', 'standard')
+        return self.bubble_presets.get(style, self.bubble_presets['standard'])
 
-        return bubble_layer
+    def _bounds(self, bubble_data: Dict[str, Any]) -> QRectF:
+        return QRectF(
+            bubble_data.get('x', 0),
+            bubble_data.get('y', 0),
+            bubble_data.get('width', 200),
+            bubble_data.get('height', 100)
+        )
 
     def _create_bubble_shape(self, style: str, bounds: QRectF) -> QPainterPath:
         """Return a QPainterPath for the requested bubble style."""
@@ -72,6 +92,8 @@ class SpeechBubbleManager:
 
     def _create_cloud_shape(self, bounds: QRectF) -> QPainterPath:
         path = QPainterPath()
+        # Overlapping bumps fill as one area, not alternating holes
+        path.setFillRule(Qt.WindingFill)
         center = bounds.center()
         radius = min(bounds.width(), bounds.height()) / 4
         bumps = 8
@@ -81,6 +103,8 @@ class SpeechBubbleManager:
             bump_x = center.x() + (bounds.width() / 2 - radius) * math.cos(angle)
             bump_y = center.y() + (bounds.height() / 2 - radius) * math.sin(angle)
             path.addEllipse(QPointF(bump_x, bump_y), radius, radius)
+        # fill the body inside the ring of bumps
+        path.addEllipse(center, bounds.width() / 2 - radius, bounds.height() / 2 - radius)
         return path
 
     def _create_jagged_shape(self, bounds: QRectF) -> QPainterPath:
@@ -112,27 +136,91 @@ class SpeechBubbleManager:
         return path
 
     def _create_tail(self, bubble_bounds: QRectF, tail_point: QPointF, style: str = 'curved') -> QPainterPath:
-        """Create a simple tail path attached to bubble_bounds pointing to tail_point."""
+        """Create a closed tail from inside bubble_bounds to tail_point.
+
+        The tail starts at the bubble center, so merged with the bubble
+        outline only the part outside the bubble remains.
+        """
         path = QPainterPath()
         start = bubble_bounds.center()
+        dx, dy = tail_point.x() - start.x(), tail_point.y() - start.y()
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return path
+        # Half the tail base, across the direction of the tail
+        half = min(bubble_bounds.width(), bubble_bounds.height()) / 8
+        nx, ny = -dy / length * half, dx / length * half
+        left = QPointF(start.x() + nx, start.y() + ny)
+        right = QPointF(start.x() - nx, start.y() - ny)
         if style == 'curved':
-            control = QPointF((start.x() + tail_point.x()) / 2, (start.y() + tail_point.y()) / 2)
-            path.moveTo(start)
-            path.quadTo(control, tail_point)
+            # Both sides bend the same way, like a brush-drawn tail
+            bend = QPointF(nx * 0.8, ny * 0.8)
+            middle = QPointF((start.x() + tail_point.x()) / 2, (start.y() + tail_point.y()) / 2)
+            path.moveTo(left)
+            path.quadTo(middle + bend, tail_point)
+            path.quadTo(middle + bend * 0.2, right)
+            path.closeSubpath()
         elif style == 'sharp':
-            path.moveTo(bubble_bounds.bottomRight())
+            path.moveTo(left)
             path.lineTo(tail_point)
-            path.lineTo(bubble_bounds.bottomLeft())
+            path.lineTo(right)
             path.closeSubpath()
         else:
-            # bubble style
-            path.addEllipse(tail_point, 8, 8)
+            # Thought bubble trail: shrinking circles from the bubble edge
+            # towards the point
+            edge = min(bubble_bounds.width() / 2 / abs(dx) if dx else math.inf,
+                       bubble_bounds.height() / 2 / abs(dy) if dy else math.inf)
+            edge = min(edge, 1.0)
+            radius = half
+            for step in (0.25, 0.6, 0.9):
+                t = edge + (1 - edge) * step
+                path.addEllipse(QPointF(start.x() + dx * t, start.y() + dy * t), radius, radius)
+                radius *= 0.6
         return path
 
+    def layout_bubble_text(self, text: str, bubble_data: Dict[str, Any]) -> TextLayout:
+        """Wrap text to the bubble outline at the largest size that fits.
+
+        Optional bubble_data keys: 'font_family', 'font_size' (largest
+        pixel size), 'min_font_size', 'bold', 'italic', 'line_spacing'
+        and 'padding' (distance from the outline, default 10% of the
+        smaller bubble side). Shapes and layouts are cached, so laying
+        out unchanged bubbles again is cheap.
+        """
+        preset = self._preset(bubble_data)
+        bounds = self._bounds(bubble_data)
+        padding = bubble_data.get('padding', min(bounds.width(), bounds.height()) / 10)
+        key = (preset['style'], bounds.x(), bounds.y(), bounds.width(), bounds.height())
+        shape = bubble_shape(self._create_bubble_shape(preset['style'], bounds), padding, key)
+        return fit_text(
+            text,
+            shape,
+            bubble_data.get('font_family', DEFAULT_FONT),
+            bubble_data.get('font_size', DEFAULT_MAX_SIZE),
+            bubble_data.get('min_font_size', DEFAULT_MIN_SIZE),
+            bubble_data.get('bold', False),
+            bubble_data.get('italic', False),
+            bubble_data.get('line_spacing', 1.0)
+        )
+
     def add_text_to_bubble(self, doc, bubble_layer, text: str, bubble_data: Dict[str, Any]):
-        """Create a placeholder text layer for the bubble and return it."""
-        # Minimal placeholder implementation
+        """Create a vector layer with the text wrapped to the bubble and return it.
+
+        See layout_bubble_text for the layout options; 'text_color'
+        overrides the default text color.
+        """
+        layout = self.layout_bubble_text(text, bubble_data)
         text_layer = doc.createVectorLayer(f"Bubble Text - {text[:20]}")
         bubble_layer.addChildNode(text_layer, None)
-        # TODO: integrate with Krita text API to set text and layout
+        if layout.lines:
+            text_layer.addShapesFromSvg(layout_to_svg(
+                layout,
+                doc.width(),
+                doc.height(),
+                doc.resolution(),
+                bubble_data.get('font_family', DEFAULT_FONT),
+                bubble_data.get('text_color', self.default_text_color.name()),
+                bubble_data.get('bold', False),
+                bubble_data.get('italic', False)
+            ))
         return text_layer
@@ -1,17 +1,47 @@
 import json
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from .template_pack import PACK_SUFFIX, build_pack_from_directory, open_pack
+from .utils.geometry import polygon_bounds
 
 
 logger = logging.getLogger(__name__)
 
 
+def add_polygon_bounds(template: Dict[str, Any]) -> None:
+    """Fill in x/y/width/height of polygon panels from their points.
+
+    Code that only handles rectangles (editors, detection, hit tests)
+    then sees the polygon's bounding box.
+
+    Args:
+        template: Template dictionary, updated in place
+    """
+    for panel in template.get('panels', []):
+        if panel.get('points'):
+            x, y, width, height = polygon_bounds(panel['points'])
+            panel.update({'x': x, 'y': y, 'width': width, 'height': height})
+
+
+def user_template_dir() -> Path:
+    """Directory holding user templates and template packs."""
+    return Path.home() / '.krita' / 'comic_creator' / 'templates'
+
+
 class TemplateManager:
-    """Manages panel layout templates."""
+    """Manages panel layout templates.
+
+    Templates from packs (*.cctpack in the user template directory) are
+    only indexed when the manager is created; each is decoded the first
+    time it is requested.
+    """
 
     def __init__(self):
         self.templates: Dict[str, Dict[str, Any]] = {}
+        # Packed templates not decoded yet, by id
+        self._packed: Dict[str, Any] = {}
         self.load_default_templates()
 
     def load_default_templates(self) -> None:
@@ -100,20 +130,77 @@ class TemplateManager:
             ]
         }
 
+        # Angled and irregular layouts (polygon panels)
+        self.templates['diagonal'] = {
+            'id': 'diagonal',
+            'name': 'Diagonal Tiers',
+            'category': 'action',
+            'region': 'western',
+            'panels': [
+                {'points': [[0, 0], [100, 0], [100, 36], [0, 30]]},
+                {'points': [[0, 30], [55, 33.3], [45, 63.3], [0, 66]]},
+                {'points': [[55, 33.3], [100, 36], [100, 60], [45, 63.3]]},
+                {'points': [[0, 66], [100, 60], [100, 100], [0, 100]]},
+            ]
+        }
+
+        self.templates['l-shape'] = {
+            'id': 'l-shape',
+            'name': 'L-Shape',
+            'category': 'standard',
+            'region': 'universal',
+            'panels': [
+                {'points': [[0, 0], [100, 0], [100, 55], [55, 55], [55, 100], [0, 100]]},
+                {'x': 55, 'y': 55, 'width': 45, 'height': 22.5},
+                {'x': 55, 'y': 77.5, 'width': 45, 'height': 22.5},
+            ]
+        }
+
         # Load user templates if they exist
         self.load_user_templates()
 
+        for template in self.templates.values():
+            add_polygon_bounds(template)
+
     def load_user_templates(self) -> None:
-        """Load user-created templates."""
-        user_template_path = Path.home() / '.krita' / 'comic_creator' / 'templates'
-        if user_template_path.exists():
-            for template_file in user_template_path.glob('*.json'):
-                try:
-                    with open(template_file, 'r') as f:
-                        template = json.load(f)
-                        self.templates[template['id']] = template
-                except Exception as e:
-                    logger.error(f"Error loading template {template_file}: {e}")
+        """Load user-created templates.
+
+        Packs are indexed without decoding their templates. Loose JSON
+        files are read unless the template is packed and the file is not
+        newer than the pack, so a rebuilt pack replaces reading them.
+        """
+        user_template_path = user_template_dir()
+        if not user_template_path.exists():
+            return
+
+        pack_time = {}
+        for pack_file in sorted(user_template_path.glob('*' + PACK_SUFFIX)):
+            pack = open_pack(str(pack_file))
+            if pack is None:
+                continue
+            mtime = pack_file.stat().st_mtime
+            for template_id in pack.entries:
+                self.templates.pop(template_id, None)
+                self._packed[template_id] = pack
+                pack_time[template_id] = mtime
+
+        # DirEntry.stat() comes with the listing on Windows, so packed
+        # files are skipped without touching them
+        with os.scandir(user_template_path) as entries:
+            json_files = [(entry.name[:-5], entry) for entry in entries
+                          if entry.name.endswith('.json')]
+        for template_id, entry in json_files:
+            packed_at = pack_time.get(template_id)
+            if packed_at is not None and entry.stat().st_mtime <= packed_at:
+                continue
+            template_file = Path(entry.path)
+            try:
+                with open(template_file, 'r') as f:
+                    template = json.load(f)
+                    self.templates[template['id']] = template
+                    self._packed.pop(template['id'], None)
+            except Exception as e:
+                logger.error(f"Error loading template {template_file}: {e}")
 
     def get_template(self, template_id: str) -> Optional[Dict[str, Any]]:
         """Get template by ID.
@@ -124,7 +211,73 @@ class TemplateManager:
         Returns:
             Template dictionary or None if not found
         """
-        return self.templates.get(template_id)
+        template = self.templates.get(template_id)
+        if template is None and template_id in self._packed:
+            template = self._decode(template_id)
+        return template
+
+    def list_templates(self) -> List[Dict[str, Any]]:
+        """List templates without decoding packed ones.
+
+        Returns:
+            Summaries with 'id', 'name', 'category', 'region' and
+            'panel_count'
+        """
+        summaries = [{
+            'id': t.get('id'),
+            'name': t.get('name'),
+            'category': t.get('category'),
+            'region': t.get('region'),
+            'panel_count': len(t.get('panels', [])),
+        } for t in self.templates.values()]
+        for template_id, pack in self._packed.items():
+            entry = pack.entries[template_id]
+            summaries.append({key: entry.get(key) for key in
+                              ('id', 'name', 'category', 'region', 'panel_count')})
+        return summaries
+
+    def rebuild_template_pack(
+        self,
+        directory: Optional[str] = None,
+        pack_path: Optional[str] = None
+    ) -> int:
+        """Pack a directory of template JSON files and load the pack.
+
+        Args:
+            directory: Directory with *.json templates, defaults to the
+                user template directory
+            pack_path: Pack file, defaults to library.cctpack in the user
+                template directory
+
+        Returns:
+            Number of templates packed
+        """
+        user_template_path = user_template_dir()
+        user_template_path.mkdir(parents=True, exist_ok=True)
+        if directory is None:
+            directory = str(user_template_path)
+        if pack_path is None:
+            pack_path = str(user_template_path / ('library' + PACK_SUFFIX))
+
+        count = build_pack_from_directory(directory, pack_path)
+        self._packed.clear()
+        self.load_user_templates()
+        return count
+
+    def _decode(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """Decode a packed template and keep it with the loaded ones."""
+        pack = self._packed.pop(template_id)
+        try:
+            template = pack.load(template_id)
+        except ValueError:
+            # The pack was replaced on disk and its old mapping closed
+            pack = open_pack(pack.path)
+            template = pack.load(template_id) if pack else None
+        if template is None:
+            return None
+        add_polygon_bounds(template)
+        self.templates[template_id] = template
+        return template
 
     def get_templates_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get all templates in category.
@@ -135,6 +288,9 @@ class TemplateManager:
         Returns:
             List of templates in category
         """
+        for template_id, pack in list(self._packed.items()):
+            if pack.entries[template_id].get('category') == category:
+                self._decode(template_id)
         return [t for t in self.templates.values() if t.get('category') == category]
 
     def save_template(self, template_data: Dict[str, Any]) -> bool:
@@ -150,10 +306,12 @@ class TemplateManager:
         if not template_id:
             return False
 
+        add_polygon_bounds(template_data)
         self.templates[template_id] = template_data
+        self._packed.pop(template_id, None)
 
-        # Save to file
-        user_template_path = Path.home() / '.krita' / 'comic_creator' / 'templates'
+        # Save to file, newer than any pack holding the template
+        user_template_path = user_template_dir()
         user_template_path.mkdir(parents=True, exist_ok=True)
 
         template_file = user_template_path / f"{template_id}.json"
@@ -165,6 +323,9 @@ class TemplateManager:
     def delete_template(self, template_id: str) -> bool:
         """Delete user template.
 
+        A template that is also in a pack comes back from the pack when
+        templates are loaded again, until the pack is rebuilt.
+
         Args:
             template_id: Template identifier
 
@@ -173,8 +334,9 @@ class TemplateManager:
         """
         if template_id in self.templates:
             del self.templates[template_id]
+        self._packed.pop(template_id, None)
 
-        template_file = Path.home() / '.krita' / 'comic_creator' / 'templates' / f"{template_id}.json"
+        template_file = user_template_dir() / f"{template_id}.json"
         if template_file.exists():
             template_file.unlink()
             return True
@@ -183,7 +345,12 @@ class TemplateManager:
     def get_all_templates(self) -> List[Dict[str, Any]]:
         """Get all available templates.
 
+        Decodes every packed template; use list_templates to only list
+        them.
+
         Returns:
             List of all templates
         """
+        for template_id in list(self._packed):
+            self._decode(template_id)
         return list(self.templates.values())
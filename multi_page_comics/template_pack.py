@@ -0,0 +1,235 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+
+PACK_SUFFIX = '.cctpack'
+PACK_MAGIC = b'CCTPACK\x00'
+PACK_VERSION = 1
+
+# magic, version, index length; the index and the records follow
+_HEADER = struct.Struct('<8sII')
+
+# Index fields copied from each template, enough to list and filter
+# templates without decoding them
+SUMMARY_FIELDS = ('id', 'name', 'category', 'region')
+
+
+class TemplatePackError(Exception):
+    """Raised when a template pack cannot be read."""
+
+
+class TemplatePack:
+    """Read-only, memory-mapped template pack.
+
+    A pack is one file: a fixed header, a JSON index with a summary of
+    every template (id, name, category, region, panel count) and the
+    byte range of its record, then the records themselves as compact
+    JSON. Opening a pack maps the file and parses only the index;
+    records are decoded one at a time by load().
+    """
+
+    def __init__(self, path: str):
+        """Open and index a pack.
+
+        Args:
+            path: Pack file
+
+        Raises:
+            TemplatePackError: If the file is not a valid pack
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._file.close()
+            raise TemplatePackError(f"Empty template pack {path}")
+        try:
+            self.entries = self._read_index()
+        except TemplatePackError:
+            self.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        """Parse the header and index."""
+        if len(self._map) < _HEADER.size:
+            raise TemplatePackError(f"Truncated template pack {self.path}")
+        magic, version, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise TemplatePackError(f"Not a template pack: {self.path}")
+
+        self._data_start = _HEADER.size + index_length
+        if self._data_start > len(self._map):
+            raise TemplatePackError(f"Truncated template pack {self.path}")
+        try:
+            index = json.loads(self._map[_HEADER.size:self._data_start])
+        except ValueError as e:
+            raise TemplatePackError(f"Corrupt template pack index {self.path}: {e}")
+
+        entries = {}
+        for entry in index:
+            end = self._data_start + entry['offset'] + entry['length']
+            if end > len(self._map):
+                raise TemplatePackError(f"Truncated template pack {self.path}")
+            entries[entry['id']] = entry
+        return entries
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Get the index summaries of all templates, in pack order."""
+        return list(self.entries.values())
+
+    def load(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """Decode one template.
+
+        Args:
+            template_id: Template identifier
+
+        Returns:
+            Template dictionary or None if not in the pack
+        """
+        entry = self.entries.get(template_id)
+        if entry is None:
+            return None
+        start = self._data_start + entry['offset']
+        return json.loads(self._map[start:start + entry['length']])
+
+    def close(self) -> None:
+        """Unmap and close the pack file."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_pack(path: str, templates: Iterable[Dict[str, Any]]) -> int:
+    """Write templates into a pack file.
+
+    The pack is written to a temporary file and renamed into place.
+    Later templates with an id already written replace the earlier one.
+
+    Args:
+        path: Pack file to write
+        templates: Template dictionaries, each with an 'id'
+
+    Returns:
+        Number of templates written
+    """
+    records: Dict[str, bytes] = {}
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for template in templates:
+        template_id = template['id']
+        records[template_id] = json.dumps(template, separators=(',', ':')).encode('utf-8')
+        summary = {field: template.get(field) for field in SUMMARY_FIELDS}
+        summary['panel_count'] = len(template.get('panels', []))
+        summaries[template_id] = summary
+
+    index = []
+    offset = 0
+    for template_id, record in records.items():
+        entry = summaries[template_id]
+        entry['offset'] = offset
+        entry['length'] = len(record)
+        index.append(entry)
+        offset += len(record)
+    index_data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_data)))
+        f.write(index_data)
+        for record in records.values():
+            f.write(record)
+    # Mapped packs must be closed before they can be replaced on Windows
+    _forget(path)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def build_pack_from_directory(directory: str, path: str) -> int:
+    """Pack every template JSON file of a directory.
+
+    Files that cannot be read or have no id are skipped with an error
+    logged.
+
+    Args:
+        directory: Directory with *.json template files
+        path: Pack file to write
+
+    Returns:
+        Number of templates written
+    """
+    def templates():
+        for template_file in sorted(Path(directory).glob('*.json')):
+            try:
+                with open(template_file, 'r', encoding='utf-8') as f:
+                    template = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading template {template_file}: {e}")
+                continue
+            if not isinstance(template, dict) or not template.get('id'):
+                logger.error(f"Template {template_file} has no id")
+                continue
+            yield template
+
+    return write_pack(path, templates())
+
+
+_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+
+def open_pack(path: str) -> Optional[TemplatePack]:
+    """Open a pack, reusing an already open one while the file is unchanged.
+
+    Template managers are created per operation, so the mapping and the
+    parsed index are shared between them.
+
+    Args:
+        path: Pack file
+
+    Returns:
+        TemplatePack or None if the file cannot be read as a pack
+    """
+    key = os.path.abspath(path)
+    try:
+        stat = os.stat(key)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        try:
+            pack = TemplatePack(key)
+        except (OSError, TemplatePackError) as e:
+            logger.error(f"Error loading template pack {path}: {e}")
+            return None
+        if cached:
+            # Managers still holding the old pack keep their decoded templates
+            cached[1].close()
+        _cache[key] = (signature, pack)
+        return pack
+
+
+def _forget(path: str) -> None:
+    """Close the cached mapping of a pack that is about to be replaced."""
+    with _cache_lock:
+        cached = _cache.pop(os.path.abspath(path), None)
+    if cached:
+        cached[1].close()
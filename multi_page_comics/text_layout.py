@@ -0,0 +1,478 @@
+import math
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple, Hashable
+from xml.sax.saxutils import escape, quoteattr
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QFontMetricsF, QPainterPath
+
+
+DEFAULT_FONT = 'Arial'
+
+# Range of pixel sizes tried when fitting text
+DEFAULT_MAX_SIZE = 36
+DEFAULT_MIN_SIZE = 8
+
+# Rows sampled per bubble at most; taller bubbles are sampled coarser
+MAX_SHAPE_ROWS = 512
+
+
+class FontMetrics:
+    """Measurements of one font at one pixel size, cached per glyph.
+
+    Word widths are the sum of the glyph advances, so kerning is
+    ignored; the difference is well below the padding of a bubble.
+    """
+
+    # Measured words kept per font, enough for a long dialogue script
+    WORD_CACHE_SIZE = 4096
+
+    def __init__(self, family: str, pixel_size: int, bold: bool = False, italic: bool = False):
+        font = QFont(family)
+        font.setPixelSize(pixel_size)
+        font.setBold(bold)
+        font.setItalic(italic)
+        self._metrics = QFontMetricsF(font)
+        # horizontalAdvance is Qt 5.11+, older versions only have width
+        self._advance = getattr(self._metrics, 'horizontalAdvance', self._metrics.width)
+
+        self.pixel_size = pixel_size
+        self.ascent = self._metrics.ascent()
+        self.descent = self._metrics.descent()
+        self.line_spacing = self._metrics.lineSpacing()
+        self._glyphs: Dict[str, float] = {}
+        self._words: Dict[str, float] = {}
+        self.space = self.glyph(' ')
+
+    def glyph(self, char: str) -> float:
+        """Advance of one character."""
+        advance = self._glyphs.get(char)
+        if advance is None:
+            advance = self._glyphs[char] = self._advance(char)
+        return advance
+
+    def width(self, word: str) -> float:
+        """Advance of a word."""
+        width = self._words.get(word)
+        if width is None:
+            glyphs = self._glyphs
+            width = 0.0
+            for char in word:
+                advance = glyphs.get(char)
+                if advance is None:
+                    advance = self.glyph(char)
+                width += advance
+            if len(self._words) >= self.WORD_CACHE_SIZE:
+                self._words.clear()
+            self._words[word] = width
+        return width
+
+
+_fonts: OrderedDict = OrderedDict()
+_FONT_CACHE_SIZE = 64
+
+
+def font_metrics(family: str, pixel_size: int, bold: bool = False, italic: bool = False) -> FontMetrics:
+    """Get the shared, cached metrics of a font at a pixel size."""
+    key = (family, pixel_size, bold, italic)
+    metrics = _fonts.get(key)
+    if metrics is None:
+        metrics = _fonts[key] = FontMetrics(family, pixel_size, bold, italic)
+        while len(_fonts) > _FONT_CACHE_SIZE:
+            _fonts.popitem(last=False)
+    else:
+        _fonts.move_to_end(key)
+    return metrics
+
+
+class BubbleShape:
+    """Horizontal extent of a bubble path, sampled row by row.
+
+    For every sampled row the widest inside span of the path (even-odd
+    rule) is stored, so the room for a line of text is the overlap of
+    the spans of the rows it covers, found without touching the path
+    again.
+    """
+
+    def __init__(self, path: QPainterPath, padding: float = 0.0, key: Hashable = None):
+        """Sample a path.
+
+        Args:
+            path: Bubble outline in document pixels
+            padding: Minimum distance of text from the outline
+            key: Identifies the shape for layout caching, None to not
+                cache layouts in it
+        """
+        self.key = key
+        self.padding = padding
+        rect = path.boundingRect()
+        self.top = rect.top()
+        self.bottom = rect.bottom()
+        self.center_y = rect.center().y()
+
+        # Overlapping subpaths (cloud bubbles) are merged into one outline
+        merged = QPainterPath(path)
+        merged.setFillRule(Qt.WindingFill)
+        edges = []
+        for polygon in merged.simplified().toFillPolygons():
+            points = [(p.x(), p.y()) for p in polygon]
+            for a, b in zip(points, points[1:] + points[:1]):
+                if a[1] != b[1]:
+                    if a[1] > b[1]:
+                        a, b = b, a
+                    edges.append((a[1], b[1], a[0], (b[0] - a[0]) / (b[1] - a[1])))
+        edges.sort()
+
+        rows = max(2, min(MAX_SHAPE_ROWS, int(math.ceil(rect.height())) + 1))
+        self.step = rect.height() / (rows - 1) if rect.height() > 0 else 1.0
+        self.lefts: List[float] = []
+        self.rights: List[float] = []
+        active = []
+        next_edge = 0
+        for row in range(rows):
+            y = self.top + row * self.step
+            # Nudge the sample off the bounding lines, which only touch the outline
+            y = min(max(y, self.top + 1e-6), self.bottom - 1e-6)
+            while next_edge < len(edges) and edges[next_edge][0] <= y:
+                active.append(edges[next_edge])
+                next_edge += 1
+            active = [edge for edge in active if edge[1] > y]
+            hits = sorted(x + (y - y0) * slope for y0, _, x, slope in active)
+            left, right = math.inf, -math.inf
+            for start, end in zip(hits[0::2], hits[1::2]):
+                if end - start > right - left:
+                    left, right = start, end
+            self.lefts.append(left)
+            self.rights.append(right)
+
+    def span(self, y0: float, y1: float) -> Optional[Tuple[float, float]]:
+        """Room for a line of text between y0 and y1.
+
+        Returns:
+            (left, right) of the padded span or None if there is no room
+        """
+        pad = self.padding
+        first = int(math.floor((y0 - pad - self.top) / self.step))
+        last = int(math.ceil((y1 + pad - self.top) / self.step))
+        if first < 0 or last >= len(self.lefts):
+            return None
+        left = max(self.lefts[first:last + 1]) + pad
+        right = min(self.rights[first:last + 1]) - pad
+        if right <= left:
+            return None
+        return left, right
+
+
+_shapes: OrderedDict = OrderedDict()
+_layouts: OrderedDict = OrderedDict()
+_SHAPE_CACHE_SIZE = 256
+_LAYOUT_CACHE_SIZE = 1024
+
+
+def bubble_shape(path: QPainterPath, padding: float = 0.0, key: Hashable = None) -> BubbleShape:
+    """Get a sampled bubble shape, reusing the one cached under key.
+
+    Args:
+        path: Bubble outline in document pixels
+        padding: Minimum distance of text from the outline
+        key: Hashable description of the path (e.g. style and bounds);
+            without key the shape is sampled every time
+
+    Returns:
+        BubbleShape
+    """
+    if key is None:
+        return BubbleShape(path, padding)
+    key = (key, padding)
+    shape = _shapes.get(key)
+    if shape is None:
+        shape = _shapes[key] = BubbleShape(path, padding, key)
+        while len(_shapes) > _SHAPE_CACHE_SIZE:
+            _shapes.popitem(last=False)
+    else:
+        _shapes.move_to_end(key)
+    return shape
+
+
+class TextLayout:
+    """Text wrapped into a bubble.
+
+    Attributes:
+        font_size: Pixel size of the font
+        lines: (text, center x, baseline y, width) per line
+        fits: Whether all text fit into the bubble
+        overflow: Text that did not fit, empty if fits
+    """
+
+    __slots__ = ('font_size', 'lines', 'fits', 'overflow')
+
+    def __init__(self, font_size: int, lines: List[Tuple[str, float, float, float]],
+                 fits: bool, overflow: str = ''):
+        self.font_size = font_size
+        self.lines = lines
+        self.fits = fits
+        self.overflow = overflow
+
+    def text(self) -> str:
+        """Wrapped text, one line per line."""
+        return '\n'.join(line[0] for line in self.lines)
+
+
+def fit_text(
+    text: str,
+    shape: BubbleShape,
+    family: str = DEFAULT_FONT,
+    max_size: int = DEFAULT_MAX_SIZE,
+    min_size: int = DEFAULT_MIN_SIZE,
+    bold: bool = False,
+    italic: bool = False,
+    line_spacing: float = 1.0
+) -> TextLayout:
+    """Wrap text into a bubble at the largest font size that fits.
+
+    Lines are centered in the room the bubble outline leaves at their
+    height, and the block of lines is centered vertically. Newlines in
+    the text force line breaks.
+
+    Args:
+        text: Text to lay out
+        shape: Sampled bubble shape
+        family: Font family
+        max_size: Largest pixel size to try
+        min_size: Smallest pixel size; text that does not fit at this
+            size is laid out as far as it goes
+        bold: Bold font
+        italic: Italic font
+        line_spacing: Factor applied to the font's line spacing
+
+    Returns:
+        TextLayout
+    """
+    cache_key = None
+    if shape.key is not None:
+        cache_key = (shape.key, text, family, max_size, min_size, bold, italic, line_spacing)
+        layout = _layouts.get(cache_key)
+        if layout is not None:
+            _layouts.move_to_end(cache_key)
+            return layout
+
+    words = _words(text)
+    low, high = min_size, max(min_size, max_size)
+    best = None
+    # Fitting is monotonic in the font size, so bisect for the largest
+    while low <= high:
+        size = (low + high) // 2
+        layout = _layout_at(words, shape, font_metrics(family, size, bold, italic), line_spacing)
+        if layout is not None:
+            best = layout
+            low = size + 1
+        else:
+            high = size - 1
+    if best is None:
+        best = _layout_at(words, shape, font_metrics(family, min_size, bold, italic),
+                          line_spacing, partial=True)
+
+    if cache_key is not None:
+        _layouts[cache_key] = best
+        while len(_layouts) > _LAYOUT_CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return best
+
+
+def _words(text: str) -> List[Optional[str]]:
+    """Split text into words, None marking forced line breaks."""
+    words = []
+    for i, paragraph in enumerate(text.strip().split('\n')):
+        if i:
+            words.append(None)
+        words.extend(paragraph.split())
+    return words
+
+
+def _layout_at(
+    words: List[Optional[str]],
+    shape: BubbleShape,
+    metrics: FontMetrics,
+    line_spacing: float,
+    partial: bool = False
+) -> Optional[TextLayout]:
+    """Lay out words at one font size.
+
+    Tries one line, then two and so on, each time centering the block
+    vertically and filling the lines greedily, until the words fit or
+    the block outgrows the bubble.
+
+    Returns:
+        TextLayout, or None if the words do not fit and partial is off
+    """
+    line_height = metrics.line_spacing * line_spacing
+    max_lines = int((shape.bottom - shape.top) / line_height) if line_height > 0 else 0
+    if not words:
+        return TextLayout(metrics.pixel_size, [], True)
+
+    attempt = None
+    for count in range(1, max_lines + 1):
+        top = shape.center_y - count * line_height / 2
+        attempt = _fill(words, shape, metrics, top, line_height, count)
+        if attempt[1] == len(words):
+            return TextLayout(metrics.pixel_size, attempt[0], True)
+    if not partial:
+        return None
+
+    lines, placed = attempt if attempt else ([], 0)
+    overflow = ' '.join(word if word is not None else '\n' for word in words[placed:])
+    return TextLayout(metrics.pixel_size, lines, False, overflow.replace(' \n ', '\n'))
+
+
+def _fill(words, shape: BubbleShape, metrics: FontMetrics, top: float,
+          line_height: float, count: int):
+    """Greedily fill count lines from top.
+
+    Returns:
+        (lines, number of words placed)
+    """
+    lines = []
+    i = 0
+    space = metrics.space
+    # Glyphs sit centered in the line box
+    baseline = (line_height - metrics.ascent - metrics.descent) / 2 + metrics.ascent
+    for row in range(count):
+        if i < len(words) and words[i] is None:
+            i += 1
+        y = top + row * line_height
+        room = shape.span(y, y + line_height)
+        if room is None:
+            continue
+        available = room[1] - room[0]
+        line_words = []
+        width = 0.0
+        while i < len(words) and words[i] is not None:
+            word_width = metrics.width(words[i])
+            needed = word_width + (space if line_words else 0.0)
+            if width + needed > available:
+                break
+            line_words.append(words[i])
+            width += needed
+            i += 1
+        if line_words:
+            lines.append((' '.join(line_words), (room[0] + room[1]) / 2, y + baseline, width))
+        if i == len(words):
+            break
+    return lines, i
+
+
+def layout_to_svg(
+    layout: TextLayout,
+    width: float,
+    height: float,
+    resolution: float = 72.0,
+    family: str = DEFAULT_FONT,
+    color: str = '#000000',
+    bold: bool = False,
+    italic: bool = False
+) -> str:
+    """Render a layout as an SVG document for VectorLayer.addShapesFromSvg.
+
+    Args:
+        layout: Text layout
+        width: Document width in pixels
+        height: Document height in pixels
+        resolution: Document resolution in DPI
+        family: Font family the layout was made with
+        color: Text color
+        bold: Bold font
+        italic: Italic font
+
+    Returns:
+        SVG document
+    """
+    style = (f'font-family={quoteattr(family)} font-size="{layout.font_size}" '
+             f'fill={quoteattr(color)} text-anchor="middle"')
+    if bold:
+        style += ' font-weight="bold"'
+    if italic:
+        style += ' font-style="italic"'
+
+    return _svg_document(width, height, resolution, [
+        f'<text x="{x:.2f}" y="{y:.2f}" {style}>{escape(text)}</text>'
+        for text, x, y, _ in layout.lines
+    ])
+
+
+def path_to_svg(
+    path: QPainterPath,
+    width: float,
+    height: float,
+    resolution: float = 72.0,
+    fill: str = '#ffffff',
+    stroke: str = '#000000',
+    stroke_width: float = 3.0,
+    dashed: bool = False
+) -> str:
+    """Render a closed outline as an SVG document for VectorLayer.addShapesFromSvg.
+
+    Args:
+        path: Outline in document pixels
+        width: Document width in pixels
+        height: Document height in pixels
+        resolution: Document resolution in DPI
+        fill: Fill color
+        stroke: Outline color
+        stroke_width: Outline width in pixels
+        dashed: Dash the outline
+
+    Returns:
+        SVG document
+    """
+    style = (f'fill={quoteattr(fill)} stroke={quoteattr(stroke)} '
+             f'stroke-width="{stroke_width:g}" stroke-linejoin="round"')
+    if dashed:
+        style += f' stroke-dasharray="{stroke_width * 3:g} {stroke_width * 2:g}"'
+    return _svg_document(width, height, resolution, [
+        f'<path d="{_path_data(path)}" {style}/>'
+    ])
+
+
+def _svg_document(width: float, height: float, resolution: float, elements: List[str]) -> str:
+    """Wrap SVG elements given in document pixels.
+
+    Krita reads SVG sizes in points; the view box maps them back to
+    document pixels.
+    """
+    scale = 72.0 / resolution if resolution else 1.0
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" '
+             f'width="{width * scale:.3f}pt" height="{height * scale:.3f}pt" '
+             f'viewBox="0 0 {width:g} {height:g}">']
+    parts.extend(elements)
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def _path_data(path: QPainterPath) -> str:
+    """SVG path data of a QPainterPath made of closed subpaths."""
+    commands = []
+    i, count = 0, path.elementCount()
+    while i < count:
+        element = path.elementAt(i)
+        if element.isMoveTo():
+            if commands:
+                commands.append('Z')
+            commands.append(f'M{element.x:.2f} {element.y:.2f}')
+        elif element.isLineTo():
+            commands.append(f'L{element.x:.2f} {element.y:.2f}')
+        elif element.isCurveTo():
+            # A cubic is the curve element followed by two data elements
+            c2, end = path.elementAt(i + 1), path.elementAt(i + 2)
+            commands.append(f'C{element.x:.2f} {element.y:.2f} '
+                            f'{c2.x:.2f} {c2.y:.2f} {end.x:.2f} {end.y:.2f}')
+            i += 2
+        i += 1
+    if commands:
+        commands.append('Z')
+    return ' '.join(commands)
+
+
+def clear_caches() -> None:
+    """Drop cached fonts, shapes and layouts, e.g. after fonts changed."""
+    _fonts.clear()
+    _shapes.clear()
+    _layouts.clear()
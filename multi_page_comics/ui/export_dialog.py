@@ -7,6 +7,13 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 
 
+# Format names of the dialog mapped to ExportManager format keys
+FORMAT_KEYS = {
+	"PNG": 'png', "JPEG": 'jpg', "PDF": 'pdf',
+	"CBZ": 'cbz', "PSD": 'psd', "Webtoon": 'webtoon'
+}
+
+
 class ExportDialog(QDialog):
 	"""Dialog for exporting comic pages"""
 
@@ -42,7 +49,8 @@ class ExportDialog(QDialog):
 		format_layout = QVBoxLayout()
 
 		self.format_combo = QComboBox()
-		self.format_combo.addItems(["PNG", "JPEG", "PDF", "CBZ", "PSD"])
+		self.format_combo.addItems(list(FORMAT_KEYS))
+		self.current_format = self.format_combo.currentText()
 		self.format_combo.currentTextChanged.connect(self.format_changed)
 		format_layout.addWidget(self.format_combo)
 
@@ -92,12 +100,24 @@ class ExportDialog(QDialog):
 		dpi_layout.addStretch()
 		quality_layout.addLayout(dpi_layout)
 
+		speed_layout = QHBoxLayout()
+		speed_layout.addWidget(QLabel("Compression:"))
+		self.speed_combo = QComboBox()
+		self.speed_combo.addItems(["Fast", "Balanced", "Smallest"])
+		self.speed_combo.setCurrentText("Balanced")
+		speed_layout.addWidget(self.speed_combo)
+		speed_layout.addStretch()
+		quality_layout.addLayout(speed_layout)
+
 		self.flatten_check = QCheckBox("Flatten Layers")
 		quality_layout.addWidget(self.flatten_check)
 
 		self.bleed_check = QCheckBox("Include Bleed Marks")
 		quality_layout.addWidget(self.bleed_check)
 
+		self.resume_check = QCheckBox("Resume Previous Export")
+		quality_layout.addWidget(self.resume_check)
+
 		quality_group.setLayout(quality_layout)
 		layout.addWidget(quality_group)
 
@@ -138,6 +158,15 @@ class ExportDialog(QDialog):
 		else:
 			self.flatten_check.setEnabled(True)
 
+		# Follow the format's default DPI (72 for webtoons) unless the
+		# user picked another one
+		from ..export_manager import ExportManager
+		exporter = ExportManager()
+		previous = exporter.get_default_options(FORMAT_KEYS[self.current_format]).get('dpi', 300)
+		if self.dpi_spin.value() == previous:
+			self.dpi_spin.setValue(exporter.get_default_options(FORMAT_KEYS[format_text]).get('dpi', 300))
+		self.current_format = format_text
+
 	def start_export(self):
 		"""Start export process"""
 		output_path = self.path_input.text()
@@ -149,7 +178,9 @@ class ExportDialog(QDialog):
 		options = {
 			'dpi': self.dpi_spin.value(),
 			'flatten': self.flatten_check.isChecked(),
-			'bleed': self.bleed_check.isChecked()
+			'bleed': self.bleed_check.isChecked(),
+			'speed': self.speed_combo.currentText().lower(),
+			'resume': self.resume_check.isChecked()
 		}
 
 		self.progress.setVisible(True)
@@ -157,12 +188,19 @@ class ExportDialog(QDialog):
 		from ..export_manager import ExportManager
 		exporter = ExportManager()
 
-		success = exporter.export_project(
-			self.project_manager,
-			output_path,
-			format_text,
-			options
-		)
+		if format_text == "webtoon":
+			success = exporter.export_webtoon(
+				self.project_manager,
+				output_path,
+				options
+			)
+		else:
+			success = exporter.export_project(
+				self.project_manager,
+				output_path,
+				format_text,
+				options
+			)
 
 		if success:
 			self.accept()
@@ -0,0 +1,292 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+from krita import Krita
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QTimer
+from PyQt5.QtGui import QIcon, QPixmap
+from ..events import (
+    PAGE_ADDED, PAGE_MOVED, PAGE_REMOVED, PANEL_CHANGED, PROJECT_RESET
+)
+
+
+THUMBNAIL_SIZE = QSize(64, 80)
+
+
+class PageListModel(QAbstractListModel):
+    """List model over the pages of the project.
+
+    The model keeps a list of references to the project's page dicts
+    and formats rows only when the view asks for them, i.e. for visible
+    rows. Project change events are applied as row inserts, removals and
+    moves. Thumbnails are rendered lazily for the rows the view requests,
+    a few per event-loop pass, and kept in a small LRU cache.
+    """
+
+    # Thumbnails rendered per timer pass, keeping the UI responsive
+    THUMBNAILS_PER_PASS = 4
+
+    def __init__(self, project_manager=None, cache_size: int = 128, parent=None):
+        super().__init__(parent)
+        self.project_manager = project_manager
+        self.cache_size = cache_size
+        self._pages: List[Dict[str, Any]] = list(self.project_pages())
+        self._thumbnails: OrderedDict = OrderedDict()
+        self._requested: List[int] = []
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render_thumbnails)
+
+    def project_pages(self) -> List[Dict[str, Any]]:
+        """Pages of the current project, empty without project."""
+        if self.project_manager and self.project_manager.current_project:
+            return self.project_manager.current_project['pages']
+        return []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._pages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        pages = self._pages
+        row = index.row()
+        if not index.isValid() or not 0 <= row < len(pages) or pages[row] is None:
+            return None
+        page = pages[row]
+
+        if role == Qt.DisplayRole:
+            panels = len(page.get('panels', []))
+            return f"Page {row + 1} ({panels} panel{'s' if panels != 1 else ''})"
+        if role == Qt.ToolTipRole:
+            lines = [f"Page {row + 1}"]
+            if page.get('template_id'):
+                lines.append(f"Template: {page['template_id']}")
+            lines.append(f"Panels: {len(page.get('panels', []))}")
+            if page.get('file'):
+                lines.append(page['file'])
+            return "\n".join(lines)
+        if role == Qt.DecorationRole:
+            key = _page_key(page)
+            icon = self._thumbnails.get(key)
+            if icon is not None:
+                self._thumbnails.move_to_end(key)
+                return icon
+            if row not in self._requested:
+                self._requested.append(row)
+                self._render_timer.start()
+            return None
+        return None
+
+    def reset(self) -> None:
+        """Re-read the whole project, e.g. after creating or loading one."""
+        self.beginResetModel()
+        self._pages = list(self.project_pages())
+        self._thumbnails.clear()
+        self._requested = []
+        self.endResetModel()
+
+    def apply_events(self, events) -> None:
+        """Apply project change events as row inserts, removals and moves.
+
+        Args:
+            events: Coalesced ChangeEvent list in emission order
+        """
+        if any(event.type == PROJECT_RESET for event in events):
+            self.reset()
+            return
+
+        # Replay the structure on the snapshot; inserted rows are filled
+        # in from the project once all events are applied
+        first_shifted = None
+        changed = set()
+        for event in events:
+            if event.type == PAGE_ADDED:
+                self.beginInsertRows(QModelIndex(), event.page, event.page)
+                self._pages.insert(event.page, None)
+                self.endInsertRows()
+                shifted = event.page
+            elif event.type == PAGE_REMOVED:
+                self.beginRemoveRows(QModelIndex(), event.page, event.page)
+                del self._pages[event.page]
+                self.endRemoveRows()
+                shifted = event.page
+            elif event.type == PAGE_MOVED:
+                # Qt expects the destination as a row of the list before the move
+                destination = event.to_page + 1 if event.to_page > event.page else event.to_page
+                self.beginMoveRows(QModelIndex(), event.page, event.page,
+                                   QModelIndex(), destination)
+                self._pages.insert(event.to_page, self._pages.pop(event.page))
+                self.endMoveRows()
+                shifted = min(event.page, event.to_page)
+            elif event.type == PANEL_CHANGED:
+                page = self._pages[event.page] if 0 <= event.page < len(self._pages) else None
+                if page is not None:
+                    self._thumbnails.pop(_page_key(page), None)
+                    changed.add(id(page))
+                continue
+            else:
+                continue
+            if first_shifted is None or shifted < first_shifted:
+                first_shifted = shifted
+
+        self._requested = []
+        pages = self.project_pages()
+        if len(self._pages) != len(pages):
+            # Out of step, e.g. events from before the model was attached
+            self.reset()
+            return
+        self._pages = list(pages)
+        if first_shifted is not None and first_shifted < len(pages):
+            # Inserted rows and the page numbers in the labels from here on
+            self.dataChanged.emit(self.index(first_shifted),
+                                  self.index(len(pages) - 1))
+        for row, page in enumerate(pages[:first_shifted]):
+            if id(page) in changed:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def _render_thumbnails(self) -> None:
+        """Render a few requested thumbnails and announce them."""
+        pages = self._pages
+        rendered = 0
+        while self._requested and rendered < self.THUMBNAILS_PER_PASS:
+            row = self._requested.pop(0)
+            if not 0 <= row < len(pages):
+                continue
+            page = pages[row]
+            if page is None:
+                continue
+            image = self._page_thumbnail(row, page)
+            if image is None:
+                continue
+            self._thumbnails[_page_key(page)] = QIcon(QPixmap.fromImage(image))
+            while len(self._thumbnails) > self.cache_size:
+                self._thumbnails.popitem(last=False)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+            rendered += 1
+        if self._requested:
+            self._render_timer.start()
+
+    def _page_thumbnail(self, row: int, page: Dict[str, Any]):
+        """Render the page layer of an open document, None otherwise.
+
+        Closed page documents of multi-document projects are not opened
+        just for a thumbnail.
+        """
+        doc = self.project_manager.peek_page_document(row)
+        node = doc.nodeByUniqueID(page.get('layer_id')) if doc else None
+        if not node:
+            return None
+        return node.thumbnail(THUMBNAIL_SIZE.width(), THUMBNAIL_SIZE.height())
+
+
+class LayerListModel(QAbstractListModel):
+    """Flat, indented list model over the layer tree of a document.
+
+    The tree is walked incrementally through canFetchMore/fetchMore, so
+    the first rows appear at once; each row keeps only the node's id,
+    name, type and depth. Icons are looked up per node type and cached.
+    """
+
+    FETCH_BATCH = 500
+
+    _TYPE_ICONS = {
+        'paintlayer': 'paintLayer',
+        'grouplayer': 'groupLayer',
+        'vectorlayer': 'vectorLayer',
+        'filelayer': 'fileLayer',
+        'clonelayer': 'cloneLayer',
+        'filterlayer': 'filterLayer',
+        'filllayer': 'fillLayer',
+        'transparencymask': 'transparencyMask',
+        'filtermask': 'filterMask',
+        'selectionmask': 'selectionMask',
+        'transformmask': 'transformMask',
+        'colorizemask': 'colorizeMask',
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[tuple] = []
+        self._stack: List[tuple] = []
+        self._icons: Dict[str, Optional[QIcon]] = {}
+        self._fetching = False
+
+    def set_document(self, doc) -> None:
+        """Index the layer tree of a document, topmost layers first.
+
+        Args:
+            doc: Krita document or None to clear the list
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._stack = []
+        if doc:
+            self._push_children(doc.rootNode(), 0)
+        self.endResetModel()
+
+    def node_id(self, row: int):
+        """Unique id of the node shown in a row."""
+        return self._rows[row][0] if 0 <= row < len(self._rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # Views may ask again while rows of a batch are being inserted
+        return not parent.isValid() and bool(self._stack) and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Walk the next batch of the layer tree."""
+        if self._fetching:
+            return
+        rows = []
+        while self._stack and len(rows) < self.FETCH_BATCH:
+            node, depth = self._stack.pop()
+            rows.append((node.uniqueId(), node.name(), node.type(), depth,
+                         node.visible()))
+            self._push_children(node, depth + 1)
+        if not rows:
+            return
+        first = len(self._rows)
+        self._fetching = True
+        try:
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        finally:
+            self._fetching = False
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        if not index.isValid() or not 0 <= row < len(self._rows):
+            return None
+        _, name, node_type, depth, visible = self._rows[row]
+        if role == Qt.DisplayRole:
+            return "    " * depth + name
+        if role == Qt.ToolTipRole:
+            state = "" if visible else " (hidden)"
+            return f"{name}\n{node_type}{state}"
+        if role == Qt.DecorationRole:
+            return self._icon(node_type)
+        return None
+
+    def _push_children(self, node, depth: int) -> None:
+        """Queue children so the topmost is walked first."""
+        self._stack.extend((child, depth) for child in node.childNodes())
+
+    def _icon(self, node_type: str) -> Optional[QIcon]:
+        """Icon for a node type, looked up once per type."""
+        if node_type not in self._icons:
+            name = self._TYPE_ICONS.get(node_type)
+            self._icons[node_type] = Krita.instance().icon(name) if name else None
+        return self._icons[node_type]
+
+
+def _page_key(page: Dict[str, Any]):
+    """Thumbnail cache key: pages of multi-document projects may share layer ids."""
+    layer_id = page.get('layer_id')
+    return (page.get('file'), layer_id.toString() if hasattr(layer_id, 'toString') else layer_id)
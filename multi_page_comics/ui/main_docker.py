@@ -1,12 +1,48 @@
 from krita import DockWidget, DockWidgetFactory, Krita
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
-    QPushButton, QListWidget, QListWidgetItem, QLabel,
+    QPushButton, QListView, QLabel,
     QScrollArea, QGridLayout, QComboBox, QLineEdit,
-    QSlider, QCheckBox, QGroupBox
+    QSlider, QCheckBox, QGroupBox, QFileDialog, QProgressDialog
 )
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QEvent, QObject, QSize, QTimer
 from PyQt5.QtGui import QIcon, QPixmap
+from ..events import coalesce_events, PROJECT_RESET
+from .list_models import LayerListModel, PageListModel, THUMBNAIL_SIZE
+
+
+# Widget classes of Krita's canvas (OpenGL and QPainter backends)
+CANVAS_CLASSES = {'KisOpenGLCanvas2', 'KisQPainterCanvas'}
+
+
+class CanvasPressFilter(QObject):
+    """Reports presses on a Krita canvas before the canvas handles them.
+
+    Installed on the canvas widgets only (see install_canvas_filter), and
+    after Krita's own input filter, so it runs first: the callback runs
+    before the stroke the press starts and can still prepare the layer
+    being painted on.
+    """
+
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.TabletPress, QEvent.MouseButtonPress):
+            self.callback()
+        return False
+
+
+def install_canvas_filter(window, event_filter):
+    """Install an event filter on the canvas widgets of a main window.
+
+    Installing a filter again on the same widget does not duplicate it,
+    so this can run on every canvas change.
+    """
+    for widget in window.findChildren(QWidget):
+        if widget.metaObject().className() in CANVAS_CLASSES:
+            widget.installEventFilter(event_filter)
 
 
 class MultiPageComicsDocker(DockWidget):
@@ -15,6 +51,19 @@ class MultiPageComicsDocker(DockWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Comic Creator")
+        self.project_manager = None
+
+        # Shared (duplicated) panels are materialized when a stroke is
+        # about to start on one of their layers, or on their source
+        self.canvas_filter = CanvasPressFilter(self.check_active_node, self)
+
+        # Project change events are applied to the lists in one pass per
+        # burst, shortly after the burst
+        self.pending_events = []
+        self.event_timer = QTimer(self)
+        self.event_timer.setSingleShot(True)
+        self.event_timer.setInterval(50)
+        self.event_timer.timeout.connect(self.apply_events)
 
         # Main widget
         main_widget = QWidget()
@@ -35,6 +84,8 @@ class MultiPageComicsDocker(DockWidget):
         self.tabs.addTab(self.panels_tab, "Panels")
         self.tabs.addTab(self.assets_tab, "Assets")
         self.tabs.addTab(self.layers_tab, "Layers")
+        self.layers_stale = True
+        self.tabs.currentChanged.connect(self.refresh_layers)
 
         # Status bar
         self.status_label = QLabel("Ready")
@@ -47,9 +98,12 @@ class MultiPageComicsDocker(DockWidget):
         widget = QWidget()
         layout = QVBoxLayout()
 
-        # Page list
-        self.page_list = QListWidget()
-        self.page_list.setIconSize(QSize(64, 80))
+        # Page list, rows are produced on demand by the model
+        self.page_model = PageListModel(parent=self)
+        self.page_list = QListView()
+        self.page_list.setModel(self.page_model)
+        self.page_list.setIconSize(THUMBNAIL_SIZE)
+        self.page_list.setUniformItemSizes(True)
         layout.addWidget(self.page_list)
 
         # Buttons
@@ -58,12 +112,22 @@ class MultiPageComicsDocker(DockWidget):
         btn_add.clicked.connect(self.add_page)
         btn_delete = QPushButton("Delete")
         btn_duplicate = QPushButton("Duplicate")
+        btn_duplicate.clicked.connect(self.duplicate_page)
 
         btn_layout.addWidget(btn_add)
         btn_layout.addWidget(btn_duplicate)
         btn_layout.addWidget(btn_delete)
         layout.addLayout(btn_layout)
 
+        history_layout = QHBoxLayout()
+        btn_undo = QPushButton("Undo")
+        btn_undo.clicked.connect(self.undo)
+        btn_redo = QPushButton("Redo")
+        btn_redo.clicked.connect(self.redo)
+        history_layout.addWidget(btn_undo)
+        history_layout.addWidget(btn_redo)
+        layout.addLayout(history_layout)
+
         widget.setLayout(layout)
         return widget
 
@@ -97,6 +161,11 @@ class MultiPageComicsDocker(DockWidget):
         scroll.setWidgetResizable(True)
         layout.addWidget(scroll)
 
+        btn_detect = QPushButton("Detect Panels")
+        btn_detect.setToolTip("Create panels from the frames on the page artwork")
+        btn_detect.clicked.connect(self.detect_panels)
+        layout.addWidget(btn_detect)
+
         # Panel properties
         props_group = QGroupBox("Panel Properties")
         props_layout = QVBoxLayout()
@@ -145,6 +214,10 @@ class MultiPageComicsDocker(DockWidget):
             btn.setMinimumHeight(50)
             bubbles_layout.addWidget(btn, i // 2, i % 2)
 
+        btn_import_script = QPushButton("Import Script...")
+        btn_import_script.clicked.connect(self.import_script)
+        bubbles_layout.addWidget(btn_import_script, len(bubble_types) // 2, 0, 1, 2)
+
         bubbles_group.setLayout(bubbles_layout)
         layout.addWidget(bubbles_group)
 
@@ -175,10 +248,15 @@ class MultiPageComicsDocker(DockWidget):
         import_layout = QVBoxLayout()
 
         btn_import = QPushButton("Import to Panel")
+        btn_import.setToolTip("Import an image into the panel of the active layer")
+        btn_import.clicked.connect(self.import_image)
         btn_paste = QPushButton("Paste from Clipboard")
+        btn_import_folder = QPushButton("Import Folder...")
+        btn_import_folder.clicked.connect(self.import_folder)
 
         import_layout.addWidget(btn_import)
         import_layout.addWidget(btn_paste)
+        import_layout.addWidget(btn_import_folder)
 
         import_group.setLayout(import_layout)
         layout.addWidget(import_group)
@@ -192,8 +270,11 @@ class MultiPageComicsDocker(DockWidget):
         widget = QWidget()
         layout = QVBoxLayout()
 
-        # Layer list
-        self.layer_list = QListWidget()
+        # Layer list of the active document, indexed in batches
+        self.layer_model = LayerListModel(self)
+        self.layer_list = QListView()
+        self.layer_list.setModel(self.layer_model)
+        self.layer_list.setUniformItemSizes(True)
         layout.addWidget(self.layer_list)
 
         # Layer buttons
@@ -214,9 +295,216 @@ class MultiPageComicsDocker(DockWidget):
         # Implementation would connect to project manager
         pass
 
+    def set_project_manager(self, project_manager):
+        """Attach the extension's project manager"""
+        if project_manager is not self.project_manager:
+            project_manager.add_event_listener(self.queue_events)
+        self.project_manager = project_manager
+        self.page_model.project_manager = project_manager
+        install_canvas_filter(self.window(), self.canvas_filter)
+
+    def canvasChanged(self, canvas):
+        """Watch the canvas of a newly opened or activated view"""
+        install_canvas_filter(self.window(), self.canvas_filter)
+
+    def queue_events(self, events):
+        """Collect project change events until the event timer fires"""
+        self.pending_events.extend(events)
+        if not self.event_timer.isActive():
+            self.event_timer.start()
+
+    def duplicate_page(self):
+        """Duplicate the selected page, sharing its layer content"""
+        if not self.project_manager:
+            return
+        row = self.current_page_index()
+        self.project_manager.duplicate_page(max(row, 0))
+
+    def undo(self):
+        """Revert the last project change"""
+        if not self.project_manager:
+            return
+        label = self.project_manager.history.undo_label()
+        if self.project_manager.undo():
+            self.apply_events()
+            self.status_label.setText(f"Undid {label}")
+
+    def redo(self):
+        """Re-apply the last reverted project change"""
+        if not self.project_manager:
+            return
+        label = self.project_manager.history.redo_label()
+        if self.project_manager.redo():
+            self.apply_events()
+            self.status_label.setText(f"Redid {label}")
+
+    def import_image(self):
+        """Import an image into the panel of the active layer, or the selected page"""
+        if not self.project_manager or not self.project_manager.current_project:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import to Panel", "",
+            "Images (*.png *.jpg *.jpeg *.tif *.tiff *.bmp *.webp);;All Files (*)"
+        )
+        if not path:
+            return
+
+        page_index, panel_index = self.active_panel()
+        if self.project_manager.import_image_to_panel(page_index, panel_index, path) is None:
+            self.status_label.setText("Could not import image")
+            return
+        self.apply_events()
+        self.status_label.setText(
+            f"Imported image into panel {panel_index + 1}" if panel_index is not None
+            else f"Imported image into page {page_index + 1}"
+        )
+
+    def active_panel(self):
+        """(page index, panel index or None) of the active layer's panel
+
+        Falls back to the whole selected page when the active layer is
+        not inside a panel.
+        """
+        page_index = max(self.current_page_index(), 0)
+        doc = self.project_manager.peek_page_document(page_index)
+        node = doc.activeNode() if doc else None
+        page = self.project_manager.get_page(page_index)
+        panels = page.get('panels', []) if page else []
+        panel_ids = {panel['layer_id']: i for i, panel in enumerate(panels)}
+        while node:
+            if node.uniqueId() in panel_ids:
+                return page_index, panel_ids[node.uniqueId()]
+            node = node.parentNode()
+        return page_index, None
+
+    def import_folder(self):
+        """Import a folder of scans into the project's pages and panels"""
+        if not self.project_manager or not self.project_manager.current_project:
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Import Folder")
+        if not folder:
+            return
+
+        from ..batch_import import BatchImporter
+
+        dialog = QProgressDialog("Importing images...", "Cancel", 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModal)
+
+        def progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            return not dialog.wasCanceled()
+
+        with self.project_manager.batch():
+            summary = BatchImporter(self.project_manager).import_folder(
+                folder, progress=progress
+            )
+        dialog.close()
+        self.apply_events()
+        self.status_label.setText(
+            f"Imported {len(summary['imported'])} images"
+            f" ({len(summary['unmatched'])} unmatched,"
+            f" {len(summary['failed'])} failed)"
+        )
+
+    def import_script(self):
+        """Letter a dialogue script into the project's pages and panels"""
+        if not self.project_manager or not self.project_manager.current_project:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Script", "", "Scripts (*.txt *.script);;All Files (*)"
+        )
+        if not path:
+            return
+
+        from ..script_importer import ScriptImporter
+
+        dialog = QProgressDialog("Lettering pages...", "Cancel", 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModal)
+
+        def progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            return not dialog.wasCanceled()
+
+        with self.project_manager.batch():
+            summary = ScriptImporter(self.project_manager).import_script(
+                path, progress=progress
+            )
+        dialog.close()
+        self.apply_events()
+        unplaced = summary['unplaced']
+        message = f"Lettered {summary['placed']} lines ({len(unplaced)} not placed)"
+        if unplaced:
+            lines = ', '.join(str(entry['line']) for entry in unplaced[:10])
+            message += f", see script lines {lines}{'...' if len(unplaced) > 10 else ''}"
+        self.status_label.setText(message)
+
+    def detect_panels(self):
+        """Replace the selected page's panels with detected ones"""
+        if not self.project_manager:
+            return
+        row = self.current_page_index()
+        panels = self.project_manager.detect_page_panels(max(row, 0))
+        if panels is None:
+            self.status_label.setText("Panel detection not available")
+            return
+        self.apply_events()
+        self.status_label.setText(f"Detected {len(panels)} panels")
+
+    def check_active_node(self):
+        """Unshare the panel of the active layer before a stroke starts on it"""
+        doc = Krita.instance().activeDocument()
+        if not doc or not self.project_manager:
+            return
+        if self.project_manager.ensure_panel_writable(doc, doc.activeNode()):
+            self.status_label.setText("Panel content unshared")
+
+    def current_page_index(self):
+        """Index of the selected page, -1 without selection"""
+        return self.page_list.currentIndex().row()
+
     def refresh_project(self):
-        """Refresh UI with current project data"""
-        pass
+        """Re-read all project data into the lists"""
+        self.pending_events = []
+        self.event_timer.stop()
+        self.page_model.reset()
+        self.layers_stale = True
+        self.refresh_layers()
+        self.update_status()
+
+    def apply_events(self):
+        """Apply queued project change events to the lists in place"""
+        events = coalesce_events(self.pending_events)
+        self.pending_events = []
+        self.event_timer.stop()
+        if not events:
+            return
+        if any(event.type == PROJECT_RESET for event in events):
+            self.refresh_project()
+            return
+        self.page_model.apply_events(events)
+        self.layers_stale = True
+        self.refresh_layers()
+        self.update_status()
+
+    def refresh_layers(self, *args):
+        """Re-index the layer list, deferred while the tab is hidden"""
+        if not self.layers_stale or self.tabs.currentWidget() is not self.layers_tab:
+            return
+        self.layers_stale = False
+        self.layer_model.set_document(Krita.instance().activeDocument())
+
+    def update_status(self):
+        """Show page and panel counts in the status bar"""
+        stats = self.project_manager.get_project_stats() if self.project_manager else None
+        if not stats:
+            self.status_label.setText("Ready")
+            return
+        self.status_label.setText(
+            f"{stats['title']}: {stats['page_count']} pages, "
+            f"{stats['panel_count']} panels"
+        )
 
 
 class MultiPageComicsDockerFactory(DockWidgetFactory):
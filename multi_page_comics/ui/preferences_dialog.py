@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import (
 	QDialog, QVBoxLayout, QHBoxLayout,
 	QPushButton, QLabel, QLineEdit, QComboBox,
-	QSpinBox, QGroupBox, QFormLayout
+	QSpinBox, QGroupBox, QFormLayout, QFileDialog
 )
 from PyQt5.QtCore import Qt
 
@@ -91,6 +91,36 @@ class NewProjectDialog(QDialog):
 		settings_group.setLayout(settings_layout)
 		layout.addWidget(settings_group)
 
+		# Project storage group
+		storage_group = QGroupBox("Project Storage")
+		storage_layout = QFormLayout()
+
+		self.mode_combo = QComboBox()
+		self.mode_combo.addItems([
+			"Single document",
+			"One document per page"
+		])
+		self.mode_combo.currentIndexChanged.connect(self.mode_changed)
+
+		folder_layout = QHBoxLayout()
+		self.folder_input = QLineEdit()
+		self.btn_folder = QPushButton("Browse...")
+		self.btn_folder.clicked.connect(self.browse_folder)
+		folder_layout.addWidget(self.folder_input)
+		folder_layout.addWidget(self.btn_folder)
+
+		self.open_docs_spin = QSpinBox()
+		self.open_docs_spin.setRange(1, 32)
+		self.open_docs_spin.setValue(4)
+
+		storage_layout.addRow("Mode:", self.mode_combo)
+		storage_layout.addRow("Project Folder:", folder_layout)
+		storage_layout.addRow("Max Open Pages:", self.open_docs_spin)
+
+		storage_group.setLayout(storage_layout)
+		layout.addWidget(storage_group)
+		self.mode_changed(0)
+
 		# Buttons
 		btn_layout = QHBoxLayout()
 		btn_create = QPushButton("Create Project")
@@ -121,6 +151,30 @@ class NewProjectDialog(QDialog):
 				self.dpi_spin.setValue(dpi)
 				break
 
+	def mode_changed(self, index):
+		"""Enable per-page storage options for multi-document projects"""
+		multi = index == 1
+		self.folder_input.setEnabled(multi)
+		self.btn_folder.setEnabled(multi)
+		self.open_docs_spin.setEnabled(multi)
+
+	def browse_folder(self):
+		"""Browse for the project folder"""
+		directory = QFileDialog.getExistingDirectory(
+			self,
+			"Select Project Folder"
+		)
+		if directory:
+			self.folder_input.setText(directory)
+
+	def accept(self):
+		"""Require a project folder for multi-document projects"""
+		if self.mode_combo.currentIndex() == 1 and not self.folder_input.text():
+			self.browse_folder()
+			if not self.folder_input.text():
+				return
+		super().accept()
+
 	def get_project_data(self):
 		"""Get project configuration data"""
 		return {
@@ -132,5 +186,8 @@ class NewProjectDialog(QDialog):
 			'page_height': self.height_spin.value(),
 			'dpi': self.dpi_spin.value(),
 			'gutter': self.gutter_spin.value(),
-			'margin': self.margin_spin.value()
+			'margin': self.margin_spin.value(),
+			'mode': 'multi' if self.mode_combo.currentIndex() == 1 else 'single',
+			'project_dir': self.folder_input.text(),
+			'max_open_documents': self.open_docs_spin.value()
 		}
@@ -1,19 +1,80 @@
+import copy
 from PyQt5.QtWidgets import (
 	QDialog, QVBoxLayout, QHBoxLayout,
 	QPushButton, QLabel, QLineEdit, QComboBox,
 	QSpinBox, QSlider, QCheckBox, QWidget,
-	QGraphicsView, QGraphicsScene, QGraphicsRectItem
+	QGraphicsView, QGraphicsScene, QGraphicsRectItem, QGraphicsPolygonItem,
+	QGraphicsItem
 )
-from PyQt5.QtCore import Qt, QRectF
-from PyQt5.QtGui import QPen, QBrush, QColor
+from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtGui import QPen, QBrush, QColor, QPainter, QPolygonF
+from ..utils.geometry import SpatialGridIndex
+
+
+class PanelItemMixin:
+	"""Dragging behaviour shared by rectangle and polygon panel items"""
+
+	def init_panel_item(self, editor, panel_def):
+		self.editor = editor
+		self.panel_def = panel_def
+		self.setFlags(
+			QGraphicsItem.ItemIsMovable |
+			QGraphicsItem.ItemIsSelectable |
+			QGraphicsItem.ItemSendsGeometryChanges
+		)
+		pen = QPen(QColor(0, 0, 0), 2)
+		pen.setCosmetic(True)
+		self.setPen(pen)
+		self.setBrush(QBrush(QColor(200, 220, 255, 100)))
+
+	def itemChange(self, change, value):
+		"""Snap the dragged panel against neighbouring panel edges"""
+		if change == QGraphicsItem.ItemPositionChange and self.editor.snap_enabled():
+			return self.editor.snap_position(self, value)
+		return super().itemChange(change, value)
+
+	def mouseReleaseEvent(self, event):
+		"""Write the dropped position back into the template model"""
+		super().mouseReleaseEvent(event)
+		if not self.pos().isNull():
+			self.editor.commit_item_position(self)
+
+
+class PanelItem(PanelItemMixin, QGraphicsRectItem):
+	"""Scene item bound to one rectangle panel definition of the template"""
+
+	def __init__(self, editor, panel_def):
+		super().__init__()
+		self.init_panel_item(editor, panel_def)
+
+
+class PolygonPanelItem(PanelItemMixin, QGraphicsPolygonItem):
+	"""Scene item bound to one polygon panel definition of the template"""
+
+	def __init__(self, editor, panel_def):
+		super().__init__()
+		self.init_panel_item(editor, panel_def)
+
+	def rect(self):
+		"""Bounding box of the polygon, used for snapping"""
+		return self.polygon().boundingRect()
 
 
 class TemplateEditorDialog(QDialog):
 	"""Dialog for creating/editing panel templates"""
 
+	PAGE_WIDTH = 600
+	PAGE_HEIGHT = 800
+	SNAP_TOLERANCE = 8
+
 	def __init__(self, template=None, parent=None):
 		super().__init__(parent)
-		self.template = template or self.create_default_template()
+		# Edit a copy, so cancelling leaves the caller's template untouched
+		self.template = copy.deepcopy(template) if template else self.create_default_template()
+		self.panel_items = {}
+		# Snapshots of the panel list for undo, see push_undo
+		self.undo_stack = []
+		self.snap_index = SpatialGridIndex(cell_size=self.SNAP_TOLERANCE * 2)
 		self.setWindowTitle("Panel Template Editor")
 		self.resize(1000, 700)
 
@@ -76,12 +137,24 @@ class TemplateEditorDialog(QDialog):
 		btn_add_rect.clicked.connect(self.add_rectangle_panel)
 		layout.addWidget(btn_add_rect)
 
+		btn_remove = QPushButton("Remove Selected Panels")
+		btn_remove.clicked.connect(self.remove_selected_panels)
+		layout.addWidget(btn_remove)
+
+		btn_undo = QPushButton("Undo")
+		btn_undo.clicked.connect(self.undo)
+		layout.addWidget(btn_undo)
+
 		btn_split_h = QPushButton("Split Horizontal")
 		layout.addWidget(btn_split_h)
 
 		btn_split_v = QPushButton("Split Vertical")
 		layout.addWidget(btn_split_v)
 
+		self.snap_check = QCheckBox("Snap to Panels")
+		self.snap_check.setChecked(True)
+		layout.addWidget(self.snap_check)
+
 		layout.addStretch()
 
 		# Action buttons
@@ -101,11 +174,21 @@ class TemplateEditorDialog(QDialog):
 		"""Create editing canvas"""
 		view = QGraphicsView()
 		self.scene = QGraphicsScene()
+		# Panels move constantly while dragging; a BSP index would be
+		# rebuilt on every step, a linear scan is cheaper at this size
+		self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
 		view.setScene(self.scene)
+		view.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+		view.setOptimizationFlags(
+			QGraphicsView.DontSavePainterState |
+			QGraphicsView.DontAdjustForAntialiasing
+		)
+		view.setRenderHint(QPainter.Antialiasing, False)
 
 		# Draw page boundary
-		page_rect = QRectF(0, 0, 600, 800)
+		page_rect = QRectF(0, 0, self.PAGE_WIDTH, self.PAGE_HEIGHT)
 		self.scene.addRect(page_rect, QPen(QColor(200, 200, 200)))
+		self.scene.setSceneRect(page_rect)
 
 		# Draw existing panels
 		for panel in self.template.get('panels', []):
@@ -126,17 +209,114 @@ class TemplateEditorDialog(QDialog):
 		widget.setMaximumWidth(200)
 		return widget
 
-	def draw_panel(self, panel_def):
-		"""Draw panel on canvas"""
-		x = panel_def.get('x', 0) * 6
-		y = panel_def.get('y', 0) * 8
-		w = panel_def.get('width', 50) * 6
-		h = panel_def.get('height', 50) * 8
+	def panel_rect(self, panel_def):
+		"""Map a percentage-based panel definition to scene coordinates"""
+		sx = self.PAGE_WIDTH / 100
+		sy = self.PAGE_HEIGHT / 100
+		return QRectF(
+			panel_def.get('x', 0) * sx,
+			panel_def.get('y', 0) * sy,
+			panel_def.get('width', 50) * sx,
+			panel_def.get('height', 50) * sy
+		)
+
+	def panel_polygon(self, panel_def):
+		"""Map the points of a polygon panel definition to scene coordinates"""
+		sx = self.PAGE_WIDTH / 100
+		sy = self.PAGE_HEIGHT / 100
+		return QPolygonF([QPointF(x * sx, y * sy) for x, y in panel_def['points']])
 
-		rect_item = QGraphicsRectItem(x, y, w, h)
-		rect_item.setPen(QPen(QColor(0, 0, 0), 2))
-		rect_item.setBrush(QBrush(QColor(200, 220, 255, 100)))
-		self.scene.addItem(rect_item)
+	def draw_panel(self, panel_def):
+		"""Draw panel on canvas, or update its item if already drawn"""
+		key = id(panel_def)
+		item = self.panel_items.get(key)
+		if item is not None:
+			self.update_panel(panel_def)
+			return item
+
+		if panel_def.get('points'):
+			item = PolygonPanelItem(self, panel_def)
+			item.setPolygon(self.panel_polygon(panel_def))
+		else:
+			item = PanelItem(self, panel_def)
+			item.setRect(self.panel_rect(panel_def))
+		self.scene.addItem(item)
+		self.panel_items[key] = item
+		self.snap_index.insert(key, item.rect())
+		return item
+
+	def update_panel(self, panel_def):
+		"""Move the existing item of a panel to match its definition"""
+		key = id(panel_def)
+		item = self.panel_items.get(key)
+		if item is None:
+			return self.draw_panel(panel_def)
+
+		if isinstance(item, PolygonPanelItem):
+			polygon = self.panel_polygon(panel_def)
+			if item.polygon() != polygon or not item.pos().isNull():
+				item.setPos(QPointF(0, 0))
+				item.setPolygon(polygon)
+				self.snap_index.insert(key, item.rect())
+			return item
+
+		rect = self.panel_rect(panel_def)
+		if item.rect() != rect or not item.pos().isNull():
+			item.setPos(QPointF(0, 0))
+			item.setRect(rect)
+			self.snap_index.insert(key, rect)
+		return item
+
+	def remove_panel(self, panel_def):
+		"""Remove a panel's item from the scene"""
+		key = id(panel_def)
+		item = self.panel_items.pop(key, None)
+		if item is not None:
+			self.scene.removeItem(item)
+			self.snap_index.remove(key)
+
+	def sync_panels(self):
+		"""Bring the scene in line with the template, touching only changed items"""
+		panels = self.template.get('panels', [])
+		live = {id(panel) for panel in panels}
+		for key in [k for k in self.panel_items if k not in live]:
+			self.remove_panel(self.panel_items[key].panel_def)
+		for panel in panels:
+			self.update_panel(panel)
+
+	def snap_enabled(self):
+		"""Whether dragged panels should snap to other panels"""
+		return self.snap_check.isChecked()
+
+	def snap_position(self, item, pos):
+		"""Adjust a proposed item position so its edges snap to nearby panels"""
+		moved = item.rect().translated(pos)
+		dx, dy = self.snap_index.snap_rect(
+			moved,
+			self.SNAP_TOLERANCE,
+			exclude=id(item.panel_def)
+		)
+		return QPointF(pos.x() + dx, pos.y() + dy)
+
+	def commit_item_position(self, item):
+		"""Store a dragged item's position back into its panel definition"""
+		rect = item.rect().translated(item.pos())
+		panel_def = item.panel_def
+		x = round(rect.x() * 100 / self.PAGE_WIDTH, 2)
+		y = round(rect.y() * 100 / self.PAGE_HEIGHT, 2)
+		if (x, y) == (panel_def.get('x', 0), panel_def.get('y', 0)):
+			return
+		self.push_undo()
+		if panel_def.get('points'):
+			dx = x - panel_def.get('x', 0)
+			dy = y - panel_def.get('y', 0)
+			panel_def['points'] = [
+				[round(px + dx, 2), round(py + dy, 2)]
+				for px, py in panel_def['points']
+			]
+		panel_def['x'] = x
+		panel_def['y'] = y
+		self.update_panel(panel_def)
 
 	def add_rectangle_panel(self):
 		"""Add new rectangle panel"""
@@ -147,9 +327,40 @@ class TemplateEditorDialog(QDialog):
 			'width': 50,
 			'height': 50
 		}
+		self.push_undo()
 		self.template.setdefault('panels', []).append(new_panel)
 		self.draw_panel(new_panel)
 
+	def remove_selected_panels(self):
+		"""Remove the selected panels from the template"""
+		selected = {id(item.panel_def) for item in self.scene.selectedItems()
+					if isinstance(item, PanelItemMixin)}
+		if not selected:
+			return
+		self.push_undo()
+		panels = self.template.get('panels', [])
+		for panel in [panel for panel in panels if id(panel) in selected]:
+			self.remove_panel(panel)
+		self.template['panels'] = [panel for panel in panels if id(panel) not in selected]
+
+	def push_undo(self):
+		"""Remember the panel list and every panel's values before an edit"""
+		panels = self.template.get('panels', [])
+		self.undo_stack.append([(panel, copy.deepcopy(panel)) for panel in panels])
+
+	def undo(self):
+		"""Revert the last edit, redrawing only the panels it changed"""
+		if not self.undo_stack:
+			return
+		snapshot = self.undo_stack.pop()
+		# Restore values into the same dicts, so unchanged items are kept
+		for panel, values in snapshot:
+			if panel != values:
+				panel.clear()
+				panel.update(values)
+		self.template['panels'] = [panel for panel, _ in snapshot]
+		self.sync_panels()
+
 	def save_template(self):
 		"""Save template data"""
 		self.template['name'] = self.name_input.text()
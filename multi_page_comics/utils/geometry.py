@@ -1,7 +1,9 @@
-from typing import Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from PyQt5.QtCore import QPointF, QRectF
 import math
 
+Point = Tuple[float, float]
+
 
 def rect_from_percentages(
     page_width: float,
@@ -12,21 +14,38 @@ def rect_from_percentages(
     h_pct: float
 ) -> QRectF:
     """Convert percentage-based coordinates to pixel coordinates.
-    
-    Args:
-def rect_contains_rect(outer: QRectF, inner: QRectF) -> bool:
-    """Check if outer rectangle contains inner rectangle.
 
     Args:
-        outer: Outer rectangle
-        inner: Inner rectangle
+        page_width: Page width in pixels
+        page_height: Page height in pixels
+        x_pct: X position as percentage of page width
+        y_pct: Y position as percentage of page height
+        w_pct: Width as percentage of page width
+        h_pct: Height as percentage of page height
 
     Returns:
-        True if outer contains inner
+        QRectF in pixel coordinates
     """
-    return (outer.contains(inner.topLeft()) and
-            outer.contains(inner.bottomRight()))
-        
+    return QRectF(
+        x_pct * page_width / 100,
+        y_pct * page_height / 100,
+        w_pct * page_width / 100,
+        h_pct * page_height / 100
+    )
+
+
+def calculate_tail_point(
+    bubble_center: QPointF,
+    target_point: QPointF,
+    distance: float
+) -> QPointF:
+    """Calculate speech bubble tail attachment point.
+
+    Args:
+        bubble_center: Center of the bubble
+        target_point: Point the tail should aim at
+        distance: Distance from center to attachment point
+
     Returns:
         QPointF for tail attachment
     """
@@ -36,17 +55,17 @@ def rect_contains_rect(outer: QRectF, inner: QRectF) -> bool:
     )
     return QPointF(
         bubble_center.x() + math.cos(angle) * distance,
-        bubble_center.y() + math.sin(angle) * 30
+        bubble_center.y() + math.sin(angle) * distance
     )
 
 
 def snap_to_grid(point: QPointF, grid_size: float) -> QPointF:
     """Snap point to grid.
-    
+
     Args:
         point: Point to snap
         grid_size: Grid cell size
-        
+
     Returns:
         Snapped QPointF
     """
@@ -58,13 +77,275 @@ def snap_to_grid(point: QPointF, grid_size: float) -> QPointF:
 
 def rect_contains_rect(outer: QRectF, inner: QRectF) -> bool:
     """Check if outer rectangle contains inner rectangle.
-    
+
     Args:
         outer: Outer rectangle
         inner: Inner rectangle
-        
+
     Returns:
         True if outer contains inner
     """
     return (outer.contains(inner.topLeft()) and
-            outer.contains(inner.bottomRight()))
\ No newline at end of file
+            outer.contains(inner.bottomRight()))
+
+
+def polygon_from_rect(x: float, y: float, width: float, height: float) -> List[Point]:
+    """Get the corners of a rectangle as a clockwise polygon (y down).
+
+    Args:
+        x: Left edge
+        y: Top edge
+        width: Rectangle width
+        height: Rectangle height
+
+    Returns:
+        List of (x, y) vertices
+    """
+    return [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+
+
+def polygon_bounds(points: Sequence[Point]) -> Tuple[float, float, float, float]:
+    """Get the bounding box of a polygon.
+
+    Args:
+        points: Polygon vertices
+
+    Returns:
+        (x, y, width, height)
+    """
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def polygon_area(points: Sequence[Point]) -> float:
+    """Get the signed area of a polygon (shoelace formula).
+
+    Args:
+        points: Polygon vertices
+
+    Returns:
+        Area, positive for clockwise vertices in y-down coordinates
+    """
+    area = 0.0
+    for i in range(len(points)):
+        x0, y0 = points[i - 1]
+        x1, y1 = points[i]
+        area += x0 * y1 - x1 * y0
+    return area / 2.0
+
+
+def clip_polygon(subject: Sequence[Point], clip: Sequence[Point]) -> List[Point]:
+    """Clip a polygon against a convex polygon (Sutherland-Hodgman).
+
+    Args:
+        subject: Polygon to clip, may be concave
+        clip: Convex clip polygon, either orientation
+
+    Returns:
+        Vertices of the clipped polygon, empty if nothing remains
+    """
+    # Keep points on the inner side of each clip edge
+    orientation = 1.0 if polygon_area(clip) >= 0 else -1.0
+    output = list(subject)
+    for i in range(len(clip)):
+        if not output:
+            break
+        cx0, cy0 = clip[i - 1]
+        cx1, cy1 = clip[i]
+
+        def side(p):
+            return orientation * ((cx1 - cx0) * (p[1] - cy0) - (cy1 - cy0) * (p[0] - cx0))
+
+        polygon, output = output, []
+        for j in range(len(polygon)):
+            prev, cur = polygon[j - 1], polygon[j]
+            s_prev, s_cur = side(prev), side(cur)
+            if s_cur >= 0:
+                if s_prev < 0:
+                    output.append(_intersect(prev, cur, s_prev, s_cur))
+                output.append(cur)
+            elif s_prev >= 0:
+                output.append(_intersect(prev, cur, s_prev, s_cur))
+
+    # Vertices on a clip edge are emitted twice
+    deduped = [p for i, p in enumerate(output)
+               if abs(p[0] - output[i - 1][0]) > 1e-9 or abs(p[1] - output[i - 1][1]) > 1e-9]
+    return deduped if len(deduped) >= 3 else []
+
+
+def _intersect(a: Point, b: Point, side_a: float, side_b: float) -> Point:
+    t = side_a / (side_a - side_b)
+    return a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t
+
+
+def inset_polygon(points: Sequence[Point], distance: float) -> List[Point]:
+    """Move every edge of a simple polygon inwards, e.g. for gutters.
+
+    Each edge is shifted along its inward normal and neighbouring edges
+    are re-joined at their (mitered) intersection, so rectangles shrink
+    to rectangles and angled panels keep parallel gutters.
+
+    Args:
+        points: Polygon vertices, either orientation
+        distance: Inset distance; negative values grow the polygon
+
+    Returns:
+        Inset vertices, empty if the polygon collapses
+    """
+    count = len(points)
+    if count < 3 or distance == 0:
+        return list(points)
+    area = polygon_area(points)
+    if area == 0:
+        return []
+    # Clockwise in y-down coordinates: the inside is to the right
+    sign = 1.0 if area > 0 else -1.0
+
+    lines = []
+    for i in range(count):
+        (x0, y0), (x1, y1) = points[i - 1], points[i]
+        length = math.hypot(x1 - x0, y1 - y0)
+        if length == 0:
+            continue
+        nx = -(y1 - y0) / length * sign
+        ny = (x1 - x0) / length * sign
+        lines.append(((x0 + nx * distance, y0 + ny * distance),
+                      (x1 + nx * distance, y1 + ny * distance)))
+
+    result = []
+    for i in range(len(lines)):
+        (ax0, ay0), (ax1, ay1) = lines[i - 1]
+        (bx0, by0), (bx1, by1) = lines[i]
+        dax, day = ax1 - ax0, ay1 - ay0
+        dbx, dby = bx1 - bx0, by1 - by0
+        denom = dax * dby - day * dbx
+        if abs(denom) < 1e-12:
+            # Collinear edges: the shifted shared vertex is the joint
+            result.append((bx0, by0))
+            continue
+        t = ((bx0 - ax0) * dby - (by0 - ay0) * dbx) / denom
+        result.append((ax0 + dax * t, ay0 + day * t))
+
+    # Insetting past the polygon's width flips it inside out, or turns
+    # edges around while keeping the orientation (e.g. squares)
+    if polygon_area(result) * area <= 0:
+        return []
+    for i in range(len(lines)):
+        (ax0, ay0), (ax1, ay1) = lines[i]
+        (rx0, ry0), (rx1, ry1) = result[i], result[(i + 1) % len(result)]
+        if (ax1 - ax0) * (rx1 - rx0) + (ay1 - ay0) * (ry1 - ry0) < 0:
+            return []
+    return result
+
+
+class SpatialGridIndex:
+    """Uniform grid bucketing of panel edges for snapping queries.
+
+    Vertical edges are bucketed by x and horizontal edges by y, so a
+    snap lookup only inspects the cells around the dragged edge instead
+    of every panel in the template.
+    """
+
+    def __init__(self, cell_size: float = 20.0):
+        self.cell_size = cell_size
+        self._x_cells: Dict[int, Dict[int, List[float]]] = {}
+        self._y_cells: Dict[int, Dict[int, List[float]]] = {}
+        self._rects: Dict[int, QRectF] = {}
+
+    def _cell(self, value: float) -> int:
+        return int(math.floor(value / self.cell_size))
+
+    def _add_edges(self, key: int, rect: QRectF) -> None:
+        for x in (rect.left(), rect.right()):
+            self._x_cells.setdefault(self._cell(x), {}).setdefault(key, []).append(x)
+        for y in (rect.top(), rect.bottom()):
+            self._y_cells.setdefault(self._cell(y), {}).setdefault(key, []).append(y)
+
+    def _remove_edges(self, key: int, rect: QRectF) -> None:
+        for cells, values in ((self._x_cells, (rect.left(), rect.right())),
+                              (self._y_cells, (rect.top(), rect.bottom()))):
+            for value in values:
+                cell = cells.get(self._cell(value))
+                if cell is not None:
+                    cell.pop(key, None)
+                    if not cell:
+                        del cells[self._cell(value)]
+
+    def insert(self, key: int, rect: QRectF) -> None:
+        """Insert or replace the edges of a rectangle.
+
+        Args:
+            key: Identifier of the rectangle (e.g. panel index)
+            rect: Rectangle in scene coordinates
+        """
+        self.remove(key)
+        self._rects[key] = QRectF(rect)
+        self._add_edges(key, rect)
+
+    def remove(self, key: int) -> None:
+        """Remove a rectangle from the index.
+
+        Args:
+            key: Identifier of the rectangle
+        """
+        old = self._rects.pop(key, None)
+        if old is not None:
+            self._remove_edges(key, old)
+
+    def clear(self) -> None:
+        """Remove all rectangles from the index."""
+        self._x_cells.clear()
+        self._y_cells.clear()
+        self._rects.clear()
+
+    def _nearest(
+        self,
+        cells: Dict[int, Dict[int, List[float]]],
+        value: float,
+        tolerance: float,
+        exclude: Optional[int]
+    ) -> Optional[float]:
+        best = None
+        best_dist = tolerance
+        for cell in range(self._cell(value - tolerance),
+                          self._cell(value + tolerance) + 1):
+            for key, edges in cells.get(cell, {}).items():
+                if key == exclude:
+                    continue
+                for edge in edges:
+                    dist = abs(edge - value)
+                    if dist <= best_dist:
+                        best, best_dist = edge, dist
+        return best
+
+    def snap_rect(
+        self,
+        rect: QRectF,
+        tolerance: float,
+        exclude: Optional[int] = None
+    ) -> Tuple[float, float]:
+        """Find the offset that snaps a rectangle onto nearby edges.
+
+        Args:
+            rect: Rectangle being moved
+            tolerance: Maximum snap distance
+            exclude: Key of the rectangle itself, ignored during lookup
+
+        Returns:
+            (dx, dy) offset to apply, zero on axes with no nearby edge
+        """
+        offsets = []
+        for cells, edges in ((self._x_cells, (rect.left(), rect.right())),
+                             (self._y_cells, (rect.top(), rect.bottom()))):
+            best = 0.0
+            best_dist = None
+            for edge in edges:
+                target = self._nearest(cells, edge, tolerance, exclude)
+                if target is None:
+                    continue
+                dist = abs(target - edge)
+                if best_dist is None or dist < best_dist:
+                    best, best_dist = target - edge, dist
+            offsets.append(best)
+        return offsets[0], offsets[1]
@@ -1,4 +1,5 @@
-from typing import Optional, Dict, Any, List
+from bisect import bisect_left
+from typing import Optional, Dict, Any, List, Tuple
 from krita import Krita
 
 
@@ -39,14 +40,15 @@ def get_all_paint_layers(node) -> List:
     return layers
 
 
-def create_layer_hierarchy(doc, structure: List[Dict[str, Any]]) -> None:
+def create_layer_hierarchy(doc, structure: List[Dict[str, Any]], parent=None) -> None:
     """Create layer hierarchy from structure dict.
     
     Args:
         doc: Krita document
         structure: List of layer structure dictionaries
+        parent: Node to create the layers in, defaults to the root node
     """
-    root = doc.rootNode()
+    root = parent if parent is not None else doc.rootNode()
 
     def create_recursive(parent, structure_node: Dict[str, Any]):
         """Recursively create layer structure.
@@ -55,11 +57,7 @@ def create_layer_hierarchy(doc, structure: List[Dict[str, Any]]) -> None:
             parent: Parent layer
             structure_node: Node definition
         """
-        if structure_node['type'] == 'group':
-            layer = doc.createGroupLayer(structure_node['name'])
-        else:
-            layer = doc.createPaintLayer(structure_node['name'])
-
+        layer = _create_layer(doc, structure_node)
         parent.addChildNode(layer, None)
 
         for child in structure_node.get('children', []):
@@ -69,3 +67,311 @@ def create_layer_hierarchy(doc, structure: List[Dict[str, Any]]) -> None:
 
     for node in structure:
         create_recursive(root, node)
+
+
+def is_layer_hierarchy(structure: Any) -> bool:
+    """Check that a value is a structure create_layer_hierarchy can build.
+
+    Args:
+        structure: Value to check, e.g. loaded from JSON
+
+    Returns:
+        True for a list of dictionaries with string 'name' and 'type'
+        and, optionally, a list of such 'children'
+    """
+    if not isinstance(structure, list):
+        return False
+    return all(
+        isinstance(node, dict) and
+        isinstance(node.get('name'), str) and
+        isinstance(node.get('type'), str) and
+        is_layer_hierarchy(node.get('children', []))
+        for node in structure
+    )
+
+
+def reconcile_layer_hierarchy(
+    doc,
+    structure: List[Dict[str, Any]],
+    parent=None,
+    delete_extra: bool = True
+) -> Dict[str, int]:
+    """Bring an existing layer tree in line with a structure dict.
+
+    Unlike create_layer_hierarchy this reuses the layers already there,
+    so reapplying a structure is cheap and keeps their pixels. On every
+    level existing layers are matched to the structure by name and kind
+    (group or not), remaining ones of the same kind are renamed, and the
+    rest are created or deleted. Only layers out of order relative to the
+    longest already ordered run are moved.
+
+    Children are listed bottom to top, the order create_layer_hierarchy
+    builds them in.
+
+    Args:
+        doc: Krita document
+        structure: List of layer structure dictionaries
+        parent: Node holding the layers, defaults to the root node
+        delete_extra: Delete layers the structure does not mention;
+            otherwise they are left where they are
+
+    Returns:
+        Number of layers 'created', 'renamed', 'moved' and 'deleted'
+    """
+    counts = {'created': 0, 'renamed': 0, 'moved': 0, 'deleted': 0}
+
+    def reconcile(parent, wanted: List[Dict[str, Any]]):
+        live = parent.childNodes()
+
+        # Same name and kind first, then reuse layers of the same kind
+        by_name: Dict[tuple, List[int]] = {}
+        for i, node in enumerate(live):
+            by_name.setdefault((node.name(), _is_group(node)), []).append(i)
+        matched: Dict[int, int] = {}
+        for i, structure_node in enumerate(wanted):
+            candidates = by_name.get((structure_node['name'], structure_node['type'] == 'group'))
+            if candidates:
+                matched[i] = candidates.pop(0)
+
+        used = set(matched.values())
+        spare = {True: [], False: []}
+        for i, node in enumerate(live):
+            if i not in used:
+                spare[_is_group(node)].append(i)
+        for i, structure_node in enumerate(wanted):
+            candidates = spare[structure_node['type'] == 'group']
+            if i not in matched and candidates:
+                matched[i] = candidates.pop(0)
+                live[matched[i]].setName(structure_node['name'])
+                counts['renamed'] += 1
+
+        if delete_extra:
+            for i in spare[True] + spare[False]:
+                live[i].remove()
+                counts['deleted'] += 1
+
+        # Layers whose relative order is already right stay in place
+        order = sorted(matched, key=matched.get)
+        stable = {order[k] for k in _increasing_run(order)}
+
+        nodes = []
+        for i, structure_node in enumerate(wanted):
+            if i in matched:
+                node = live[matched[i]]
+                if i not in stable:
+                    node.remove()
+                    _place(parent, node, nodes[-1] if nodes else None, counts)
+                    counts['moved'] += 1
+            else:
+                node = _create_layer(doc, structure_node)
+                _place(parent, node, nodes[-1] if nodes else None, counts)
+                counts['created'] += 1
+            nodes.append(node)
+
+        for node, structure_node in zip(nodes, wanted):
+            if structure_node['type'] == 'group':
+                reconcile(node, structure_node.get('children', []))
+
+    reconcile(parent if parent is not None else doc.rootNode(), structure)
+    return counts
+
+
+def _create_layer(doc, structure_node: Dict[str, Any]):
+    """Create the layer of one structure node, without children."""
+    if structure_node['type'] == 'group':
+        return doc.createGroupLayer(structure_node['name'])
+    return doc.createNode(structure_node['name'], 'paintlayer')
+
+
+def _is_group(node) -> bool:
+    """Check whether a node is a group layer."""
+    return node.type() == 'grouplayer'
+
+
+def _place(parent, node, below, counts: Dict[str, int]) -> None:
+    """Insert a detached node directly above below, or at the bottom."""
+    if attach_node(parent, node, below):
+        counts['moved'] += 1
+
+
+def detach_node(node) -> Tuple[Any, Any]:
+    """Take a node out of the layer tree without deleting it.
+
+    The node stays alive as long as it is referenced, so it can be put
+    back with attach_node.
+
+    Args:
+        node: Node to detach
+
+    Returns:
+        (parent, below): the former parent and the sibling directly
+        below the node (None if it was the bottom one)
+    """
+    parent = node.parentNode()
+    below = None
+    if parent is not None:
+        for sibling in parent.childNodes():
+            if sibling.uniqueId() == node.uniqueId():
+                break
+            below = sibling
+    node.remove()
+    return parent, below
+
+
+def attach_node(parent, node, below) -> bool:
+    """Insert a detached node directly above below, or at the bottom.
+
+    Krita only inserts above a given sibling (or at the top), so the
+    bottom is reached by inserting above the current bottom layer and
+    moving that one above the new node.
+
+    Args:
+        parent: Node to insert into
+        node: Detached node
+        below: Sibling to insert above, None for the bottom
+
+    Returns:
+        True if the former bottom layer had to be moved
+    """
+    if below is not None:
+        parent.addChildNode(node, below)
+        return False
+    children = parent.childNodes()
+    if not children:
+        parent.addChildNode(node, None)
+        return False
+    bottom = children[0]
+    parent.addChildNode(node, bottom)
+    bottom.remove()
+    parent.addChildNode(bottom, node)
+    return True
+
+
+class LayerChange:
+    """Layers attached and detached by one undoable step, in order.
+
+    Detached nodes are kept alive by the references held here, so
+    reverting the step re-attaches the very same nodes and the layer ids
+    stored in the project model stay valid. Record the layers of a step
+    here, then store apply/revert in the history (see
+    command_log.effect_op).
+    """
+
+    # Bookkeeping per recorded layer, on top of detached pixel data
+    STEP_SIZE = 256
+
+    def __init__(self):
+        self._steps: List[list] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def attached(self, node) -> None:
+        """Record a node the step has just added to the layer tree."""
+        if node is not None:
+            self._steps.append([True, node, None, None])
+            self._size += self.STEP_SIZE
+
+    def detach(self, node) -> None:
+        """Detach a node as part of the step (instead of deleting it)."""
+        parent, below = detach_node(node)
+        self._steps.append([False, node, parent, below])
+        self._size += self.STEP_SIZE + estimate_node_memory(node)['memory_bytes']
+
+    def size(self) -> int:
+        """Estimated bytes kept alive, mostly pixels of detached layers."""
+        return self._size
+
+    def revert(self) -> None:
+        """Undo the step: detach added nodes and re-attach removed ones."""
+        for step in reversed(self._steps):
+            if step[0]:
+                step[2], step[3] = detach_node(step[1])
+            else:
+                attach_node(step[2], step[1], step[3])
+
+    def apply(self) -> None:
+        """Redo the step after revert."""
+        for step in self._steps:
+            if step[0]:
+                attach_node(step[2], step[1], step[3])
+            else:
+                detach_node(step[1])
+
+
+def _increasing_run(values: List[int]) -> List[int]:
+    """Positions of a longest strictly increasing subsequence.
+
+    Patience sorting, O(n log n).
+    """
+    tails: List[int] = []
+    tail_values: List[int] = []
+    previous = [-1] * len(values)
+    for position, value in enumerate(values):
+        k = bisect_left(tail_values, value)
+        if k:
+            previous[position] = tails[k - 1]
+        if k == len(tails):
+            tails.append(position)
+            tail_values.append(value)
+        else:
+            tails[k] = position
+            tail_values[k] = value
+    run = []
+    position = tails[-1] if tails else -1
+    while position != -1:
+        run.append(position)
+        position = previous[position]
+    return run[::-1]
+
+
+# Bytes per channel for Krita color depths
+_DEPTH_BYTES = {'U8': 1, 'U16': 2, 'F16': 2, 'F32': 4}
+
+# Channels (including alpha) for Krita color models
+_MODEL_CHANNELS = {'A': 1, 'GRAYA': 2, 'RGBA': 4, 'XYZA': 4,
+                   'LABA': 4, 'CMYKA': 5, 'YCbCrA': 4}
+
+# Node types that only reference other pixel data
+_SHARED_TYPES = {'clonelayer'}
+
+# Masks store a single 8-bit selection channel
+_MASK_TYPES = {'transparencymask', 'filtermask', 'selectionmask',
+               'transformmask', 'colorizemask'}
+
+
+def estimate_node_memory(node) -> Dict[str, int]:
+    """Estimate layer count and pixel memory of a node subtree.
+
+    Memory is estimated from each node's bounds and pixel size; it
+    ignores tile overhead and undo history, so treat it as a lower bound
+    useful for comparing pages.
+
+    Args:
+        node: Root node of the subtree
+
+    Returns:
+        Dictionary with 'layers' and 'memory_bytes'
+    """
+    layers = 0
+    memory = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        stack.extend(current.childNodes())
+        layers += 1
+
+        node_type = current.type()
+        if node_type in _SHARED_TYPES:
+            continue
+        if node_type in _MASK_TYPES:
+            pixel_size = 1
+        else:
+            pixel_size = (_DEPTH_BYTES.get(current.colorDepth(), 1) *
+                          _MODEL_CHANNELS.get(current.colorModel(), 4))
+        bounds = current.bounds()
+        memory += max(0, bounds.width()) * max(0, bounds.height()) * pixel_size
+
+    return {'layers': layers, 'memory_bytes': memory}
+
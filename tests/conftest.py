@@ -0,0 +1,310 @@
+"""Test setup: an in-memory stand-in for the parts of Krita's API the plugin uses.
+
+Krita's Python module only exists inside Krita, so the tests install a
+small fake 'krita' module with a layer tree that behaves like Krita's
+(nodes are placed above a given sibling or at the top, removed nodes can
+be re-added, unique ids are QUuids).
+"""
+import os
+import sys
+import types
+
+try:
+    from PyQt5.QtCore import QRect, QUuid
+except ImportError:
+    collect_ignore_glob = ['test_*.py']
+else:
+    import pytest
+
+
+    class Node:
+        """A layer of a FakeDocument."""
+
+        def __init__(self, document, name: str, node_type: str, source=None):
+            self.document = document
+            self._name = name
+            self._type = node_type
+            self._id = QUuid.createUuid()
+            self._children = []
+            self._parent = None
+            self._source = source
+            self._rect = QRect()
+            self.svg = []
+
+        def name(self):
+            return self._name
+
+        def setName(self, name):
+            self._name = name
+
+        def type(self):
+            return self._type
+
+        def uniqueId(self):
+            return self._id
+
+        def childNodes(self):
+            return list(self._children)
+
+        def parentNode(self):
+            return self._parent
+
+        def addChildNode(self, child, above):
+            if child._parent is not None:
+                child._parent._children.remove(child)
+            if above is None:
+                index = len(self._children)
+            else:
+                index = self._children.index(above) + 1
+            self._children.insert(index, child)
+            child._parent = self
+            return True
+
+        def remove(self):
+            if self._parent is None:
+                return False
+            self._parent._children.remove(self)
+            self._parent = None
+            return True
+
+        def duplicate(self):
+            copy = Node(self.document, self._name, self._type, self._source)
+            for child in self._children:
+                copy.addChildNode(child.duplicate(), None)
+            return copy
+
+        def sourceNode(self):
+            return self._source
+
+        def bounds(self):
+            return QRect(self._rect)
+
+        def colorDepth(self):
+            return 'U8'
+
+        def colorModel(self):
+            return 'RGBA'
+
+        def setPixelData(self, data, x, y, width, height):
+            self._rect = self._rect.united(QRect(x, y, width, height))
+            return True
+
+        def pixelData(self, x, y, width, height):
+            return bytes(width * height * 4)
+
+        def move(self, x, y):
+            pass
+
+        def setBlendingMode(self, mode):
+            self.blending_mode = mode
+
+        def addShapesFromSvg(self, svg):
+            self.svg.append(svg)
+            return []
+
+        def __repr__(self):
+            return f"<Node {self._name!r}>"
+
+
+    class FakeDocument:
+        """A Krita document holding a tree of Nodes."""
+
+        def __init__(self, width=1000, height=1500, file_name=''):
+            self._width = width
+            self._height = height
+            self._file_name = file_name
+            self._root = Node(self, 'root', 'grouplayer')
+            self._annotations = {}
+            self._active = None
+            self.saved = 0
+            self.closed = False
+            self.unsaved_changes = False
+
+        def rootNode(self):
+            return self._root
+
+        def topLevelNodes(self):
+            return self._root.childNodes()
+
+        def nodeByUniqueID(self, uid):
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                if node._id == uid:
+                    return node
+                stack.extend(node._children)
+            return None
+
+        def nodes(self):
+            """All nodes attached below the root (test helper)."""
+            found = []
+            stack = list(self._root._children)
+            while stack:
+                node = stack.pop()
+                found.append(node)
+                stack.extend(node._children)
+            return found
+
+        def createGroupLayer(self, name):
+            return Node(self, name, 'grouplayer')
+
+        def createVectorLayer(self, name):
+            return Node(self, name, 'vectorlayer')
+
+        def createTransparencyMask(self, name):
+            return Node(self, name, 'transparencymask')
+
+        def createFileLayer(self, name, path, scaling):
+            node = Node(self, name, 'filelayer')
+            node.path = path
+            return node
+
+        def createCloneLayer(self, name, source):
+            return Node(self, name, 'clonelayer', source)
+
+        def createNode(self, name, node_type):
+            return Node(self, name, node_type)
+
+        def activeNode(self):
+            return self._active
+
+        def setActiveNode(self, node):
+            self._active = node
+
+        def width(self):
+            return self._width
+
+        def height(self):
+            return self._height
+
+        def resolution(self):
+            return 300
+
+        def colorModel(self):
+            return 'RGBA'
+
+        def colorDepth(self):
+            return 'U8'
+
+        def refreshProjection(self):
+            pass
+
+        def waitForDone(self):
+            pass
+
+        def setBatchmode(self, value):
+            pass
+
+        def fileName(self):
+            return self._file_name
+
+        def setFileName(self, file_name):
+            self._file_name = file_name
+
+        def modified(self):
+            return self.unsaved_changes
+
+        def save(self):
+            self.saved += 1
+            self.unsaved_changes = False
+            return True
+
+        def saveAs(self, file_name):
+            self._file_name = file_name
+            if os.path.isdir(os.path.dirname(file_name)):
+                with open(file_name, 'wb'):
+                    pass
+            return True
+
+        def close(self):
+            self.closed = True
+            return True
+
+        def annotation(self, key):
+            return self._annotations.get(key)
+
+        def setAnnotation(self, key, description, data):
+            self._annotations[key] = data
+
+
+    class FakeKrita:
+        """Krita.instance() of the fake module; has no window."""
+
+        def __init__(self):
+            self.active_document = None
+            self.opened = {}
+
+        def activeDocument(self):
+            return self.active_document
+
+        def setActiveDocument(self, doc):
+            # Like Krita, a document only becomes active through a view
+            pass
+
+        def activeWindow(self):
+            return None
+
+        def createDocument(self, width, height, name, model, depth, profile, resolution):
+            return FakeDocument(width, height)
+
+        def openDocument(self, path):
+            return self.opened.get(path)
+
+        def documents(self):
+            return [self.active_document] if self.active_document else []
+
+        def addExtension(self, extension):
+            pass
+
+
+    class Krita:
+        _instance = FakeKrita()
+
+        @staticmethod
+        def instance():
+            return Krita._instance
+
+
+    class Extension:
+        def __init__(self, parent=None):
+            pass
+
+
+    class DockWidget:
+        pass
+
+
+    class DockWidgetFactory:
+        pass
+
+
+    krita = types.ModuleType('krita')
+    krita.Krita = Krita
+    krita.Extension = Extension
+    krita.DockWidget = DockWidget
+    krita.DockWidgetFactory = DockWidgetFactory
+    krita.DockWidgetFactoryBase = types.SimpleNamespace(DockRight=0)
+    sys.modules.setdefault('krita', krita)
+
+
+    @pytest.fixture(scope='session')
+    def qapp():
+        """A GUI application, needed for fonts; offscreen unless told otherwise."""
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtGui import QGuiApplication
+        return QGuiApplication.instance() or QGuiApplication([])
+
+
+    @pytest.fixture
+    def fake_krita():
+        """The fake Krita instance, reset for every test."""
+        Krita._instance = FakeKrita()
+        return Krita._instance
+
+
+    @pytest.fixture
+    def document(fake_krita):
+        """An active single-page-project document."""
+        doc = FakeDocument()
+        fake_krita.active_document = doc
+        return doc
@@ -0,0 +1,80 @@
+"""Imported images go through the project's asset store, decoded off the GUI thread."""
+import threading
+
+import pytest
+from PyQt5.QtGui import QColor, QImage
+
+from multi_page_comics import asset_store
+from multi_page_comics.batch_import import BatchImporter
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+@pytest.fixture
+def manager(document, tmp_path):
+    document.setFileName(str(tmp_path / 'comic.kra'))
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Test', 'page_width': 1000, 'page_height': 1500})
+    manager.apply_template_to_page(0, '2x3-standard')
+    return manager
+
+
+@pytest.fixture
+def scan(qapp, tmp_path):
+    image = QImage(2000, 3000, QImage.Format_ARGB32)
+    image.fill(QColor('white'))
+    path = str(tmp_path / 'scan.png')
+    assert image.save(path)
+    return path
+
+
+def file_layers(document):
+    return [node for node in document.nodes() if node.type() == 'filelayer']
+
+
+def test_same_image_in_two_panels_is_stored_once(manager, document, scan):
+    first = manager.import_image_to_panel(0, 0, scan)
+    second = manager.import_image_to_panel(0, 1, scan)
+    assert first['assets'] == second['assets']
+
+    store = manager.get_asset_store()
+    assert store.get_stats()['object_count'] == 1
+    paths = {layer.path for layer in file_layers(document)}
+    assert len(paths) == 1
+    assert QImage(paths.pop()).width() <= max(first['bounds']['width'], first['bounds']['height'])
+
+    assert manager.undo()
+    assert 'assets' not in manager.get_page(0)['panels'][1]
+    assert len(file_layers(document)) == 1
+
+
+def test_variants_are_decoded_on_worker_threads(manager, scan, monkeypatch):
+    decoded_on = []
+
+    class RecordingReader(asset_store.QImageReader):
+        def read(self):
+            decoded_on.append(threading.current_thread())
+            return super().read()
+
+    monkeypatch.setattr(asset_store, 'QImageReader', RecordingReader)
+    results = manager.import_images([(0, 0, scan), (0, 1, scan), (0, None, scan)])
+    assert all(result is not None for result in results)
+    assert decoded_on
+    assert threading.main_thread() not in decoded_on
+
+
+def test_batch_import_uses_the_asset_store(manager, document, tmp_path, qapp):
+    folder = tmp_path / 'scans'
+    folder.mkdir()
+    image = QImage(400, 400, QImage.Format_ARGB32)
+    image.fill(QColor('black'))
+    for name in ('001_1.png', '001_2.png'):
+        assert image.save(str(folder / name))
+
+    summary = BatchImporter(manager).import_folder(str(folder), blending_mode='multiply')
+    assert len(summary['imported']) == 2 and not summary['failed']
+    # Identical scans are stored once
+    assert manager.get_asset_store().get_stats()['object_count'] == 1
+    layers = file_layers(document)
+    assert len(layers) == 2
+    assert all(layer.blending_mode == 'multiply' for layer in layers)
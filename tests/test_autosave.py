@@ -0,0 +1,56 @@
+"""The autosave sidecar holds the model as it was when the save started."""
+from concurrent.futures import Future
+
+from multi_page_comics.autosave import ProjectAutosave, read_sidecar
+
+
+class ManualExecutor:
+    """Runs submitted writes only when asked, like a busy worker thread."""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.pending.append((future, fn, args))
+        return future
+
+    def run(self):
+        for future, fn, args in self.pending:
+            future.set_result(fn(*args))
+        self.pending.clear()
+
+
+def test_snapshot_is_taken_when_the_save_starts(tmp_path):
+    project = {'metadata': {'title': 'Before'}, 'pages': [{'page_number': 1}]}
+    project_file = str(tmp_path / 'comic.kra')
+    autosave = ProjectAutosave(lambda: project, lambda: project_file)
+    autosave._executor = executor = ManualExecutor()
+
+    autosave.schedule()
+    autosave.flush()
+    # Edits made while the worker is busy must not leak into this write
+    project['metadata']['title'] = 'After'
+    project['pages'].append({'page_number': 2})
+    executor.run()
+
+    envelope = read_sidecar(project_file)
+    assert envelope['project']['metadata']['title'] == 'Before'
+    assert len(envelope['project']['pages']) == 1
+
+
+def test_overtaken_snapshot_is_not_written(tmp_path):
+    project = {'metadata': {}, 'pages': []}
+    project_file = str(tmp_path / 'comic.kra')
+    autosave = ProjectAutosave(lambda: project, lambda: project_file)
+    autosave._executor = executor = ManualExecutor()
+
+    autosave.schedule()
+    autosave.flush()
+    autosave.schedule()
+    executor.run()
+    assert read_sidecar(project_file) is None
+
+    autosave.flush()
+    executor.run()
+    assert read_sidecar(project_file)['revision'] == 2
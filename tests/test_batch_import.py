@@ -0,0 +1,31 @@
+"""Folder imports into projects without an asset store are undoable paint layers."""
+from PyQt5.QtGui import QColor, QImage
+
+from multi_page_comics.batch_import import BatchImporter
+from multi_page_comics.comic_manager import ComicProjectManager
+from multi_page_comics.events import PANEL_CHANGED
+
+
+def test_unsaved_project_import_is_one_undo_step(document, tmp_path, qapp):
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Test', 'page_width': 1000, 'page_height': 1500})
+    manager.apply_template_to_page(0, '2x3-standard')
+    assert manager.get_asset_store() is None
+    events = []
+    manager.add_event_listener(events.extend)
+
+    image = QImage(300, 200, QImage.Format_ARGB32)
+    image.fill(QColor('black'))
+    for name in ('001_1.png', '001_2.png', '001.png'):
+        assert image.save(str(tmp_path / name))
+
+    summary = BatchImporter(manager, batch_size=2).import_folder(str(tmp_path))
+    assert len(summary['imported']) == 3
+    layers = [n for n in document.nodes() if n.type() == 'paintlayer' and n.name().endswith('.png')]
+    assert len(layers) == 3
+    assert any(event.type == PANEL_CHANGED and event.page == 0 for event in events)
+
+    assert manager.history.undo_label() == "Import Folder"
+    assert manager.undo()
+    assert not [n for n in document.nodes() if n.name().endswith('.png')]
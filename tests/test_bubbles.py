@@ -0,0 +1,61 @@
+"""Bubbles are drawn as vector outlines with their tail merged in."""
+import re
+
+import pytest
+from PyQt5.QtCore import QRectF
+
+from multi_page_comics.script_importer import ScriptImporter
+from multi_page_comics.speech_bubble_manager import SpeechBubbleManager
+
+
+BUBBLE = {'style': 'standard', 'x': 100, 'y': 100, 'width': 300, 'height': 150}
+
+
+def outline_points(svg):
+    """Vertices and control points of the first path of an SVG document."""
+    data = re.search(r'<path d="([^"]*)"', svg).group(1)
+    numbers = [float(n) for n in re.findall(r'-?\d+(?:\.\d+)?', data)]
+    return list(zip(numbers[::2], numbers[1::2]))
+
+
+def test_bubble_outline_is_added_to_the_layer(document):
+    group = document.createGroupLayer('Lettering')
+    layer = SpeechBubbleManager().create_bubble(document, group, dict(BUBBLE))
+
+    assert layer.parentNode() is group
+    assert len(layer.svg) == 1
+    points = outline_points(layer.svg[0])
+    bounds = QRectF(100, 100, 300, 150)
+    assert all(bounds.adjusted(-1, -1, 1, 1).contains(x, y) for x, y in points)
+
+
+@pytest.mark.parametrize('tail_style', ['curved', 'sharp', 'bubble'])
+def test_tail_reaches_the_tail_point(document, tail_style):
+    bubble = dict(BUBBLE, tail=True, tail_x=180, tail_y=320, tail_style=tail_style)
+    layer = SpeechBubbleManager().create_bubble(document, document.rootNode(), bubble)
+
+    points = outline_points(layer.svg[0])
+    lowest = max(y for _, y in points)
+    assert 300 < lowest <= 321
+
+
+def test_whisper_outline_is_dashed(document):
+    bubble = dict(BUBBLE, style='whisper')
+    layer = SpeechBubbleManager().create_bubble(document, document.rootNode(), bubble)
+    assert 'stroke-dasharray' in layer.svg[0]
+
+
+def test_overlong_line_is_reported_as_not_fitting(qapp):
+    importer = ScriptImporter(project_manager=None, font_size=36)
+    # A word wider than the bubble never fits, however tall the bubble grows
+    entry = {'style': 'standard', 'speaker': 'ANNA', 'text': 'A' * 200}
+    bounds = {'x': 0, 'y': 0, 'width': 1000, 'height': 100000}
+    state = {'y': None, 'speakers': []}
+
+    bubble, reason = importer._place(entry, bounds, state)
+    assert bubble is None
+    assert 'does not fit' in reason
+
+    bubble, reason = importer._place(dict(entry, text='Hi.'), {**bounds, 'height': 40}, state)
+    assert bubble is None
+    assert reason == "no room left in the panel"
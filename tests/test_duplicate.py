@@ -0,0 +1,70 @@
+"""Duplicated pages share pixels until a stroke starts on them or their source."""
+import pytest
+
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+@pytest.fixture
+def manager(document):
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Test', 'page_width': 1000, 'page_height': 1500})
+    manager.apply_template_to_page(0, 'splash-page')
+    return manager
+
+
+def content_layer(doc, panel):
+    group = doc.nodeByUniqueID(panel['layer_id'])
+    return [n for n in group.childNodes() if n.name().endswith('Content')][0]
+
+
+def test_duplicate_is_numbered_after_its_source(manager, document):
+    manager.add_page()
+    manager.add_page()
+    manager.duplicate_page(0)
+
+    pages = manager.current_project['pages']
+    assert [p['page_number'] for p in pages] == [1, 2, 3, 4]
+    names = [document.nodeByUniqueID(p['layer_id']).name() for p in pages]
+    assert names == ['Page 1', 'Page 2', 'Page 3', 'Page 4']
+    # Page layers stay in reading order, bottom to top
+    assert [n.uniqueId() for n in document.topLevelNodes()] == [p['layer_id'] for p in pages]
+
+    manager.undo()
+    pages = manager.current_project['pages']
+    assert [p['page_number'] for p in pages] == [1, 2, 3]
+    assert [document.nodeByUniqueID(p['layer_id']).name() for p in pages] == \
+        ['Page 1', 'Page 2', 'Page 3']
+
+
+def test_stroke_on_shared_panel_paints_on_its_own_copy(manager, document):
+    copy = manager.duplicate_page(0)
+    clone = content_layer(document, copy['panels'][0])
+    assert clone.type() == 'clonelayer'
+    document.setActiveNode(clone)
+
+    assert manager.ensure_panel_writable(document, clone)
+    active = document.activeNode()
+    assert active.type() == 'paintlayer'
+    assert active.parentNode().uniqueId() == copy['panels'][0]['layer_id']
+    assert not manager.ensure_panel_writable(document, active)
+
+
+def test_stroke_on_source_panel_unshares_its_copies(manager, document):
+    manager.duplicate_page(0)
+    manager.duplicate_page(1)
+    source = manager.get_page(0)['panels'][0]
+    copies = [manager.get_page(i)['panels'][0] for i in (1, 2)]
+    assert all(p['shared_from'] == source['layer_id'] for p in copies)
+
+    assert manager.ensure_panel_writable(document, content_layer(document, source))
+    for i in (1, 2):
+        panel = manager.get_page(i)['panels'][0]
+        assert 'shared_from' not in panel
+        assert content_layer(document, panel).type() == 'paintlayer'
+
+
+def test_pages_without_shared_panels_are_left_alone(manager, document):
+    node = content_layer(document, manager.get_page(0)['panels'][0])
+    assert not manager.ensure_panel_writable(document, node)
+    assert manager.history.undo_label() != "Materialize Panel"
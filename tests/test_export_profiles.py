@@ -0,0 +1,45 @@
+"""Multi-profile export resamples each profile from the native render."""
+from PyQt5.QtGui import QImage
+
+from multi_page_comics.export_manager import ExportManager
+
+
+class Project:
+    def __init__(self, docs):
+        self.docs = docs
+        self.current_project = {'metadata': {}, 'pages': [{} for _ in docs]}
+
+    def get_page_document(self, page_index):
+        return self.docs[page_index]
+
+
+def exporter_rendering(images):
+    exporter = ExportManager()
+    exporter.render_page = lambda doc, i: images[i]
+    return exporter
+
+
+def page_image(width=200, height=300):
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(0xffffffff)
+    return image
+
+
+def test_profiles_are_downsampled_but_never_upscaled(document, tmp_path):
+    exporter = exporter_rendering([page_image()])
+    profiles = [
+        {'name': 'print', 'format': 'png', 'dpi': 600},
+        {'name': 'web', 'format': 'png', 'dpi': 150},
+    ]
+    assert exporter.export_profiles(Project([document]), str(tmp_path), profiles)
+
+    # The document is 300 DPI
+    assert QImage(str(tmp_path / 'print' / 'page_001.png')).size().width() == 200
+    assert QImage(str(tmp_path / 'web' / 'page_001.png')).size().width() == 100
+
+
+def test_unrendered_page_fails_the_export(document, tmp_path):
+    exporter = exporter_rendering([page_image(), None])
+    profiles = [{'name': 'web', 'format': 'png', 'dpi': 150}]
+    assert not exporter.export_profiles(Project([document, document]), str(tmp_path), profiles)
+    assert (tmp_path / 'web' / 'page_001.png').exists()
@@ -0,0 +1,45 @@
+"""Single-document projects work without a window, where Krita has no active document."""
+from multi_page_comics.cli import process_project
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+def saved_project(fake_krita, path):
+    """Create and save a one-page project the fake Krita can reopen."""
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Headless'})
+    assert manager.save_project(path)
+    fake_krita.opened[path] = manager.document
+    return manager.document
+
+
+def test_worker_processes_a_single_document_project(fake_krita, tmp_path):
+    path = str(tmp_path / 'issue.kra')
+    doc = saved_project(fake_krita, path)
+    assert fake_krita.activeDocument() is None
+
+    operations = [
+        {'op': 'add_page', 'template': '2x3-standard', 'count': 2},
+        {'op': 'apply_template', 'page': 1, 'template': 'splash-page'},
+        {'op': 'duplicate_page', 'page': 2},
+        {'op': 'save'},
+    ]
+    result = process_project(path, operations, [])
+    assert result['ok'], result['error']
+    assert doc.closed
+
+    manager = ComicProjectManager()
+    fake_krita.opened[path] = doc
+    assert manager.load_project(path)
+    assert manager.document is doc
+    assert len(manager.current_project['pages']) == 4
+    assert len(manager.get_page(0)['panels']) == 1
+
+
+def test_failed_load_closes_the_document(fake_krita, tmp_path):
+    path = str(tmp_path / 'plain.kra')
+    doc = fake_krita.createDocument(100, 100, '', 'RGBA', 'U8', '', 300)
+    fake_krita.opened[path] = doc
+
+    assert not ComicProjectManager().load_project(path)
+    assert doc.closed
@@ -0,0 +1,141 @@
+"""Undo/redo must keep the layer ids stored in the model pointing at live layers."""
+import pytest
+
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+@pytest.fixture
+def manager(document):
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Test', 'page_width': 1000, 'page_height': 1500})
+    return manager
+
+
+def page_groups(doc):
+    return [node for node in doc.topLevelNodes() if node.name().startswith('Page')]
+
+
+def assert_consistent(manager, doc):
+    """Every page and panel id resolves, and no orphan groups are left."""
+    pages = manager.current_project['pages']
+    assert len(page_groups(doc)) == len(pages)
+    for page in pages:
+        page_layer = doc.nodeByUniqueID(page['layer_id'])
+        assert page_layer is not None
+        panel_ids = [panel['layer_id'] for panel in page['panels']]
+        for panel_id in panel_ids:
+            node = doc.nodeByUniqueID(panel_id)
+            assert node is not None and node.parentNode() is page_layer
+        groups = [child.uniqueId() for child in page_layer.childNodes()
+                  if child.name().startswith('Panel')]
+        assert sorted(groups, key=str) == sorted(panel_ids, key=str)
+    assert manager.get_project_stats()['panel_count'] == sum(len(p['panels']) for p in pages)
+
+
+def test_apply_template_undo_restores_panel_layers(manager, document):
+    first = manager.apply_template_to_page(0, '2x3-standard')
+    manager.apply_template_to_page(0, '3x2-standard')
+    assert_consistent(manager, document)
+
+    assert manager.undo()
+    assert_consistent(manager, document)
+    assert [p['layer_id'] for p in manager.get_page(0)['panels']] == \
+        [p['layer_id'] for p in first]
+
+    assert manager.undo()
+    assert_consistent(manager, document)
+    assert manager.get_page(0)['panels'] == []
+
+    assert manager.redo() and manager.redo()
+    assert_consistent(manager, document)
+    assert len(manager.get_page(0)['panels']) == 6
+
+
+def test_undo_restores_layer_order(manager, document):
+    manager.apply_template_to_page(0, '2x3-standard')
+    page_layer = document.nodeByUniqueID(manager.get_page(0)['layer_id'])
+    before = [child.uniqueId() for child in page_layer.childNodes()]
+
+    manager.apply_template_to_page(0, 'splash-page')
+    manager.undo()
+    assert [child.uniqueId() for child in page_layer.childNodes()] == before
+
+
+def test_add_and_duplicate_page_undo_detach_page_layers(manager, document):
+    manager.apply_template_to_page(0, '2x3-standard')
+    manager.add_page('splash-page')
+    manager.duplicate_page(0)
+    assert len(page_groups(document)) == 3
+    assert_consistent(manager, document)
+
+    manager.undo()
+    manager.undo()
+    assert len(page_groups(document)) == 1
+    assert_consistent(manager, document)
+
+    manager.redo()
+    manager.redo()
+    assert len(page_groups(document)) == 3
+    assert_consistent(manager, document)
+
+
+def test_materialize_is_undone_with_its_layers(manager, document):
+    manager.apply_template_to_page(0, 'splash-page')
+    copy = manager.duplicate_page(0)
+    panel = copy['panels'][0]
+    group = document.nodeByUniqueID(panel['layer_id'])
+    clones = [n for n in group.childNodes() if n.type() == 'clonelayer']
+    assert clones
+
+    assert manager.ensure_panel_writable(document, clones[0])
+    materialized = manager.get_page(1)['panels'][0]
+    assert 'shared_from' not in materialized
+    assert 'shared_from' in panel
+    assert not [n for n in group.childNodes() if n.type() == 'clonelayer']
+
+    manager.undo()
+    assert manager.get_page(1)['panels'][0] is panel
+    assert [n.uniqueId() for n in group.childNodes() if n.type() == 'clonelayer'] == \
+        [c.uniqueId() for c in clones]
+    assert_consistent(manager, document)
+
+
+def test_create_from_manifest_undo_removes_all_pages(manager, document):
+    manager.create_from_manifest({'pages': [{'template': 'splash-page', 'repeat': 3}]})
+    assert len(page_groups(document)) == 4
+    manager.undo()
+    assert len(page_groups(document)) == 1
+    assert_consistent(manager, document)
+
+
+def test_delete_page_detaches_its_layer_and_renumbers(manager, document):
+    manager.add_page()
+    manager.add_page()
+    manager.delete_page(0)
+    assert len(page_groups(document)) == 2
+    assert [p['page_number'] for p in manager.current_project['pages']] == [1, 2]
+    assert sorted(node.name() for node in page_groups(document)) == ['Page 1', 'Page 2']
+    assert_consistent(manager, document)
+
+    manager.undo()
+    assert len(page_groups(document)) == 3
+    assert [p['page_number'] for p in manager.current_project['pages']] == [1, 2, 3]
+    assert [node.name() for node in page_groups(document)] == ['Page 1', 'Page 2', 'Page 3']
+    assert_consistent(manager, document)
+
+
+def test_move_page_renumbers_pages(manager, document):
+    manager.add_page()
+    manager.add_page()
+    first = manager.get_page(0)
+    assert manager.move_page(0, 2)
+    assert manager.get_page(2) is first
+    assert [p['page_number'] for p in manager.current_project['pages']] == [1, 2, 3]
+    assert document.nodeByUniqueID(first['layer_id']).name() == 'Page 3'
+
+    manager.undo()
+    assert manager.get_page(0) is first
+    assert [p['page_number'] for p in manager.current_project['pages']] == [1, 2, 3]
+    assert document.nodeByUniqueID(first['layer_id']).name() == 'Page 1'
+    assert_consistent(manager, document)
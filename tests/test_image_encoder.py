@@ -0,0 +1,32 @@
+"""Outputs without alpha show transparent pixels as white paper."""
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QImage
+
+from multi_page_comics.image_encoder import encode_image
+
+
+@pytest.mark.parametrize('format, options', [
+    ('png', {'transparency': False}),
+    ('jpg', {'quality': 95}),
+])
+def test_transparent_pixels_encode_as_white(qapp, tmp_path, format, options):
+    image = QImage(8, 8, QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    image.setPixelColor(0, 0, QColor('black'))
+    path = str(tmp_path / f'page.{format}')
+    assert encode_image(image, path, format, options)
+
+    encoded = QImage(path)
+    assert not encoded.hasAlphaChannel()
+    corner = encoded.pixelColor(7, 7)
+    assert min(corner.red(), corner.green(), corner.blue()) >= 250
+    assert encoded.pixelColor(0, 0).red() < 50
+
+
+def test_transparency_is_kept_when_asked_for(qapp, tmp_path):
+    image = QImage(4, 4, QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    path = str(tmp_path / 'page.png')
+    assert encode_image(image, path, 'png', {'transparency': True})
+    assert QImage(path).pixelColor(1, 1).alpha() == 0
@@ -0,0 +1,58 @@
+"""Manifests are checked before anything is created, and never leave untracked pages."""
+import pytest
+
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+@pytest.fixture
+def manager(document):
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Test', 'page_width': 1000, 'page_height': 1500})
+    return manager
+
+
+@pytest.mark.parametrize('entry', [
+    {'repeat': 'many'},
+    {'repeat': None},
+    {'layers': [{'name': 'Inks'}]},
+    {'layers': [{'name': 'Art', 'type': 'group', 'children': 'Inks'}]},
+    {'template': 'no-such-template'},
+])
+def test_invalid_manifest_changes_nothing(manager, entry):
+    manifest = {'metadata': {'title': 'Changed'}, 'pages': [{'repeat': 2}, entry]}
+    assert manager.create_from_manifest(manifest) is None
+    assert len(manager.current_project['pages']) == 1
+    assert manager.current_project['metadata']['title'] == 'Test'
+    assert not manager.history.can_undo()
+
+
+def test_repeated_pages_get_their_own_layer_structure(manager):
+    layers = [{'name': 'Art', 'type': 'group', 'children': [{'name': 'Inks', 'type': 'paint'}]}]
+    pages = manager.create_from_manifest({'pages': [{'repeat': 2, 'layers': layers}]})
+    first, second = pages[0]['layers'], pages[1]['layers']
+    assert first == second == layers
+    assert first is not second and first[0]['children'] is not second[0]['children']
+    assert first[0] is not layers[0]
+
+
+def test_failing_page_keeps_the_created_ones_undoable(manager, document, monkeypatch):
+    create_page = manager._create_page
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("document full")
+        return create_page(*args, **kwargs)
+
+    monkeypatch.setattr(manager, '_create_page', failing)
+    with pytest.raises(RuntimeError):
+        manager.create_from_manifest({'metadata': {'issue': 7}, 'pages': [{'repeat': 4}]})
+    assert len(manager.current_project['pages']) == 3
+    assert manager.get_project_stats()['page_count'] == 3
+
+    assert manager.undo()
+    assert len(manager.current_project['pages']) == 1
+    assert manager.current_project['metadata']['issue'] == 1
+    assert len([n for n in document.topLevelNodes() if n.name().startswith('Page')]) == 1
@@ -0,0 +1,60 @@
+"""Page files of multi-document projects follow the pages that use them."""
+import zipfile
+
+import pytest
+
+from multi_page_comics.comic_manager import ComicProjectManager
+
+
+@pytest.fixture
+def manager(fake_krita, tmp_path):
+    manager = ComicProjectManager()
+    manager.autosave.enabled = False
+    manager.create_project({'title': 'Multi', 'mode': 'multi',
+                            'project_dir': str(tmp_path / 'comic')})
+    manager.add_page()
+    manager.add_page()
+    return manager
+
+
+def page_files(manager):
+    return sorted(p.name for p in (manager._page_path('pages')).glob('*.kra'))
+
+
+def test_deleted_page_file_is_kept_for_undo_then_removed(manager):
+    assert page_files(manager) == ['page_001.kra', 'page_002.kra', 'page_003.kra']
+
+    manager.delete_page(1)
+    assert manager.save_project()
+    # Undo can still restore the page
+    assert 'page_002.kra' in page_files(manager)
+
+    manager.history.clear()
+    assert manager.save_project()
+    assert page_files(manager) == ['page_001.kra', 'page_003.kra']
+
+
+def test_archive_leaves_out_deleted_pages(manager, tmp_path):
+    manager.delete_page(1)
+    archive = str(tmp_path / 'comic.zip')
+    assert manager.archive_project(archive)
+    names = zipfile.ZipFile(archive).namelist()
+    assert 'pages/page_001.kra' in names
+    assert 'pages/page_002.kra' not in names
+
+
+def test_duplicate_fails_cleanly_when_the_page_cannot_be_opened(manager):
+    # The fake Krita cannot reopen files, so closing a page makes it unreachable
+    path = str(manager._page_path(manager.get_page(0)['file']))
+    manager.document_pool.release(path)
+    assert manager.duplicate_page(0) is None
+    assert len(manager.current_project['pages']) == 3
+
+
+def test_deleted_page_keeps_its_unsaved_edits_for_undo(manager):
+    path = str(manager._page_path(manager.get_page(1)['file']))
+    doc = manager.document_pool.peek(path)
+    doc.unsaved_changes = True
+    manager.delete_page(1)
+    assert doc.saved and doc.closed
+    assert [p['page_number'] for p in manager.current_project['pages']] == [1, 2]
@@ -0,0 +1,24 @@
+"""The template gutter moves every panel edge inwards by half of it, rectangles included."""
+import pytest
+
+from multi_page_comics.panel_system import PanelSystem
+
+
+def create(document, panel_def, gutter):
+    page_layer = document.createGroupLayer('Page 1')
+    return PanelSystem().create_panel(document, page_layer, panel_def, 1, gutter)
+
+
+def test_rectangle_panels_are_inset_by_half_the_gutter(document):
+    panel_def = {'x': 0, 'y': 0, 'width': 50, 'height': 50}
+    assert create(document, panel_def, 0)['bounds'] == \
+        {'x': 0, 'y': 0, 'width': 500, 'height': 750}
+    assert create(document, panel_def, 12)['bounds'] == \
+        {'x': 6, 'y': 6, 'width': 488, 'height': 738}
+
+
+@pytest.mark.parametrize('gutter', [0, 12])
+def test_rectangular_polygon_matches_rectangle_panel(document, gutter):
+    rect = {'x': 10, 'y': 20, 'width': 40, 'height': 30}
+    polygon = {'points': [[10, 20], [50, 20], [50, 50], [10, 50]]}
+    assert create(document, polygon, gutter)['bounds'] == create(document, rect, gutter)['bounds']